@@ -14,6 +14,7 @@ The system does NOT auto-merge entities. Instead, it:
 import logging
 from uuid import uuid4
 
+import numpy as np
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
@@ -180,7 +181,7 @@ def _create_entity_from_detection(
     embedding = None
     if description:
         embedding = get_embedding(description)
-        if not embedding:
+        if embedding is None:
             logger.debug("Could not generate embedding for %s entity", entity_type)
 
     # Create entity
@@ -223,7 +224,7 @@ def _compute_similarities_for_entity(
     Returns:
         Count of similarities stored
     """
-    if not entity.embedding:
+    if entity.embedding is None:
         return 0
 
     # Find similar entities using vector search
@@ -245,7 +246,7 @@ def _compute_similarities_for_entity(
             LIMIT 20
         """),
         {
-            "query_embedding": str(entity.embedding),
+            "query_embedding": str(np.asarray(entity.embedding).tolist()),
             "project_id": str(entity.project_id),
             "entity_type": entity.entity_type,
             "current_entity_id": str(entity.entity_id),
@@ -128,7 +128,7 @@ def process_asset(asset_id: str, project_id: str) -> None:
                 tags=asset.asset_tags,
             )
             embedding = get_embedding(embedding_text)
-            if embedding:
+            if embedding is not None:
                 asset.embedding = embedding
 
             logger.debug(
@@ -1595,7 +1595,7 @@ def _semantic_search(
         return {"error": "Empty search query", "assets": []}
 
     query_embedding = get_query_embedding(query)
-    if not query_embedding:
+    if query_embedding is None:
         return {
             "error": "Failed to generate query embedding",
             "assets": [],
@@ -1619,7 +1619,7 @@ def _semantic_search(
             LIMIT :limit
         """),
         {
-            "query_vector": str(query_embedding),
+            "query_vector": str(query_embedding.tolist()),
             "project_id": project_id,
             "min_similarity": min_similarity,
             "limit": limit,
@@ -36,14 +36,14 @@ from operators.render_operator import (
     RenderError,
     RenderValidationError,
     TimelineNotFoundError,
-    cancel_render_job,
+    cancel_render_job_async,
     create_render_job,
     delete_render_job,
-    dispatch_render_job,
+    dispatch_render_job_async,
     ensure_render_manifest,
     get_render_job,
     list_render_jobs,
-    poll_job_status,
+    poll_job_status_async,
     render_job_to_response,
     update_job_status,
 )
@@ -107,7 +107,7 @@ async def create_render(
             created_by=f"user:{session.user_id}",
         )
 
-        job = dispatch_render_job(db, job.job_id)
+        job = await dispatch_render_job_async(db, job.job_id)
 
         logger.info(
             "render_create_dispatched project_id=%s job_id=%s status=%s execution_mode=%s",
@@ -166,7 +166,7 @@ async def get_render_status(
     poll: bool = Query(False, description="Poll Cloud Run for latest status"),
 ):
     if poll:
-        job = poll_job_status(db, job_id)
+        job = await poll_job_status_async(db, job_id)
     else:
         job = get_render_job(db, job_id)
 
@@ -274,7 +274,7 @@ async def cancel_render(
 
     try:
         reason = request.reason if request else None
-        job = cancel_render_job(db, job_id, reason)
+        job = await cancel_render_job_async(db, job_id, reason)
         return RenderJobCancelResponse(ok=True, job=render_job_to_response(job))
     except RenderError as e:
         raise HTTPException(status_code=400, detail=str(e))
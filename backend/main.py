@@ -1,5 +1,6 @@
 import logging
 import os
+import threading
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -17,6 +18,7 @@ from handlers.project_handler import router as project_router
 from handlers.render_handler import router as render_router
 from handlers.snippet_handler import router as snippet_router
 from handlers.timeline_handler import router as timeline_router
+from utils.cloud_run_jobs import prewarm_cloud_run_client
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 load_dotenv(ROOT_DIR / ".env")
@@ -86,6 +88,13 @@ if AGENT_RUNS_AND_JOBS_LOG_FILE:
 app = FastAPI(app_name="Agent Editor Backend")
 
 
+@app.on_event("startup")
+def prewarm_render_clients() -> None:
+    if os.getenv("RENDER_EXECUTION_MODE", "cloud").lower() == "local":
+        return
+    threading.Thread(target=prewarm_cloud_run_client, daemon=True).start()
+
+
 app.include_router(health_router)
 app.include_router(auth_router)
 app.include_router(project_router)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import logging
 import os
 from datetime import datetime, timezone
@@ -8,6 +9,7 @@ from uuid import UUID
 
 from sqlalchemy.orm import Session as DBSession
 
+from database.base import SessionLocal
 from database.models import (
     Assets,
     RenderJob as RenderJobModel,
@@ -26,6 +28,8 @@ from models.render_models import (
 
 from models.timeline_models import Timeline
 from utils.cloud_run_jobs import (
+    CloudRunJobError,
+    JobExecution,
     JobExecutionRequest,
     get_cloud_run_client,
 )
@@ -157,10 +161,10 @@ def create_render_job(
     return job
 
 
-def dispatch_render_job(
+def _prepare_dispatch(
     db: DBSession,
     job_id: UUID,
-) -> RenderJobModel:
+) -> tuple[RenderJobModel, JobExecutionRequest | None]:
     job = get_render_job(db, job_id)
     if not job:
         raise RenderJobNotFoundError(job_id)
@@ -247,9 +251,7 @@ def dispatch_render_job(
         db.commit()
         db.refresh(job)
         logger.info(f"Render job {job_id} queued for local execution")
-        return job
-
-    client = get_cloud_run_client()
+        return job, None
 
     execution_request = JobExecutionRequest(
         job_id=str(job.job_id),
@@ -259,12 +261,27 @@ def dispatch_render_job(
         timeout_seconds=_estimate_timeout(timeline, preset),
     )
 
-    execution = client.execute_render_job(execution_request)
+    return job, execution_request
+
+
+def _fail_rejected_dispatch(
+    db: DBSession, job: RenderJobModel, error: CloudRunJobError
+) -> RenderError:
+    job.status = RenderJobStatus.FAILED.value
+    job.error_message = f"Cloud Run rejected render job: {error}"
+    db.commit()
+    return RenderError(f"Failed to dispatch render job: {error}")
+
 
+def _record_dispatch(
+    db: DBSession,
+    job: RenderJobModel,
+    execution: JobExecution | None,
+) -> RenderJobModel:
     if execution:
         job.status = RenderJobStatus.QUEUED.value
         job.cloud_run_job_name = execution.job_name
-        job.cloud_run_execution_id = execution.execution_id
+        job.cloud_run_execution_id = execution.execution_id or None
         job.started_at = datetime.now(timezone.utc)
     else:
         job.status = RenderJobStatus.PENDING.value
@@ -274,13 +291,78 @@ def dispatch_render_job(
     db.refresh(job)
 
     logger.info(
-        f"Dispatched render job {job_id} to Cloud Run "
+        f"Dispatched render job {job.job_id} to Cloud Run "
         f"(execution: {job.cloud_run_execution_id})"
     )
 
     return job
 
 
+def _record_launch_result(job_id: UUID, execution: JobExecution) -> None:
+    # Runs after the request that dispatched the job has finished, so it needs
+    # its own session.
+    db = SessionLocal()
+    try:
+        job = get_render_job(db, job_id)
+        if not job or job.status != RenderJobStatus.QUEUED.value:
+            return
+
+        if execution.execution_id and not job.cloud_run_execution_id:
+            job.cloud_run_execution_id = execution.execution_id
+            db.commit()
+
+        if execution.status == "RUNNING":
+            update_job_status(db, job_id, RenderJobStatus.PROCESSING)
+        elif execution.status == "FAILED":
+            update_job_status(
+                db,
+                job_id,
+                RenderJobStatus.FAILED,
+                error_message=f"Cloud Run execution failed to start: {execution.error_message}",
+            )
+    finally:
+        db.close()
+
+
+def dispatch_render_job(
+    db: DBSession,
+    job_id: UUID,
+) -> RenderJobModel:
+    job, execution_request = _prepare_dispatch(db, job_id)
+    if execution_request is None:
+        return job
+
+    client = get_cloud_run_client()
+
+    try:
+        execution = client.execute_render_job(execution_request)
+    except CloudRunJobError as e:
+        raise _fail_rejected_dispatch(db, job, e)
+
+    return _record_dispatch(db, job, execution)
+
+
+async def dispatch_render_job_async(
+    db: DBSession,
+    job_id: UUID,
+) -> RenderJobModel:
+    job, execution_request = _prepare_dispatch(db, job_id)
+    if execution_request is None:
+        return job
+
+    client = get_cloud_run_client()
+
+    try:
+        execution = await client.execute_render_job_async(
+            execution_request,
+            on_complete=functools.partial(_record_launch_result, job.job_id),
+        )
+    except CloudRunJobError as e:
+        raise _fail_rejected_dispatch(db, job, e)
+
+    return _record_dispatch(db, job, execution)
+
+
 def get_render_job(db: DBSession, job_id: UUID) -> RenderJobModel | None:
     return db.query(RenderJobModel).filter(RenderJobModel.job_id == job_id).first()
 
@@ -432,11 +514,7 @@ def update_job_status(
     return job
 
 
-def cancel_render_job(
-    db: DBSession,
-    job_id: UUID,
-    reason: str | None = None,
-) -> RenderJobModel | None:
+def _get_cancellable_job(db: DBSession, job_id: UUID) -> RenderJobModel | None:
     job = get_render_job(db, job_id)
     if not job:
         return None
@@ -448,10 +526,14 @@ def cancel_render_job(
     ):
         raise RenderError(f"Cannot cancel job in {job.status} state")
 
-    if job.cloud_run_job_name and job.cloud_run_execution_id:
-        client = get_cloud_run_client()
-        client.cancel_execution(job.cloud_run_job_name, job.cloud_run_execution_id)
+    return job
 
+
+def _mark_job_cancelled(
+    db: DBSession,
+    job: RenderJobModel,
+    reason: str | None,
+) -> RenderJobModel:
     job.status = RenderJobStatus.CANCELLED.value
     job.error_message = reason or "Cancelled by user"
     job.completed_at = datetime.now(timezone.utc)
@@ -459,30 +541,60 @@ def cancel_render_job(
     db.commit()
     db.refresh(job)
 
-    logger.info(f"Cancelled render job {job_id}: {reason}")
+    logger.info(f"Cancelled render job {job.job_id}: {reason}")
 
     return job
 
 
-def poll_job_status(db: DBSession, job_id: UUID) -> RenderJobModel | None:
-    job = get_render_job(db, job_id)
+def cancel_render_job(
+    db: DBSession,
+    job_id: UUID,
+    reason: str | None = None,
+) -> RenderJobModel | None:
+    job = _get_cancellable_job(db, job_id)
+    if not job:
+        return None
+
+    if job.cloud_run_job_name and job.cloud_run_execution_id:
+        client = get_cloud_run_client()
+        client.cancel_execution(job.cloud_run_job_name, job.cloud_run_execution_id)
+
+    return _mark_job_cancelled(db, job, reason)
+
+
+async def cancel_render_job_async(
+    db: DBSession,
+    job_id: UUID,
+    reason: str | None = None,
+) -> RenderJobModel | None:
+    job = _get_cancellable_job(db, job_id)
     if not job:
         return None
 
+    if job.cloud_run_job_name and job.cloud_run_execution_id:
+        client = get_cloud_run_client()
+        await client.cancel_execution_async(
+            job.cloud_run_job_name, job.cloud_run_execution_id
+        )
+
+    return _mark_job_cancelled(db, job, reason)
+
+
+def _needs_cloud_run_poll(job: RenderJobModel) -> bool:
     if job.status not in (
         RenderJobStatus.QUEUED.value,
         RenderJobStatus.PROCESSING.value,
     ):
-        return job
+        return False
 
-    if not job.cloud_run_job_name or not job.cloud_run_execution_id:
-        return job
+    return bool(job.cloud_run_job_name and job.cloud_run_execution_id)
 
-    client = get_cloud_run_client()
-    execution = client.get_execution_status(
-        job.cloud_run_job_name, job.cloud_run_execution_id
-    )
 
+def _apply_execution_status(
+    db: DBSession,
+    job: RenderJobModel,
+    execution: JobExecution | None,
+) -> RenderJobModel | None:
     if not execution:
         return job
 
@@ -498,7 +610,7 @@ def poll_job_status(db: DBSession, job_id: UUID) -> RenderJobModel | None:
     if new_status and new_status.value != job.status:
         return update_job_status(
             db,
-            job_id,
+            job.job_id,
             new_status,
             error_message=execution.error_message,
         )
@@ -506,6 +618,32 @@ def poll_job_status(db: DBSession, job_id: UUID) -> RenderJobModel | None:
     return job
 
 
+def poll_job_status(db: DBSession, job_id: UUID) -> RenderJobModel | None:
+    job = get_render_job(db, job_id)
+    if not job or not _needs_cloud_run_poll(job):
+        return job
+
+    client = get_cloud_run_client()
+    execution = client.get_execution_status(
+        job.cloud_run_job_name, job.cloud_run_execution_id
+    )
+
+    return _apply_execution_status(db, job, execution)
+
+
+async def poll_job_status_async(db: DBSession, job_id: UUID) -> RenderJobModel | None:
+    job = get_render_job(db, job_id)
+    if not job or not _needs_cloud_run_poll(job):
+        return job
+
+    client = get_cloud_run_client()
+    execution = await client.get_execution_status_async(
+        job.cloud_run_job_name, job.cloud_run_execution_id
+    )
+
+    return _apply_execution_status(db, job, execution)
+
+
 def delete_render_job(db: DBSession, job_id: UUID) -> bool:
     job = get_render_job(db, job_id)
     if not job:
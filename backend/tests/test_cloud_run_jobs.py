@@ -0,0 +1,601 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from types import SimpleNamespace
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+from google.cloud import run_v2
+
+from utils import cloud_run_jobs
+from utils.cloud_run_jobs import (
+    CloudRunConfig,
+    CloudRunJobError,
+    CloudRunJobsClient,
+    JobExecutionRequest,
+    create_cpu_job_definition,
+    create_gpu_job_definition,
+    generate_gcloud_commands,
+)
+
+
+class _FakeOperation:
+    def __init__(self, execution_name: str, times_out: bool = False):
+        self.metadata = SimpleNamespace(name=execution_name)
+        self.times_out = times_out
+        self.result_calls = 0
+        self.result_timeouts = []
+
+    def result(self, timeout=None):
+        self.result_calls += 1
+        self.result_timeouts.append(timeout)
+        if self.times_out:
+            raise FutureTimeoutError()
+        return SimpleNamespace(
+            name=self.metadata.name,
+            create_time=None,
+            start_time=None,
+        )
+
+
+class _FakeJobsClient:
+    def __init__(self, operation: _FakeOperation):
+        self.operation = operation
+        self.requests = []
+
+    def run_job(self, request=None, **kwargs):
+        self.requests.append(request)
+        return self.operation
+
+
+class _FakeExecutionsClient:
+    def __init__(self, executions):
+        self.executions = list(executions)
+        self.calls = 0
+
+    def get_execution(self, request=None, **kwargs):
+        self.calls += 1
+        return self.executions.pop(0) if len(self.executions) > 1 else self.executions[0]
+
+
+def _build_execution(state: str | None = None, etag: str = "etag-1", running_count: int = 0):
+    conditions = [SimpleNamespace(type="ResourcesAvailable", state="CONDITION_SUCCEEDED", message="")]
+    if state:
+        conditions.append(SimpleNamespace(type="Completed", state=state, message="boom"))
+    return SimpleNamespace(
+        generation=1,
+        etag=etag,
+        conditions=conditions,
+        running_count=running_count,
+        create_time=None,
+        start_time=None,
+        completion_time=None,
+    )
+
+
+def _build_client(jobs_client=None, executions_client=None) -> CloudRunJobsClient:
+    client = CloudRunJobsClient(CloudRunConfig(project_id="proj", region="us-central1"))
+    client._run_v2 = run_v2
+    client._jobs_client = jobs_client
+    client._executions_client = executions_client
+    client._initialized = True
+    client._async_initialized = True
+    return client
+
+
+def _build_request(**overrides) -> JobExecutionRequest:
+    values = {"job_id": "job-1", "manifest_gcs_path": "gs://bucket/manifest.json"}
+    values.update(overrides)
+    return JobExecutionRequest(**values)
+
+
+def test_execute_render_job_async_returns_dispatched_handle():
+    operation = _FakeOperation("projects/proj/locations/us-central1/jobs/video-render-cpu/executions/exec-1")
+    jobs_client = _FakeJobsClient(operation)
+    client = _build_client(jobs_client=jobs_client)
+    completed = []
+
+    async def run():
+        execution = await client.execute_render_job_async(
+            _build_request(), on_complete=completed.append
+        )
+        await asyncio.gather(*client._background_tasks)
+        return execution
+
+    execution = asyncio.run(run())
+
+    assert execution.status == "DISPATCHED"
+    assert execution.execution_id == "exec-1"
+    assert execution.job_name == "video-render-cpu"
+    assert operation.result_calls == 1
+    assert completed[0].status == "RUNNING"
+    assert completed[0].execution_id == "exec-1"
+
+
+def test_execute_render_job_async_reports_failed_start():
+    class _FailingOperation(_FakeOperation):
+        def result(self, timeout=None):
+            raise RuntimeError("image pull failed")
+
+    operation = _FailingOperation(
+        "projects/proj/locations/us-central1/jobs/video-render-cpu/executions/exec-3"
+    )
+    client = _build_client(jobs_client=_FakeJobsClient(operation))
+    completed = []
+
+    async def run():
+        await client.execute_render_job_async(
+            _build_request(), on_complete=completed.append
+        )
+        await asyncio.gather(*client._background_tasks)
+
+    asyncio.run(run())
+
+    assert completed[0].status == "FAILED"
+    assert completed[0].execution_id == "exec-3"
+    assert completed[0].error_message == "image pull failed"
+
+
+def test_execute_render_job_async_skips_dispatch_in_local_mode():
+    operation = _FakeOperation("unused")
+    jobs_client = _FakeJobsClient(operation)
+    client = _build_client(jobs_client=jobs_client)
+
+    execution = asyncio.run(
+        client.execute_render_job_async(_build_request(execution_mode="local"))
+    )
+
+    assert execution.execution_id == "local-job-1"
+    assert jobs_client.requests == []
+
+
+def test_get_execution_status_reuses_parse_for_unchanged_etag(monkeypatch):
+    monkeypatch.setattr(cloud_run_jobs, "RECENT_STATUS_TTL_SECONDS", 0.0)
+    executions_client = _FakeExecutionsClient(
+        [_build_execution(running_count=1), _build_execution(running_count=1)]
+    )
+    client = _build_client(executions_client=executions_client)
+
+    first = client.get_execution_status("video-render-cpu", "exec-1")
+    second = client.get_execution_status("video-render-cpu", "exec-1")
+
+    assert first.status == "RUNNING"
+    assert second is first
+
+
+def test_get_execution_status_reparses_when_etag_changes(monkeypatch):
+    monkeypatch.setattr(cloud_run_jobs, "RECENT_STATUS_TTL_SECONDS", 0.0)
+    executions_client = _FakeExecutionsClient(
+        [
+            _build_execution(running_count=1, etag="etag-1"),
+            _build_execution(state="CONDITION_FAILED", etag="etag-2"),
+        ]
+    )
+    client = _build_client(executions_client=executions_client)
+
+    assert client.get_execution_status("video-render-cpu", "exec-1").status == "RUNNING"
+    failed = client.get_execution_status("video-render-cpu", "exec-1")
+
+    assert failed.status == "FAILED"
+    assert failed.error_message == "boom"
+
+
+def test_config_from_env_is_cached_until_invalidated(monkeypatch):
+    CloudRunConfig.invalidate_env_cache()
+    monkeypatch.setenv("GCP_PROJECT_ID", "first")
+    first = CloudRunConfig.from_env()
+
+    monkeypatch.setenv("GCP_PROJECT_ID", "second")
+    assert CloudRunConfig.from_env() is first
+
+    CloudRunConfig.invalidate_env_cache()
+    assert CloudRunConfig.from_env().project_id == "second"
+    CloudRunConfig.invalidate_env_cache()
+
+
+def test_config_builds_resource_names_from_shared_prefix():
+    config = CloudRunConfig(project_id="proj", region="europe-west1")
+
+    assert config.job_path_prefix == "projects/proj/locations/europe-west1/jobs/"
+    assert config.gpu_job_full_name == "projects/proj/locations/europe-west1/jobs/video-render-gpu"
+    assert (
+        config.execution_full_name("video-render-cpu", "exec-1")
+        == "projects/proj/locations/europe-west1/jobs/video-render-cpu/executions/exec-1"
+    )
+
+
+def test_get_cloud_run_client_constructs_single_instance_across_threads(monkeypatch):
+    monkeypatch.setattr(cloud_run_jobs, "_client", None)
+    constructed = []
+
+    class _CountingClient:
+        def __init__(self):
+            constructed.append(self)
+
+    monkeypatch.setattr(cloud_run_jobs, "CloudRunJobsClient", _CountingClient)
+
+    barrier = threading.Barrier(8)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(cloud_run_jobs.get_cloud_run_client())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(constructed) == 1
+    assert all(result is constructed[0] for result in results)
+
+
+def test_get_execution_status_collapses_concurrent_identical_requests():
+    release = threading.Event()
+    entered = threading.Event()
+
+    class _BlockingExecutionsClient:
+        def __init__(self):
+            self.calls = 0
+
+        def get_execution(self, request=None, **kwargs):
+            self.calls += 1
+            entered.set()
+            release.wait(timeout=5)
+            return _build_execution(running_count=1)
+
+    executions_client = _BlockingExecutionsClient()
+    client = _build_client(executions_client=executions_client)
+    results = []
+
+    def poll():
+        results.append(client.get_execution_status("video-render-cpu", "exec-1"))
+
+    leader = threading.Thread(target=poll)
+    leader.start()
+    entered.wait(timeout=5)
+    followers = [threading.Thread(target=poll) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert executions_client.calls == 1
+    assert len(results) == 4
+    assert all(result is results[0] for result in results)
+
+
+def test_get_execution_status_stops_polling_after_terminal_state(monkeypatch):
+    monkeypatch.setattr(cloud_run_jobs, "RECENT_STATUS_TTL_SECONDS", 0.0)
+    executions_client = _FakeExecutionsClient(
+        [
+            _build_execution(running_count=1, etag="etag-1"),
+            _build_execution(state="CONDITION_SUCCEEDED", etag="etag-2"),
+        ]
+    )
+    client = _build_client(executions_client=executions_client)
+
+    assert client.get_execution_status("video-render-cpu", "exec-1").status == "RUNNING"
+    assert client.get_execution_status("video-render-cpu", "exec-1").status == "SUCCEEDED"
+    assert client.get_execution_status("video-render-cpu", "exec-1").status == "SUCCEEDED"
+
+    assert executions_client.calls == 2
+
+
+def test_gpu_job_definition_extends_cpu_template_without_sharing_state():
+    config = CloudRunConfig(
+        project_id="proj",
+        region="us-central1",
+        cpu_job_image="cpu-image",
+        gpu_job_image="gpu-image",
+    )
+
+    gpu = create_gpu_job_definition(config)
+    gpu["metadata"]["name"] = "mutated"
+    cpu = create_cpu_job_definition(config)
+
+    container = create_gpu_job_definition(config)["spec"]["template"]["spec"]["containers"][0]
+    assert container["image"] == "gpu-image"
+    assert container["resources"]["limits"]["nvidia.com/gpu"] == "1"
+    assert create_gpu_job_definition(config)["metadata"]["name"] == "video-render-gpu"
+    assert "nvidia.com/gpu" not in cpu["spec"]["template"]["spec"]["containers"][0]["resources"]["limits"]
+
+
+def test_generate_gcloud_commands_uses_shell_line_continuations():
+    config = CloudRunConfig(project_id="proj", region="us-central1", cpu_job_image="cpu-image")
+
+    commands = generate_gcloud_commands(config)
+
+    assert "gcloud run jobs create video-render-cpu \\\n    --image cpu-image \\\n" in commands
+    assert "gcloud run jobs create video-render-gpu \\\n" in commands
+    assert "--gpu-type nvidia-l4" in commands
+
+
+def test_ensure_initialized_does_not_retry_failed_import(monkeypatch):
+    attempts = []
+
+    def failing_import(name):
+        attempts.append(name)
+        raise ImportError(name)
+
+    monkeypatch.setattr(cloud_run_jobs.importlib, "import_module", failing_import)
+    client = CloudRunJobsClient(CloudRunConfig(project_id="proj", region="us-central1"))
+
+    assert client.is_available is False
+    assert client.is_available is False
+    assert len(attempts) == 1
+
+
+def test_run_request_overrides_fill_template_per_job():
+    client = _build_client()
+
+    first = client._build_run_request(run_v2, _build_request(job_id="job-1", timeout_seconds=120))
+    second = client._build_run_request(
+        run_v2,
+        _build_request(job_id="job-2", manifest_gcs_path="gs://bucket/other.json", use_gpu=True),
+    )
+
+    first_container = first.overrides.container_overrides[0]
+    second_container = second.overrides.container_overrides[0]
+    assert list(first_container.args) == ["--manifest", "gs://bucket/manifest.json", "--job-id", "job-1"]
+    assert list(second_container.args) == ["--manifest", "gs://bucket/other.json", "--job-id", "job-2"]
+    assert [env.value for env in second_container.env] == ["job-2", "gs://bucket/other.json"]
+    assert first.overrides.timeout.total_seconds() == 120
+    assert second.name.endswith("/jobs/video-render-gpu")
+    assert list(client._run_overrides_template.container_overrides[0].args)[1] == ""
+
+
+def test_get_execution_status_serves_recent_non_terminal_status_from_cache():
+    executions_client = _FakeExecutionsClient([_build_execution(running_count=1)])
+    client = _build_client(executions_client=executions_client)
+
+    client.get_execution_status("video-render-cpu", "exec-1")
+    client.get_execution_status("video-render-cpu", "exec-1")
+
+    assert executions_client.calls == 1
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cloud_run_jobs.time, "monotonic", lambda: now[0])
+    cache = cloud_run_jobs._TTLCache(maxsize=2)
+
+    cache.set("a", 1, ttl_seconds=10)
+    cache.set("b", 2, ttl_seconds=1)
+    assert cache.get("a") == 1
+    cache.set("c", 3, ttl_seconds=10)
+
+    assert cache.get("b") is None
+    now[0] = 105.0
+    assert cache.get("a") == 1
+    now[0] = 111.0
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_get_execution_status_retries_transient_errors(monkeypatch):
+    monkeypatch.setattr(cloud_run_jobs, "RETRY_BASE_DELAY_SECONDS", 0.0)
+
+    class _FlakyExecutionsClient:
+        def __init__(self):
+            self.calls = 0
+
+        def get_execution(self, request=None, **kwargs):
+            self.calls += 1
+            if self.calls < 3:
+                raise api_exceptions.ServiceUnavailable("try again")
+            return _build_execution(running_count=1)
+
+    executions_client = _FlakyExecutionsClient()
+    client = _build_client(executions_client=executions_client)
+
+    assert client.get_execution_status("video-render-cpu", "exec-1").status == "RUNNING"
+    assert executions_client.calls == 3
+
+
+def test_get_execution_status_marks_missing_execution_failed_without_retry():
+    class _MissingExecutionsClient:
+        def __init__(self):
+            self.calls = 0
+
+        def get_execution(self, request=None, **kwargs):
+            self.calls += 1
+            raise api_exceptions.NotFound("no such execution")
+
+    executions_client = _MissingExecutionsClient()
+    client = _build_client(executions_client=executions_client)
+
+    execution = client.get_execution_status("video-render-cpu", "exec-1")
+
+    assert execution.status == "FAILED"
+    assert "no such execution" in execution.error_message
+    assert executions_client.calls == 1
+
+
+def test_get_execution_status_does_not_fail_job_on_auth_error(monkeypatch):
+    monkeypatch.setattr(cloud_run_jobs, "RECENT_STATUS_TTL_SECONDS", 0.0)
+
+    class _ExpiredCredentialsClient:
+        def __init__(self):
+            self.calls = 0
+
+        def get_execution(self, request=None, **kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                raise api_exceptions.PermissionDenied("token expired")
+            return _build_execution(running_count=1)
+
+    executions_client = _ExpiredCredentialsClient()
+    client = _build_client(executions_client=executions_client)
+
+    assert client.get_execution_status("video-render-cpu", "exec-1") is None
+    assert client.get_execution_status("video-render-cpu", "exec-1").status == "RUNNING"
+    assert executions_client.calls == 2
+
+
+def test_execute_render_job_raises_on_rejected_request():
+    class _RejectingJobsClient:
+        def run_job(self, request=None, **kwargs):
+            raise api_exceptions.PermissionDenied("denied")
+
+    client = _build_client(jobs_client=_RejectingJobsClient())
+
+    with pytest.raises(CloudRunJobError):
+        client.execute_render_job(_build_request())
+
+
+def test_execute_render_job_does_not_retry_possibly_accepted_run(monkeypatch):
+    monkeypatch.setattr(cloud_run_jobs, "RETRY_BASE_DELAY_SECONDS", 0.0)
+
+    class _TimingOutJobsClient:
+        def __init__(self):
+            self.calls = 0
+
+        def run_job(self, request=None, **kwargs):
+            self.calls += 1
+            raise api_exceptions.DeadlineExceeded("no response")
+
+    jobs_client = _TimingOutJobsClient()
+    client = _build_client(jobs_client=jobs_client)
+
+    assert client.execute_render_job(_build_request()) is None
+    assert jobs_client.calls == 1
+
+
+def test_execute_render_job_retries_quota_rejections(monkeypatch):
+    monkeypatch.setattr(cloud_run_jobs, "RETRY_BASE_DELAY_SECONDS", 0.0)
+    operation = _FakeOperation(
+        "projects/proj/locations/us-central1/jobs/video-render-cpu/executions/exec-2"
+    )
+
+    class _ThrottledJobsClient:
+        def __init__(self):
+            self.calls = 0
+
+        def run_job(self, request=None, **kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                raise api_exceptions.TooManyRequests("slow down")
+            return operation
+
+    jobs_client = _ThrottledJobsClient()
+    client = _build_client(jobs_client=jobs_client)
+
+    assert client.execute_render_job(_build_request()).execution_id == "exec-2"
+    assert jobs_client.calls == 2
+
+
+def test_execute_render_job_returns_dispatched_when_start_wait_times_out():
+    operation = _FakeOperation(
+        "projects/proj/locations/us-central1/jobs/video-render-cpu/executions/exec-9",
+        times_out=True,
+    )
+    client = _build_client(jobs_client=_FakeJobsClient(operation))
+
+    execution = client.execute_render_job(_build_request(timeout_seconds=3600))
+
+    assert execution.status == "DISPATCHED"
+    assert execution.execution_id == "exec-9"
+    assert operation.result_timeouts == [cloud_run_jobs.LRO_WAIT_TIMEOUT_SECONDS]
+
+
+class _FakeAsyncOperation:
+    def __init__(self, execution_name: str):
+        self.metadata = SimpleNamespace(name=execution_name)
+
+    async def result(self, timeout=None):
+        return SimpleNamespace(name=self.metadata.name, create_time=None, start_time=None)
+
+
+class _FakeAsyncRunClient:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = []
+
+    async def run_job(self, request=None, **kwargs):
+        self.calls.append("run_job")
+        return _FakeAsyncOperation(f"{request.name}/executions/exec-async")
+
+    async def get_execution(self, request=None, **kwargs):
+        self.calls.append("get_execution")
+        if self.failures:
+            self.failures -= 1
+            raise api_exceptions.TooManyRequests("slow down")
+        return _build_execution(running_count=1)
+
+    async def delete_execution(self, request=None, **kwargs):
+        self.calls.append("delete_execution")
+
+
+def test_async_methods_use_async_clients_and_cooperative_retry(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(cloud_run_jobs.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(
+        cloud_run_jobs.time, "sleep", lambda delay: pytest.fail("blocking sleep in async path")
+    )
+    async_client = _FakeAsyncRunClient(failures=1)
+    client = _build_client(
+        jobs_client=_FakeJobsClient(_FakeOperation("unused")),
+        executions_client=_FakeExecutionsClient([_build_execution()]),
+    )
+    client._jobs_async_client = async_client
+    client._executions_async_client = async_client
+
+    async def run():
+        dispatched = await client.execute_render_job_async(_build_request())
+        await asyncio.gather(*client._background_tasks)
+        status = await client.get_execution_status_async("video-render-cpu", "exec-async")
+        cancelled = await client.cancel_execution_async("video-render-cpu", "exec-async")
+        return dispatched, status, cancelled
+
+    dispatched, status, cancelled = asyncio.run(run())
+
+    assert dispatched.execution_id == "exec-async"
+    assert status.status == "RUNNING"
+    assert cancelled is True
+    assert async_client.calls == ["run_job", "get_execution", "get_execution", "delete_execution"]
+    assert len(sleeps) == 1
+
+
+def test_circuit_breaker_opens_after_failures_and_recovers_after_probe(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(cloud_run_jobs.time, "monotonic", lambda: now[0])
+    breaker = cloud_run_jobs._CircuitBreaker(failure_threshold=2, window_seconds=30, reset_seconds=60)
+
+    breaker.record_failure()
+    assert breaker.allow_request() is True
+    breaker.record_failure()
+    assert breaker.state == "OPEN"
+    assert breaker.allow_request() is False
+
+    now[0] = 61.0
+    assert breaker.allow_request() is True
+    assert breaker.allow_request() is False
+    breaker.record_failure()
+    assert breaker.state == "OPEN"
+
+    now[0] = 122.0
+    assert breaker.allow_request() is True
+    breaker.record_success()
+    assert breaker.state == "CLOSED"
+
+
+def test_execute_render_job_uses_local_fallback_while_circuit_is_open():
+    jobs_client = _FakeJobsClient(_FakeOperation("unused"))
+    client = _build_client(jobs_client=jobs_client)
+    client._breaker = cloud_run_jobs._CircuitBreaker(failure_threshold=1)
+    client._breaker.record_failure()
+
+    execution = client.execute_render_job(_build_request())
+
+    assert execution.job_name == "local"
+    assert "Manual processing" in execution.error_message
+    assert jobs_client.requests == []
@@ -0,0 +1,368 @@
+import asyncio
+import base64
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import openai
+import pytest
+
+from utils import embeddings
+from utils.embedding_cache import EmbeddingStore
+
+
+class _FakeEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, model=None, input=None, **kwargs):
+        self.calls.append(list(input))
+        self.kwargs = kwargs
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(index=index, embedding=_vector_for(text))
+                for index, text in enumerate(input)
+            ]
+        )
+
+
+class _FakeClient:
+    def __init__(self):
+        self.embeddings = _FakeEmbeddings()
+
+
+class _FakeAsyncEmbeddings:
+    def __init__(self):
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def create(self, model=None, input=None, **kwargs):
+        self.calls.append(list(input))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(index=index, embedding=_vector_for(text))
+                for index, text in enumerate(input)
+            ]
+        )
+
+
+class _FakeAsyncClient:
+    def __init__(self):
+        self.embeddings = _FakeAsyncEmbeddings()
+
+
+def _vector_for(text: str) -> list[float]:
+    vector = [0.0] * embeddings.EMBEDDING_DIMENSIONS
+    vector[len(text) % embeddings.EMBEDDING_DIMENSIONS] = 1.0
+    return vector
+
+
+def _assert_vector(actual, text: str) -> None:
+    assert isinstance(actual, np.ndarray)
+    assert actual.dtype == np.float32
+    np.testing.assert_array_equal(actual, _vector_for(text))
+
+
+@pytest.fixture
+def fake_client(monkeypatch, tmp_path):
+    client = _FakeClient()
+    store = EmbeddingStore(str(tmp_path / "embeddings.sqlite3"))
+    monkeypatch.setattr(embeddings, "OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(embeddings, "_EMBEDDINGS_ENABLED", True)
+    monkeypatch.setattr(embeddings, "_get_client", lambda: client)
+    monkeypatch.setattr(embeddings, "_embedding_store", store)
+    embeddings.embedding_cache_clear()
+    yield client
+    embeddings.embedding_cache_clear()
+    store.close()
+
+
+def test_get_embeddings_batches_inputs_and_preserves_positions(fake_client):
+    results = embeddings.get_embeddings(["a", "  ", "bb", "ccc", ""], batch_size=2)
+
+    assert fake_client.embeddings.calls == [["a", "bb"], ["ccc"]]
+    assert fake_client.embeddings.kwargs == {
+        "dimensions": embeddings.EMBEDDING_DIMENSIONS,
+        "encoding_format": "base64",
+    }
+    assert results[1] is None and results[4] is None
+    _assert_vector(results[0], "a")
+    _assert_vector(results[2], "bb")
+    _assert_vector(results[3], "ccc")
+
+
+def test_get_embedding_returns_none_for_blank_text(fake_client):
+    assert embeddings.get_embedding("   ") is None
+    assert fake_client.embeddings.calls == []
+
+
+def test_get_embeddings_dispatches_batches_concurrently(fake_client):
+    texts = [f"text-{index}" for index in range(10)]
+
+    results = embeddings.get_embeddings(texts, batch_size=3, max_concurrent_batches=3)
+
+    assert sorted(len(call) for call in fake_client.embeddings.calls) == [1, 3, 3, 3]
+    for result, text in zip(results, texts):
+        _assert_vector(result, text)
+
+
+def test_get_embeddings_retries_rate_limited_batch(fake_client, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(embeddings.time, "sleep", sleeps.append)
+    original_create = fake_client.embeddings.create
+    failures = [1]
+
+    def flaky_create(model=None, input=None, **kwargs):
+        if failures[0]:
+            failures[0] -= 1
+            response = httpx.Response(
+                429,
+                headers={"retry-after": "2"},
+                request=httpx.Request("POST", "https://example.test"),
+            )
+            raise openai.RateLimitError("rate limited", response=response, body=None)
+        return original_create(model=model, input=input)
+
+    monkeypatch.setattr(fake_client.embeddings, "create", flaky_create)
+
+    _assert_vector(embeddings.get_embedding("hello"), "hello")
+    assert len(sleeps) == 1 and 2.0 <= sleeps[0] <= 2.5
+
+
+def test_retry_delay_clamps_server_retry_after():
+    base = embeddings.EMBEDDING_RETRY_BASE_DELAY_SECONDS
+    cap = embeddings.EMBEDDING_RETRY_MAX_DELAY_SECONDS
+
+    def rate_limited(retry_after):
+        response = httpx.Response(
+            429,
+            headers={"retry-after": retry_after},
+            request=httpx.Request("POST", "https://example.test"),
+        )
+        return openai.RateLimitError("rate limited", response=response, body=None)
+
+    assert cap <= embeddings._retry_delay(rate_limited("3600"), 0) <= cap + base
+    assert 0.0 <= embeddings._retry_delay(rate_limited("-5"), 0) <= base
+
+
+def test_get_embeddings_backs_off_on_server_errors_then_gives_up(fake_client, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(embeddings.time, "sleep", sleeps.append)
+
+    def failing_create(model=None, input=None, **kwargs):
+        fake_client.embeddings.calls.append(list(input))
+        response = httpx.Response(
+            503, request=httpx.Request("POST", "https://example.test")
+        )
+        raise openai.InternalServerError("unavailable", response=response, body=None)
+
+    monkeypatch.setattr(fake_client.embeddings, "create", failing_create)
+
+    assert embeddings.get_embedding("hello") is None
+    assert len(fake_client.embeddings.calls) == embeddings.EMBEDDING_RETRY_ATTEMPTS
+    base = embeddings.EMBEDDING_RETRY_BASE_DELAY_SECONDS
+    assert len(sleeps) == embeddings.EMBEDDING_RETRY_ATTEMPTS - 1
+    for attempt, delay in enumerate(sleeps):
+        assert base * 2**attempt <= delay <= base * 2**attempt + base
+
+
+def test_get_embeddings_does_not_retry_client_errors(fake_client, monkeypatch):
+    monkeypatch.setattr(embeddings.time, "sleep", lambda delay: pytest.fail("slept"))
+
+    def rejecting_create(model=None, input=None, **kwargs):
+        fake_client.embeddings.calls.append(list(input))
+        response = httpx.Response(
+            400, request=httpx.Request("POST", "https://example.test")
+        )
+        raise openai.BadRequestError("bad input", response=response, body=None)
+
+    monkeypatch.setattr(fake_client.embeddings, "create", rejecting_create)
+
+    assert embeddings.get_embedding("hello") is None
+    assert len(fake_client.embeddings.calls) == 1
+
+
+def test_get_embeddings_serves_repeated_texts_from_cache(fake_client):
+    first = embeddings.get_embeddings(["same", "other", "same "])
+    second = embeddings.get_query_embedding("same")
+
+    assert fake_client.embeddings.calls == [["same", "other"]]
+    for vector in (first[0], first[2], second):
+        _assert_vector(vector, "same")
+    second[0] = 42.0
+    _assert_vector(embeddings.get_embedding("same"), "same")
+
+    info = embeddings.embedding_cache_info()
+    assert info.hits == 2
+    assert info.currsize == 2
+
+
+def test_get_embeddings_reads_persisted_vectors_after_memory_cache_clear(fake_client):
+    first = embeddings.get_embeddings(["persisted", "other"])
+    embeddings.embedding_cache_clear()
+
+    second = embeddings.get_embeddings(["persisted", "other"])
+
+    assert fake_client.embeddings.calls == [["persisted", "other"]]
+    for before, after, text in zip(first, second, ["persisted", "other"]):
+        np.testing.assert_array_equal(after, before)
+        _assert_vector(after, text)
+
+
+def test_get_embeddings_returns_unit_length_vectors(fake_client, monkeypatch):
+    padding = [0.0] * (embeddings.EMBEDDING_DIMENSIONS - 2)
+
+    def unnormalized_create(model=None, input=None, **kwargs):
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(index=index, embedding=[3.0, 4.0] + padding)
+                for index, _ in enumerate(input)
+            ]
+        )
+
+    monkeypatch.setattr(fake_client.embeddings, "create", unnormalized_create)
+
+    vector = embeddings.get_embedding("scaled")
+
+    assert np.isclose(np.linalg.norm(vector), 1.0)
+    np.testing.assert_allclose(vector[:2], [0.6, 0.8], rtol=1e-6)
+
+
+def test_get_client_reuses_a_single_instance(monkeypatch):
+    monkeypatch.setattr(embeddings, "OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(embeddings, "_client", None)
+
+    client = embeddings._get_client()
+
+    assert embeddings._get_client() is client
+    client.close()
+
+
+def test_aget_embeddings_gathers_batches_with_bounded_concurrency(fake_client, monkeypatch):
+    async_client = _FakeAsyncClient()
+    monkeypatch.setattr(embeddings, "_get_async_client", lambda: async_client)
+    texts = [f"async-{index}" for index in range(7)] + ["", "async-0"]
+
+    results = asyncio.run(
+        embeddings.aget_embeddings(texts, batch_size=2, max_concurrent_batches=2)
+    )
+
+    assert sorted(len(call) for call in async_client.embeddings.calls) == [1, 2, 2, 2]
+    assert async_client.embeddings.max_active == 2
+    assert results[7] is None
+    for result, text in zip(results[:7] + results[8:], texts[:7] + texts[8:]):
+        _assert_vector(result, text)
+    assert fake_client.embeddings.calls == []
+
+    _assert_vector(asyncio.run(embeddings.aget_embedding("async-3")), "async-3")
+    assert len(async_client.embeddings.calls) == 4
+
+
+def test_build_embedding_text_formats_summary_and_tags():
+    assert (
+        embeddings.build_embedding_text("A beach at dusk", ["beach", "sunset"])
+        == "Summary: A beach at dusk\nTags: beach, sunset"
+    )
+    assert embeddings.build_embedding_text("", ["beach"]) == "Tags: beach"
+    assert embeddings.build_embedding_text("Only summary", None) == "Summary: Only summary"
+    assert embeddings.build_embedding_text(None, []) == ""
+
+
+def test_get_embeddings_packs_batches_by_token_budget(fake_client, monkeypatch):
+    monkeypatch.setattr(embeddings, "_count_tokens", len)
+    monkeypatch.setattr(embeddings, "EMBEDDING_BATCH_TOKEN_BUDGET", 6)
+
+    embeddings.get_embeddings(["aa", "bbb", "c", "dddddddd", "e", "ff"])
+
+    assert fake_client.embeddings.calls == [
+        ["aa", "bbb", "c"],
+        ["dddddddd"],
+        ["e", "ff"],
+    ]
+
+
+def test_get_embeddings_truncates_oversized_inputs(fake_client, monkeypatch):
+    monkeypatch.setattr(embeddings, "_count_tokens", len)
+    monkeypatch.setattr(embeddings, "_truncate_to_tokens", lambda text, limit: text[:limit])
+    monkeypatch.setattr(embeddings, "EMBEDDING_MAX_INPUT_TOKENS", 4)
+
+    results = embeddings.get_embeddings(["abcdefgh", "xy"])
+
+    assert fake_client.embeddings.calls == [["abcd", "xy"]]
+    _assert_vector(results[0], "abcd")
+    _assert_vector(embeddings.get_embedding("abcdefgh"), "abcd")
+    assert len(fake_client.embeddings.calls) == 1
+
+
+def test_get_embeddings_decodes_base64_payloads(fake_client, monkeypatch):
+    def base64_create(model=None, input=None, **kwargs):
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(
+                    index=index,
+                    embedding=base64.b64encode(
+                        np.asarray(_vector_for(text), dtype=np.float32).tobytes()
+                    ).decode(),
+                )
+                for index, text in enumerate(input)
+            ]
+        )
+
+    monkeypatch.setattr(fake_client.embeddings, "create", base64_create)
+
+    vector = embeddings.get_embedding("encoded")
+
+    _assert_vector(vector, "encoded")
+    vector[0] = 1.0
+
+
+def test_get_embeddings_skips_api_when_disabled(fake_client, monkeypatch):
+    embeddings.get_embeddings(["cached"])
+    monkeypatch.setattr(embeddings, "_EMBEDDINGS_ENABLED", False)
+
+    results = embeddings.get_embeddings(["cached", "uncached"])
+
+    _assert_vector(results[0], "cached")
+    assert results[1] is None
+    assert fake_client.embeddings.calls == [["cached"]]
+
+
+def _reject_poisoned_batches(fake_client, monkeypatch, poison: str) -> None:
+    original_create = fake_client.embeddings.create
+
+    def create(model=None, input=None, **kwargs):
+        if poison in input:
+            fake_client.embeddings.calls.append(list(input))
+            response = httpx.Response(
+                400, request=httpx.Request("POST", "https://example.test")
+            )
+            raise openai.BadRequestError("bad input", response=response, body=None)
+        return original_create(model=model, input=input, **kwargs)
+
+    monkeypatch.setattr(fake_client.embeddings, "create", create)
+
+
+@pytest.mark.parametrize("max_concurrent_batches", [1, 2])
+def test_get_embeddings_bisects_rejected_batches(
+    fake_client, monkeypatch, max_concurrent_batches
+):
+    _reject_poisoned_batches(fake_client, monkeypatch, "bad")
+    texts = ["a", "bb", "bad", "dddd", "eeeee", "ffffff"]
+
+    results = embeddings.get_embeddings(
+        texts, batch_size=4, max_concurrent_batches=max_concurrent_batches
+    )
+
+    assert results[2] is None
+    for index in (0, 1, 3, 4, 5):
+        _assert_vector(results[index], texts[index])
+    succeeded = [call for call in fake_client.embeddings.calls if "bad" not in call]
+    assert sorted(text for call in succeeded for text in call) == sorted(
+        text for text in texts if text != "bad"
+    )
+    assert ["bad"] in fake_client.embeddings.calls
@@ -1,3 +1,7 @@
+import os
+import re
+import shlex
+
 import pytest
 from uuid import uuid4
 
@@ -319,7 +323,7 @@ class TestTimelineToFFmpeg:
 
         assert len(converter._inputs) == 1
         assert converter._inputs[0].file_path == "/inputs/clip1.mp4"
-        assert asset_id in converter._input_index_map
+        assert clip.media_reference.asset_id in converter._input_index_map
 
     def test_collect_inputs_multiple_clips(self, multi_clip_timeline, draft_preset):
         clips = multi_clip_timeline.find_clips()
@@ -336,6 +340,42 @@ class TestTimelineToFFmpeg:
 
         assert len(converter._inputs) == 2
 
+    def test_collect_inputs_shares_input_for_same_path(
+        self, multi_clip_timeline, draft_preset
+    ):
+        clips = multi_clip_timeline.find_clips()
+        asset_map = {
+            str(clip.media_reference.asset_id): "/inputs/clip1.mp4" for clip in clips
+        }
+
+        converter = TimelineToFFmpeg(
+            multi_clip_timeline, asset_map, draft_preset, "/outputs/render.mp4"
+        )
+        cmd = converter.build()
+
+        assert cmd.inputs.count("-i") == 1
+        assert set(converter._input_index_map.values()) == {0}
+        assert "[1:v]" not in cmd.filter_complex
+
+    def test_build_walks_timeline_once(self, simple_timeline, draft_preset, monkeypatch):
+        clip = simple_timeline.find_clips()[0]
+        asset_map = {str(clip.media_reference.asset_id): "/inputs/clip1.mp4"}
+        original_find_clips = Timeline.find_clips
+        calls = []
+
+        def counting_find_clips(timeline):
+            calls.append(timeline)
+            return original_find_clips(timeline)
+
+        monkeypatch.setattr(Timeline, "find_clips", counting_find_clips)
+
+        converter = TimelineToFFmpeg(
+            simple_timeline, asset_map, draft_preset, "/outputs/render.mp4"
+        )
+        converter.build()
+
+        assert len(calls) == 1
+
     def test_missing_asset_warning(self, simple_timeline, draft_preset, caplog):
         asset_map = {}
 
@@ -408,6 +448,71 @@ class TestSegmentExtraction:
         assert segments[0].duration == 4.0
 
 
+    def test_audio_from_video_reuses_video_segments(self, simple_timeline, draft_preset):
+        clip = simple_timeline.find_clips()[0]
+        asset_map = {str(clip.media_reference.asset_id): "/inputs/clip1.mp4"}
+
+        converter = TimelineToFFmpeg(
+            simple_timeline, asset_map, draft_preset, "/outputs/render.mp4"
+        )
+        original_clip_to_segment = converter._clip_to_segment
+        calls = []
+
+        def counting_clip_to_segment(*args, **kwargs):
+            calls.append(args)
+            return original_clip_to_segment(*args, **kwargs)
+
+        converter._clip_to_segment = counting_clip_to_segment
+        cmd = converter.build()
+
+        assert len(calls) == 1
+        assert "atrim=" in cmd.filter_complex
+
+
+    def test_repeated_segments_share_chain_but_not_labels(self, draft_preset):
+        asset_id = uuid4()
+        clips = [
+            Clip(
+                name=f"B-roll {i}",
+                media_reference=ExternalReference(
+                    asset_id=asset_id,
+                    target_url="gs://bucket/broll.mp4",
+                ),
+                source_range=TimeRange(
+                    start_time=RationalTime(value=24, rate=24),
+                    duration=RationalTime(value=48, rate=24),
+                ),
+            )
+            for i in range(2)
+        ]
+        timeline = Timeline(
+            name="Repeated Timeline",
+            tracks=Stack(
+                name="Timeline Stack",
+                children=[Track(name="Video 1", kind=TrackKind.VIDEO, children=clips)],
+            ),
+        )
+
+        converter = TimelineToFFmpeg(
+            timeline, {str(asset_id): "/inputs/broll.mp4"}, draft_preset, "/o.mp4"
+        )
+        original_chain = converter._video_segment_chain
+        calls = []
+
+        def counting_chain(segment):
+            calls.append(segment)
+            return original_chain(segment)
+
+        converter._video_segment_chain = counting_chain
+        cmd = converter.build()
+
+        chain = original_chain(converter._video_track_segments[0][0])
+        assert len(calls) == 1
+        assert f"[0:v]{chain}[v0]" in cmd.filter_complex
+        assert f"[0:v]{chain}[v1]" in cmd.filter_complex
+        assert "[v0][v1]concat=n=2" in cmd.filter_complex
+
+
 class TestFilterGeneration:
     def test_generate_trim_filter(self, simple_timeline, draft_preset):
         clip = simple_timeline.find_clips()[0]
@@ -422,6 +527,21 @@ class TestFilterGeneration:
         assert "trim=" in cmd.filter_complex
         assert "setpts=PTS-STARTPTS" in cmd.filter_complex
 
+    def test_trimmed_segment_resets_timestamps(self, multi_clip_timeline, draft_preset):
+        clips = multi_clip_timeline.find_clips()
+        asset_map = {
+            str(clip.media_reference.asset_id): f"/inputs/clip{i + 1}.mp4"
+            for i, clip in enumerate(clips)
+        }
+
+        converter = TimelineToFFmpeg(
+            multi_clip_timeline, asset_map, draft_preset, "/outputs/render.mp4"
+        )
+        cmd = converter.build()
+
+        assert "trim=start=1.0:duration=3.0,setpts=PTS-STARTPTS" in cmd.filter_complex
+        assert "atrim=start=1.0:duration=3.0,asetpts=PTS-STARTPTS" in cmd.filter_complex
+
     def test_generate_gap_video(self, timeline_with_gap, draft_preset):
         clips = timeline_with_gap.find_clips()
         asset_map = {}
@@ -469,6 +589,106 @@ class TestFilterGeneration:
         assert "dissolve" in cmd.filter_complex
         assert "offset=2.0" in cmd.filter_complex
 
+    def test_hard_cuts_before_transition_use_one_concat(
+        self, timeline_with_transition, draft_preset
+    ):
+        track = timeline_with_transition.tracks.children[0]
+        track.children.insert(0, track.children[0].model_copy())
+        track.children.insert(0, track.children[0].model_copy())
+
+        clips = timeline_with_transition.find_clips()
+        asset_map = {
+            str(clip.media_reference.asset_id): f"/inputs/clip{i + 1}.mp4"
+            for i, clip in enumerate(clips)
+        }
+
+        converter = TimelineToFFmpeg(
+            timeline_with_transition, asset_map, draft_preset, "/outputs/render.mp4"
+        )
+        cmd = converter.build()
+
+        match = re.search(
+            r"\[v0\]\[v1\]\[v2\]concat=n=3:v=1:a=0\[(v\w+)\]",
+            cmd.filter_complex,
+        )
+        assert match
+        assert f"[{match.group(1)}][v3]xfade=" in cmd.filter_complex
+        assert "offset=8.0" in cmd.filter_complex
+
+    def test_leading_transition_does_not_block_later_ones(
+        self, timeline_with_transition, draft_preset
+    ):
+        track = timeline_with_transition.tracks.children[0]
+        track.children.insert(0, track.children[1].model_copy())
+
+        clips = timeline_with_transition.find_clips()
+        asset_map = {
+            str(clip.media_reference.asset_id): f"/inputs/clip{i + 1}.mp4"
+            for i, clip in enumerate(clips)
+        }
+
+        converter = TimelineToFFmpeg(
+            timeline_with_transition, asset_map, draft_preset, "/outputs/render.mp4"
+        )
+        cmd = converter.build()
+
+        assert "[v0][v1]xfade=transition=dissolve" in cmd.filter_complex
+
+    def test_labels_are_short_and_unique(self, draft_preset):
+        asset_id = uuid4()
+        clips = [
+            Clip(
+                name=f"Shot {i}",
+                media_reference=ExternalReference(
+                    asset_id=asset_id,
+                    target_url="gs://bucket/shot.mp4",
+                ),
+                source_range=TimeRange(
+                    start_time=RationalTime(value=i * 24, rate=24),
+                    duration=RationalTime(value=24, rate=24),
+                ),
+            )
+            for i in range(40)
+        ]
+        timeline = Timeline(
+            name="Many Cuts",
+            tracks=Stack(
+                name="Timeline Stack",
+                children=[Track(name="Video 1", kind=TrackKind.VIDEO, children=clips)],
+            ),
+        )
+
+        cmd = TimelineToFFmpeg(
+            timeline, {str(asset_id): "/inputs/shot.mp4"}, draft_preset, "/o.mp4"
+        ).build()
+
+        outputs = [
+            re.search(r"\[(\w+)\]$", f).group(1)
+            for f in cmd.filter_complex.split(";")
+        ]
+        assert len(outputs) == len(set(outputs))
+        assert "va" in outputs
+        assert all(len(label) <= 3 for label in outputs)
+
+    def test_audio_gap_is_a_single_silence_source(
+        self, timeline_with_gap, draft_preset
+    ):
+        video_track = timeline_with_gap.tracks.children[0]
+        timeline_with_gap.tracks.children.append(
+            video_track.model_copy(update={"name": "Audio 1", "kind": TrackKind.AUDIO})
+        )
+        asset_map = {
+            str(clip.media_reference.asset_id): f"/inputs/{clip.name}.mp4"
+            for clip in timeline_with_gap.find_clips()
+        }
+
+        cmd = TimelineToFFmpeg(
+            timeline_with_gap, asset_map, draft_preset, "/outputs/render.mp4"
+        ).build()
+
+        assert re.search(r"anullsrc=r=\d+:cl=\w+:d=1\.0\[a\w+\]", cmd.filter_complex)
+        assert "atrim=duration=" not in cmd.filter_complex
+
     def test_generate_speed_filter(self, timeline_with_speed_effect, draft_preset):
         clip = timeline_with_speed_effect.find_clips()[0]
         asset_id = str(clip.media_reference.asset_id)
@@ -479,9 +699,8 @@ class TestFilterGeneration:
         )
         cmd = converter.build()
 
-        assert "setpts=" in cmd.filter_complex
-
-        assert "2.0*PTS" in cmd.filter_complex or "2*PTS" in cmd.filter_complex
+        assert "setpts=2.0*(PTS-STARTPTS)" in cmd.filter_complex
+        assert ",setpts=PTS-STARTPTS" not in cmd.filter_complex
 
     def test_generate_freeze_frame_filter(
         self, timeline_with_freeze_frame, draft_preset
@@ -523,6 +742,27 @@ class TestFilterGeneration:
         assert "scale=640:360" in cmd.filter_complex
         assert "pad=1280:720:320:180" in cmd.filter_complex
 
+    def test_zoom_effect(self, simple_timeline, draft_preset):
+        clip = simple_timeline.find_clips()[0]
+        clip.effects.append(
+            Effect(
+                effect_name="Zoom",
+                metadata={"type": "zoom", "start_zoom": 1.0, "end_zoom": 1.5},
+            )
+        )
+        asset_id = str(clip.media_reference.asset_id)
+        asset_map = {asset_id: "/inputs/clip1.mp4"}
+
+        converter = TimelineToFFmpeg(
+            simple_timeline, asset_map, draft_preset, "/outputs/render.mp4"
+        )
+        cmd = converter.build()
+
+        framerate = converter._timeline_framerate
+        frames = int(5.0 * framerate)
+        assert "zoompan=" in cmd.filter_complex
+        assert f"d={frames}:s=1280x720:fps={framerate}" in cmd.filter_complex
+
     def test_generate_solid_color(self, timeline_with_generator, draft_preset):
         converter = TimelineToFFmpeg(
             timeline_with_generator, {}, draft_preset, "/outputs/render.mp4"
@@ -564,6 +804,7 @@ class TestOutputOptions:
         assert "-c:v" in cmd.output_options
         assert "h264_nvenc" in cmd.output_options
         assert "-cq" in cmd.output_options
+        assert cmd.inputs == ["-hwaccel", "cuda", "-i", "/inputs/clip1.mp4"]
 
     def test_audio_encoding_options(self, simple_timeline, draft_preset):
         clip = simple_timeline.find_clips()[0]
@@ -640,6 +881,22 @@ class TestOutputOptions:
         assert "libsvtav1" in cmd.output_options
         assert "-svtav1-params" in cmd.output_options
 
+    def test_output_options_are_not_shared(self, simple_timeline, draft_preset):
+        clip = simple_timeline.find_clips()[0]
+        asset_id = str(clip.media_reference.asset_id)
+        asset_map = {asset_id: "/inputs/clip1.mp4"}
+
+        first = TimelineToFFmpeg(
+            simple_timeline, asset_map, draft_preset, "/outputs/render.mp4"
+        ).build()
+        first.output_options.append("-y")
+
+        second = TimelineToFFmpeg(
+            simple_timeline, asset_map, draft_preset, "/outputs/render.mp4"
+        ).build()
+
+        assert second.output_options == first.output_options[:-1]
+
 
 class TestCommandBuilding:
     def test_build_command_string(self, simple_timeline, draft_preset):
@@ -653,9 +910,96 @@ class TestCommandBuilding:
         cmd_str = converter.build_command_string()
 
         assert cmd_str.startswith("ffmpeg -y")
+        assert converter.build().inputs == ["-i", "/inputs/clip1.mp4"]
         assert "-i /inputs/clip1.mp4" in cmd_str
         assert "-filter_complex" in cmd_str
-        assert '"/outputs/render.mp4"' in cmd_str
+        assert cmd_str.endswith(" /outputs/render.mp4")
+
+    def test_command_string_round_trips_through_shell_quoting(
+        self, simple_timeline, draft_preset
+    ):
+        clip = simple_timeline.find_clips()[0]
+        asset_id = str(clip.media_reference.asset_id)
+        asset_map = {asset_id: "/inputs/my clip's take.mp4"}
+
+        converter = TimelineToFFmpeg(
+            simple_timeline, asset_map, draft_preset, "/outputs/final render.mp4"
+        )
+        cmd = converter.build()
+        tokens = shlex.split(converter.build_command_string())
+
+        assert tokens[2:4] == ["-i", "/inputs/my clip's take.mp4"]
+        assert tokens[tokens.index("-filter_complex") + 1] == cmd.filter_complex
+        assert tokens[-1] == "/outputs/final render.mp4"
+
+    def test_large_filter_graph_goes_to_script_file(
+        self, simple_timeline, draft_preset, monkeypatch, tmp_path
+    ):
+        monkeypatch.setattr("utils.ffmpeg_builder.FILTER_COMPLEX_SCRIPT_THRESHOLD", 16)
+        clip = simple_timeline.find_clips()[0]
+        asset_id = str(clip.media_reference.asset_id)
+        asset_map = {asset_id: "/inputs/clip1.mp4"}
+
+        converter = TimelineToFFmpeg(
+            simple_timeline, asset_map, draft_preset, "/outputs/render.mp4"
+        )
+        tokens = shlex.split(converter.build_command_string(str(tmp_path)))
+        script_path = tokens[tokens.index("-filter_complex_script") + 1]
+
+        assert "-filter_complex" not in tokens
+        assert os.path.dirname(script_path) == str(tmp_path)
+        with open(script_path) as script:
+            assert script.read() == converter.build().filter_complex
+
+    def test_large_filter_graph_stays_inline_without_script_dir(
+        self, simple_timeline, draft_preset, monkeypatch
+    ):
+        monkeypatch.setattr("utils.ffmpeg_builder.FILTER_COMPLEX_SCRIPT_THRESHOLD", 16)
+        clip = simple_timeline.find_clips()[0]
+        asset_id = str(clip.media_reference.asset_id)
+        asset_map = {asset_id: "/inputs/clip1.mp4"}
+
+        converter = TimelineToFFmpeg(
+            simple_timeline, asset_map, draft_preset, "/outputs/render.mp4"
+        )
+        tokens = shlex.split(converter.build_command_string())
+
+        assert "-filter_complex_script" not in tokens
+        assert tokens[tokens.index("-filter_complex") + 1] == converter.build().filter_complex
+
+    def test_single_clip_maps_input_directly(self, simple_timeline):
+        clip = simple_timeline.find_clips()[0]
+        asset_id = str(clip.media_reference.asset_id)
+        asset_map = {asset_id: "/inputs/clip1.mp4"}
+
+        converter = TimelineToFFmpeg(
+            simple_timeline,
+            asset_map,
+            RenderPreset.standard_export(),
+            "/outputs/render.mp4",
+        )
+        cmd = converter.build()
+
+        assert cmd.filter_complex == ""
+        assert cmd.output_maps == ["0:v:0", "0:a:0"]
+        assert cmd.output_options[-2:] == ["-t", "5.0"]
+        assert "-filter_complex" not in converter.build_command_string()
+
+    def test_trimmed_single_clip_seeks_input(self, simple_timeline):
+        clip = simple_timeline.find_clips()[0]
+        clip.source_range.start_time = RationalTime(value=24, rate=24)
+        asset_map = {str(clip.media_reference.asset_id): "/inputs/clip1.mp4"}
+
+        cmd = TimelineToFFmpeg(
+            simple_timeline,
+            asset_map,
+            RenderPreset.standard_export(),
+            "/outputs/render.mp4",
+        ).build()
+
+        assert cmd.filter_complex == ""
+        assert cmd.inputs == ["-ss", "1.0", "-i", "/inputs/clip1.mp4"]
+        assert cmd.output_options[-2:] == ["-t", "5.0"]
 
     def test_build_render_command_helper(self, simple_timeline, draft_preset):
         clip = simple_timeline.find_clips()[0]
@@ -797,3 +1141,18 @@ class TestAtempoChain:
         chain = converter._build_atempo_chain(4.0)
         assert len(chain) >= 2
         assert all("atempo=" in f for f in chain)
+
+    def test_chain_factors_multiply_to_tempo(self, simple_timeline, draft_preset):
+        converter = TimelineToFFmpeg(
+            simple_timeline, {}, draft_preset, "/outputs/render.mp4"
+        )
+
+        assert converter._build_atempo_chain(4.5) == [
+            "atempo=2.0",
+            "atempo=2.0",
+            "atempo=1.125",
+        ]
+        assert converter._build_atempo_chain(0.25) == ["atempo=0.5", "atempo=0.5"]
+
+        with pytest.raises(ValueError):
+            converter._build_atempo_chain(0.0)
@@ -1,16 +1,149 @@
 from __future__ import annotations
 
+import asyncio
+import copy
+import functools
 import importlib
 import logging
 import os
-from dataclasses import dataclass
-from typing import Any
+import random
+import string
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import asdict, dataclass
+from typing import Any, TypeVar
 
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+CLOUD_RUN_API_HOST = "run.googleapis.com:443"
+INIT_RETRY_COOLDOWN_SECONDS = 60.0
+STATUS_CACHE_SIZE = 1000
+STATUS_RPC_TIMEOUT_SECONDS = 5.0
+TERMINAL_CACHE_SIZE = 10000
+TERMINAL_STATUSES = frozenset({"SUCCEEDED", "FAILED"})
+RECENT_STATUS_TTL_SECONDS = 2.0
+TERMINAL_STATUS_TTL_SECONDS = 300.0
+LRO_WAIT_TIMEOUT_SECONDS = 780
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY_SECONDS = 0.5
+RETRY_MAX_DELAY_SECONDS = 30.0
+BREAKER_FAILURE_THRESHOLD = 10
+BREAKER_WINDOW_SECONDS = 30.0
+BREAKER_RESET_SECONDS = 60.0
+
+
+class CloudRunJobError(Exception):
+    pass
+
+
+@functools.cache
+def _api_error_classes() -> tuple[
+    tuple[type[BaseException], ...],
+    tuple[type[BaseException], ...],
+    tuple[type[BaseException], ...],
+    tuple[type[BaseException], ...],
+]:
+    try:
+        api_exceptions = importlib.import_module("google.api_core.exceptions")
+    except ImportError:
+        return (ConnectionError,), (), (), ()
+
+    transient = (
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.InternalServerError,
+        api_exceptions.TooManyRequests,
+        api_exceptions.DeadlineExceeded,
+        api_exceptions.RetryError,
+        ConnectionError,
+    )
+    fatal = (
+        api_exceptions.InvalidArgument,
+        api_exceptions.NotFound,
+        api_exceptions.PermissionDenied,
+        api_exceptions.Unauthenticated,
+        api_exceptions.FailedPrecondition,
+    )
+    # Quota rejections happen before the server acts on the request, so these
+    # are the only transient errors that are safe to retry for run_job.
+    unaccepted = (api_exceptions.TooManyRequests,)
+    missing = (api_exceptions.NotFound,)
+    return transient, fatal, unaccepted, missing
 
-@dataclass
+
+def _transient_errors() -> tuple[type[BaseException], ...]:
+    return _api_error_classes()[0]
+
+
+def _fatal_errors() -> tuple[type[BaseException], ...]:
+    return _api_error_classes()[1]
+
+
+def _unaccepted_errors() -> tuple[type[BaseException], ...]:
+    return _api_error_classes()[2]
+
+
+def _missing_errors() -> tuple[type[BaseException], ...]:
+    return _api_error_classes()[3]
+
+
+def _retry_delay(attempt: int) -> float:
+    delay = min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * (2**attempt))
+    return random.uniform(delay / 2, delay)
+
+
+def _retry_transient(
+    operation: Callable[[], T],
+    description: str,
+    retry_on: tuple[type[BaseException], ...] | None = None,
+) -> T:
+    if retry_on is None:
+        retry_on = _transient_errors()
+    attempt = 0
+    while True:
+        try:
+            return operation()
+        except retry_on as e:
+            attempt += 1
+            if attempt >= RETRY_ATTEMPTS:
+                raise
+            delay = _retry_delay(attempt - 1)
+            logger.warning(
+                f"Transient Cloud Run error during {description} "
+                f"(attempt {attempt}/{RETRY_ATTEMPTS}), retrying in {delay:.2f}s: {e}"
+            )
+            time.sleep(delay)
+
+
+async def _retry_transient_async(
+    operation: Callable[[], Awaitable[T]],
+    description: str,
+    retry_on: tuple[type[BaseException], ...] | None = None,
+) -> T:
+    if retry_on is None:
+        retry_on = _transient_errors()
+    attempt = 0
+    while True:
+        try:
+            return await operation()
+        except retry_on as e:
+            attempt += 1
+            if attempt >= RETRY_ATTEMPTS:
+                raise
+            delay = _retry_delay(attempt - 1)
+            logger.warning(
+                f"Transient Cloud Run error during {description} "
+                f"(attempt {attempt}/{RETRY_ATTEMPTS}), retrying in {delay:.2f}s: {e}"
+            )
+            await asyncio.sleep(delay)
+
+
+@dataclass(frozen=True)
 class CloudRunConfig:
     project_id: str
     region: str
@@ -22,22 +155,46 @@ class CloudRunConfig:
     input_bucket: str = ""
     output_bucket: str = ""
 
+    @functools.cached_property
+    def job_path_prefix(self) -> str:
+        return f"projects/{self.project_id}/locations/{self.region}/jobs/"
+
+    @functools.cached_property
+    def cpu_job_full_name(self) -> str:
+        return self.job_path_prefix + self.cpu_job_name
+
+    @functools.cached_property
+    def gpu_job_full_name(self) -> str:
+        return self.job_path_prefix + self.gpu_job_name
+
+    def execution_full_name(self, job_name: str, execution_id: str) -> str:
+        return f"{self.job_path_prefix}{job_name}/executions/{execution_id}"
+
     @classmethod
     def from_env(cls) -> CloudRunConfig:
-        return cls(
-            project_id=os.getenv("GCP_PROJECT_ID", ""),
-            region=os.getenv("GCP_REGION", "us-central1"),
-            cpu_job_name=os.getenv("RENDER_CPU_JOB_NAME", "video-render-cpu"),
-            gpu_job_name=os.getenv("RENDER_GPU_JOB_NAME", "video-render-gpu"),
-            cpu_job_image=os.getenv("RENDER_CPU_IMAGE", ""),
-            gpu_job_image=os.getenv("RENDER_GPU_IMAGE", ""),
-            service_account_email=os.getenv("RENDER_SERVICE_ACCOUNT", ""),
-            input_bucket=os.getenv("GCS_BUCKET", "video-editor"),
-            output_bucket=os.getenv("GCS_RENDER_BUCKET", "video-editor-renders"),
-        )
+        return _config_from_env()
 
+    @classmethod
+    def invalidate_env_cache(cls) -> None:
+        _config_from_env.cache_clear()
+
+
+@functools.cache
+def _config_from_env() -> CloudRunConfig:
+    return CloudRunConfig(
+        project_id=os.getenv("GCP_PROJECT_ID", ""),
+        region=os.getenv("GCP_REGION", "us-central1"),
+        cpu_job_name=os.getenv("RENDER_CPU_JOB_NAME", "video-render-cpu"),
+        gpu_job_name=os.getenv("RENDER_GPU_JOB_NAME", "video-render-gpu"),
+        cpu_job_image=os.getenv("RENDER_CPU_IMAGE", ""),
+        gpu_job_image=os.getenv("RENDER_GPU_IMAGE", ""),
+        service_account_email=os.getenv("RENDER_SERVICE_ACCOUNT", ""),
+        input_bucket=os.getenv("GCS_BUCKET", "video-editor"),
+        output_bucket=os.getenv("GCS_RENDER_BUCKET", "video-editor-renders"),
+    )
 
-@dataclass
+
+@dataclass(frozen=True)
 class JobExecution:
     execution_id: str
     job_name: str
@@ -59,42 +216,325 @@ class JobExecutionRequest:
     cpu: str = "8"
 
 
+class _TTLCache:
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _CircuitBreaker:
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        window_seconds: float = BREAKER_WINDOW_SECONDS,
+        reset_seconds: float = BREAKER_RESET_SECONDS,
+    ):
+        self._failure_threshold = failure_threshold
+        self._window_seconds = window_seconds
+        self._reset_seconds = reset_seconds
+        self._failures: deque[float] = deque()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self._reset_seconds:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Cloud Run circuit closed")
+            self._state = self.CLOSED
+            self._failures.clear()
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+
+            if self._state == self.HALF_OPEN:
+                self._open(now)
+                return
+
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self._window_seconds:
+                self._failures.popleft()
+
+            if self._state == self.CLOSED and len(self._failures) >= self._failure_threshold:
+                self._open(now)
+
+    def _open(self, now: float) -> None:
+        logger.warning(
+            f"Cloud Run circuit opened; skipping API calls for {self._reset_seconds:.0f}s"
+        )
+        self._state = self.OPEN
+        self._opened_at = now
+        self._failures.clear()
+        self._probe_in_flight = False
+
 
 class CloudRunJobsClient:
     def __init__(self, config: CloudRunConfig | None = None):
         self.config = config or CloudRunConfig.from_env()
+        self._run_v2: Any = None
+        self._run_overrides_template: Any = None
         self._jobs_client = None
         self._executions_client = None
+        self._jobs_async_client: Any = None
+        self._executions_async_client: Any = None
         self._initialized = False
+        self._async_initialized = False
+        self._breaker = _CircuitBreaker()
+        self._import_failed = False
+        self._init_failed_at: float | None = None
+        self._init_lock = threading.Lock()
+        self._background_tasks: set[asyncio.Task] = set()
+        self._status_cache = _TTLCache(STATUS_CACHE_SIZE)
+        self._recent_statuses = _TTLCache(TERMINAL_CACHE_SIZE)
+        self._inflight: dict[str, Future[JobExecution | None]] = {}
+        self._inflight_lock = threading.Lock()
 
     def _ensure_initialized(self) -> None:
         if self._initialized:
             return
 
-        try:
-            run_v2 = importlib.import_module("google.cloud.run_v2")  # type: ignore[import-not-found]
+        with self._init_lock:
+            if self._initialized:
+                return
+
+            if (
+                self._init_failed_at is not None
+                and time.monotonic() - self._init_failed_at < INIT_RETRY_COOLDOWN_SECONDS
+            ):
+                return
+
+            try:
+                run_v2 = importlib.import_module("google.cloud.run_v2")  # type: ignore[import-not-found]
+                jobs_transports = importlib.import_module(
+                    "google.cloud.run_v2.services.jobs.transports"
+                )
+                executions_transports = importlib.import_module(
+                    "google.cloud.run_v2.services.executions.transports"
+                )
+
+                jobs_transport_cls = jobs_transports.JobsGrpcTransport
+                channel = jobs_transport_cls.create_channel(
+                    CLOUD_RUN_API_HOST,
+                    scopes=jobs_transport_cls.AUTH_SCOPES,
+                )
+
+                self._run_v2 = run_v2
+                self._jobs_client = run_v2.JobsClient(
+                    transport=jobs_transport_cls(channel=channel)
+                )
+                self._executions_client = run_v2.ExecutionsClient(
+                    transport=executions_transports.ExecutionsGrpcTransport(channel=channel)
+                )
+
+                self._initialized = True
+                logger.info("Cloud Run Jobs client initialized")
+            except ImportError:
+                logger.warning(
+                    "google-cloud-run not installed. "
+                    "Install with: pip install google-cloud-run"
+                )
+                self._jobs_client = None
+                self._executions_client = None
+                self._import_failed = True
+                self._initialized = True
+            except Exception as e:
+                logger.error(f"Failed to initialize Cloud Run client: {e}")
+                self._jobs_client = None
+                self._executions_client = None
+                self._init_failed_at = time.monotonic()
+
+    def _ensure_async_initialized(self) -> None:
+        self._ensure_initialized()
 
-            self._jobs_client = run_v2.JobsClient()
-            self._executions_client = run_v2.ExecutionsClient()
+        if self._async_initialized or not self._jobs_client:
+            return
 
-            self._initialized = True
-            logger.info("Cloud Run Jobs client initialized")
-        except ImportError:
-            logger.warning(
-                "google-cloud-run not installed. "
-                "Install with: pip install google-cloud-run"
-            )
-            self._jobs_client = None
-            self._executions_client = None
-        except Exception as e:
-            logger.error(f"Failed to initialize Cloud Run client: {e}")
-            self._jobs_client = None
-            self._executions_client = None
+        with self._init_lock:
+            if self._async_initialized:
+                return
+
+            try:
+                jobs_transports = importlib.import_module(
+                    "google.cloud.run_v2.services.jobs.transports"
+                )
+                executions_transports = importlib.import_module(
+                    "google.cloud.run_v2.services.executions.transports"
+                )
+
+                jobs_transport_cls = jobs_transports.JobsGrpcAsyncIOTransport
+                channel = jobs_transport_cls.create_channel(
+                    CLOUD_RUN_API_HOST,
+                    scopes=jobs_transport_cls.AUTH_SCOPES,
+                )
+
+                self._jobs_async_client = self._run_v2.JobsAsyncClient(
+                    transport=jobs_transport_cls(channel=channel)
+                )
+                self._executions_async_client = self._run_v2.ExecutionsAsyncClient(
+                    transport=executions_transports.ExecutionsGrpcAsyncIOTransport(
+                        channel=channel
+                    )
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Cloud Run async clients unavailable, using worker threads: {e}"
+                )
+                self._jobs_async_client = None
+                self._executions_async_client = None
+
+            self._async_initialized = True
 
     @property
     def is_available(self) -> bool:
         self._ensure_initialized()
-        return self._jobs_client is not None
+        return not self._import_failed and self._jobs_client is not None
+
+    def prewarm(self) -> bool:
+        self._ensure_initialized()
+
+        if not self._jobs_client or not self.config.project_id:
+            return False
+
+        try:
+            run_v2 = self._run_v2
+
+            self._jobs_client.list_jobs(
+                request=run_v2.ListJobsRequest(
+                    parent=f"projects/{self.config.project_id}/locations/{self.config.region}",
+                    page_size=1,
+                )
+            )
+            logger.info("Cloud Run Jobs client prewarmed")
+            return True
+
+        except Exception as e:
+            logger.warning(f"Failed to prewarm Cloud Run client: {e}")
+            return False
+
+    def _local_execution(self, request: JobExecutionRequest) -> JobExecution | None:
+        execution_mode = request.execution_mode or os.getenv("RENDER_EXECUTION_MODE", "cloud")
+        if execution_mode.lower() != "local":
+            return None
+
+        logger.info("Render execution mode is local; skipping Cloud Run dispatch")
+        return JobExecution(
+            execution_id=f"local-{request.job_id}",
+            job_name="local",
+            status="PENDING",
+        )
+
+    def _job_name_for(self, request: JobExecutionRequest) -> str:
+        return self.config.gpu_job_name if request.use_gpu else self.config.cpu_job_name
+
+    def _overrides_template(self, run_v2: Any) -> Any:
+        if self._run_overrides_template is None:
+            overrides_cls = run_v2.RunJobRequest.Overrides
+            self._run_overrides_template = overrides_cls(
+                container_overrides=[
+                    overrides_cls.ContainerOverride(
+                        args=["--manifest", "", "--job-id", ""],
+                        env=[
+                            run_v2.EnvVar(name="RENDER_JOB_ID"),
+                            run_v2.EnvVar(name="RENDER_MANIFEST"),
+                        ],
+                    )
+                ],
+            )
+        return self._run_overrides_template
+
+    def _build_overrides(
+        self, run_v2: Any, job_id: str, manifest_gcs_path: str, timeout_seconds: int
+    ) -> Any:
+        overrides_cls = run_v2.RunJobRequest.Overrides
+        overrides = overrides_cls()
+        overrides_cls.copy_from(overrides, self._overrides_template(run_v2))
+
+        container = overrides.container_overrides[0]
+        container.args[1] = manifest_gcs_path
+        container.args[3] = job_id
+        container.env[0].value = job_id
+        container.env[1].value = manifest_gcs_path
+        overrides.timeout = f"{timeout_seconds}s"
+
+        return overrides
+
+    def _build_run_request(self, run_v2: Any, request: JobExecutionRequest) -> Any:
+        return run_v2.RunJobRequest(
+            name=self.config.gpu_job_full_name
+            if request.use_gpu
+            else self.config.cpu_job_full_name,
+            overrides=self._build_overrides(
+                run_v2,
+                request.job_id,
+                request.manifest_gcs_path,
+                request.timeout_seconds,
+            ),
+        )
+
+    def _started_execution(self, execution: Any, job_name: str) -> JobExecution:
+        return JobExecution(
+            execution_id=execution.name.split("/")[-1],
+            job_name=job_name,
+            status="RUNNING",
+            create_time=execution.create_time.isoformat()
+            if execution.create_time
+            else None,
+            start_time=execution.start_time.isoformat()
+            if execution.start_time
+            else None,
+        )
 
     def execute_render_job(self, request: JobExecutionRequest) -> JobExecution | None:
         self._ensure_initialized()
@@ -103,75 +543,165 @@ class CloudRunJobsClient:
             logger.error("Cloud Run client not available")
             return self._execute_local_fallback(request)
 
-        execution_mode = request.execution_mode or os.getenv("RENDER_EXECUTION_MODE", "cloud")
-        if execution_mode.lower() == "local":
-            logger.info("Render execution mode is local; skipping Cloud Run dispatch")
-            return JobExecution(
-                execution_id=f"local-{request.job_id}",
-                job_name="local",
-                status="PENDING",
-            )
+        local_execution = self._local_execution(request)
+        if local_execution:
+            return local_execution
+
+        if not self._breaker.allow_request():
+            logger.warning(f"Cloud Run circuit open; not dispatching render job {request.job_id}")
+            return self._execute_local_fallback(request)
 
         try:
-            run_v2 = importlib.import_module("google.cloud.run_v2")  # type: ignore[import-not-found]
+            run_v2 = self._run_v2
 
-            job_name = (
+            job_name = self._job_name_for(request)
+            run_request = self._build_run_request(run_v2, request)
 
-                self.config.gpu_job_name
-                if request.use_gpu
-                else self.config.cpu_job_name
-            )
-            full_job_name = (
-                f"projects/{self.config.project_id}/"
-                f"locations/{self.config.region}/"
-                f"jobs/{job_name}"
+            # run_job is not idempotent: a timeout after the server accepted
+            # the request would start a second render if retried.
+            operation = _retry_transient(
+                lambda: self._jobs_client.run_job(request=run_request),
+                "run_job",
+                retry_on=_unaccepted_errors(),
             )
+            self._breaker.record_success()
+            try:
+                execution = operation.result(
+                    timeout=min(request.timeout_seconds, LRO_WAIT_TIMEOUT_SECONDS)
+                )
+            except FutureTimeoutError:
+                logger.warning(
+                    f"Cloud Run execution for render job {request.job_id} has not started yet; "
+                    "continuing with status polling"
+                )
+                return self._dispatched_execution(operation, job_name)
+
+            return self._started_execution(execution, job_name)
+
+        except _fatal_errors() as e:
+            logger.error(f"Cloud Run rejected render job {request.job_id}: {e}")
+            self._breaker.record_success()
+            raise CloudRunJobError(str(e)) from e
+        except _transient_errors() as e:
+            logger.error(f"Cloud Run unavailable for render job {request.job_id}: {e}")
+            self._breaker.record_failure()
+            return None
+        except Exception as e:
+            logger.error(f"Failed to execute Cloud Run job: {e}")
+            self._breaker.record_failure()
+            return None
 
-            run_request = run_v2.RunJobRequest(
-                name=full_job_name,
-                overrides=run_v2.RunJobRequest.Overrides(
-                    container_overrides=[
-                        run_v2.RunJobRequest.Overrides.ContainerOverride(
-                            args=[
-                                "--manifest",
-                                request.manifest_gcs_path,
-                                "--job-id",
-                                request.job_id,
-                            ],
-                            env=[
-                                run_v2.EnvVar(
-                                    name="RENDER_JOB_ID", value=request.job_id
-                                ),
-                                run_v2.EnvVar(
-                                    name="RENDER_MANIFEST",
-                                    value=request.manifest_gcs_path,
-                                ),
-                            ],
-                        )
-                    ],
-                    timeout=f"{request.timeout_seconds}s",
-                ),
-            )
+    async def execute_render_job_async(
+        self,
+        request: JobExecutionRequest,
+        on_complete: Callable[[JobExecution], None] | None = None,
+    ) -> JobExecution | None:
+        self._ensure_initialized()
 
-            operation = self._jobs_client.run_job(request=run_request)
-            execution = operation.result()
+        if not self._jobs_client:
+            logger.error("Cloud Run client not available")
+            return self._execute_local_fallback(request)
 
-            return JobExecution(
-                execution_id=execution.name.split("/")[-1],
-                job_name=job_name,
-                status="RUNNING",
-                create_time=execution.create_time.isoformat()
-                if execution.create_time
-                else None,
-                start_time=execution.start_time.isoformat()
-                if execution.start_time
-                else None,
-            )
+        local_execution = self._local_execution(request)
+        if local_execution:
+            return local_execution
 
+        if not self._breaker.allow_request():
+            logger.warning(f"Cloud Run circuit open; not dispatching render job {request.job_id}")
+            return self._execute_local_fallback(request)
+
+        self._ensure_async_initialized()
+
+        try:
+            run_v2 = self._run_v2
+
+            job_name = self._job_name_for(request)
+            run_request = self._build_run_request(run_v2, request)
+
+            if self._jobs_async_client is not None:
+                operation = await _retry_transient_async(
+                    lambda: self._jobs_async_client.run_job(request=run_request),
+                    "run_job",
+                    retry_on=_unaccepted_errors(),
+                )
+            else:
+                operation = await asyncio.to_thread(
+                    _retry_transient,
+                    lambda: self._jobs_client.run_job(request=run_request),
+                    "run_job",
+                    retry_on=_unaccepted_errors(),
+                )
+            self._breaker.record_success()
+        except _fatal_errors() as e:
+            logger.error(f"Cloud Run rejected render job {request.job_id}: {e}")
+            self._breaker.record_success()
+            raise CloudRunJobError(str(e)) from e
+        except _transient_errors() as e:
+            logger.error(f"Cloud Run unavailable for render job {request.job_id}: {e}")
+            self._breaker.record_failure()
+            return None
         except Exception as e:
             logger.error(f"Failed to execute Cloud Run job: {e}")
+            self._breaker.record_failure()
             return None
 
+        task = asyncio.create_task(
+            self._await_operation(
+                operation,
+                job_name,
+                min(request.timeout_seconds, LRO_WAIT_TIMEOUT_SECONDS),
+                on_complete,
+            )
+        )
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+        return self._dispatched_execution(operation, job_name)
+
+    def _dispatched_execution(self, operation: Any, job_name: str) -> JobExecution:
+        metadata = getattr(operation, "metadata", None)
+        execution_name = getattr(metadata, "name", "") or ""
+
+        return JobExecution(
+            execution_id=execution_name.split("/")[-1],
+            job_name=job_name,
+            status="DISPATCHED",
+        )
+
+    async def _await_operation(
+        self,
+        operation: Any,
+        job_name: str,
+        timeout_seconds: int,
+        on_complete: Callable[[JobExecution], None] | None,
+    ) -> JobExecution:
+        try:
+            if asyncio.iscoroutinefunction(operation.result):
+                execution = await operation.result(timeout=timeout_seconds)
+            else:
+                execution = await asyncio.to_thread(operation.result, timeout=timeout_seconds)
+            result = self._started_execution(execution, job_name)
+        except (FutureTimeoutError, asyncio.TimeoutError):
+            logger.warning(f"Cloud Run job {job_name} has not started yet; leaving it to polling")
+            result = self._dispatched_execution(operation, job_name)
+        except Exception as e:
+            logger.error(f"Cloud Run job {job_name} failed to start: {e}")
+            result = JobExecution(
+                execution_id=self._dispatched_execution(operation, job_name).execution_id,
+                job_name=job_name,
+                status="FAILED",
+                error_message=str(e),
+            )
+
+        if on_complete:
+            # Callbacks typically write to the database; keep that off the loop.
+            try:
+                await asyncio.to_thread(on_complete, result)
+            except Exception as e:
+                logger.error(f"Render dispatch callback failed: {e}")
+
+        return result
+
     def get_execution_status(
         self, job_name: str, execution_id: str
     ) -> JobExecution | None:
@@ -180,67 +710,258 @@ class CloudRunJobsClient:
         if not self._executions_client:
             return None
 
+        full_name = self.config.execution_full_name(job_name, execution_id)
+
+        recent = self._recent_statuses.get(full_name)
+        if recent is not None:
+            return recent
+
+        future, is_leader = self._begin_status_poll(full_name)
+        if not is_leader:
+            return future.result()
+
+        result = None
+        try:
+            result = self._fetch_execution_status(full_name, job_name, execution_id)
+        finally:
+            self._finish_status_poll(full_name, future, result)
+
+        return result
+
+    async def get_execution_status_async(
+        self, job_name: str, execution_id: str
+    ) -> JobExecution | None:
+        self._ensure_async_initialized()
+
+        if not self._executions_client:
+            return None
+
+        if self._executions_async_client is None:
+            return await asyncio.to_thread(
+                self.get_execution_status, job_name, execution_id
+            )
+
+        full_name = self.config.execution_full_name(job_name, execution_id)
+
+        recent = self._recent_statuses.get(full_name)
+        if recent is not None:
+            return recent
+
+        future, is_leader = self._begin_status_poll(full_name)
+        if not is_leader:
+            return await asyncio.wrap_future(future)
+
+        result = None
+        try:
+            result = await self._fetch_execution_status_async(
+                full_name, job_name, execution_id
+            )
+        finally:
+            self._finish_status_poll(full_name, future, result)
+
+        return result
+
+    def _begin_status_poll(
+        self, full_name: str
+    ) -> tuple[Future[JobExecution | None], bool]:
+        with self._inflight_lock:
+            inflight = self._inflight.get(full_name)
+            if inflight is not None:
+                return inflight, False
+
+            future: Future[JobExecution | None] = Future()
+            self._inflight[full_name] = future
+            return future, True
+
+    def _finish_status_poll(
+        self,
+        full_name: str,
+        future: Future[JobExecution | None],
+        result: JobExecution | None,
+    ) -> None:
+        if result is not None:
+            self._recent_statuses.set(
+                full_name,
+                result,
+                TERMINAL_STATUS_TTL_SECONDS
+                if result.status in TERMINAL_STATUSES
+                else RECENT_STATUS_TTL_SECONDS,
+            )
+        with self._inflight_lock:
+            self._inflight.pop(full_name, None)
+        future.set_result(result)
+
+    def _fetch_execution_status(
+        self, full_name: str, job_name: str, execution_id: str
+    ) -> JobExecution | None:
+        if not self._breaker.allow_request():
+            return None
+
         try:
-            run_v2 = importlib.import_module("google.cloud.run_v2")  # type: ignore[import-not-found]
+            run_v2 = self._run_v2
 
-            full_name = (
-                f"projects/{self.config.project_id}/"
-                f"locations/{self.config.region}/"
-                f"jobs/{job_name}/"
-                f"executions/{execution_id}"
+            execution = _retry_transient(
+                lambda: self._executions_client.get_execution(
+                    request=run_v2.GetExecutionRequest(name=full_name),
+                    timeout=STATUS_RPC_TIMEOUT_SECONDS,
+                ),
+                "get_execution",
             )
 
-            execution = self._executions_client.get_execution(
-                request=run_v2.GetExecutionRequest(name=full_name)
+            self._breaker.record_success()
+
+            return self._parse_execution(execution, job_name, execution_id)
+
+        except Exception as e:
+            return self._status_poll_failed(e, full_name, job_name, execution_id)
+
+    async def _fetch_execution_status_async(
+        self, full_name: str, job_name: str, execution_id: str
+    ) -> JobExecution | None:
+        if not self._breaker.allow_request():
+            return None
+
+        try:
+            run_v2 = self._run_v2
+
+            execution = await _retry_transient_async(
+                lambda: self._executions_async_client.get_execution(
+                    request=run_v2.GetExecutionRequest(name=full_name),
+                    timeout=STATUS_RPC_TIMEOUT_SECONDS,
+                ),
+                "get_execution",
             )
 
+            self._breaker.record_success()
 
-            status = self._map_execution_status(execution)
+            return self._parse_execution(execution, job_name, execution_id)
 
+        except Exception as e:
+            return self._status_poll_failed(e, full_name, job_name, execution_id)
+
+    def _status_poll_failed(
+        self, error: Exception, full_name: str, job_name: str, execution_id: str
+    ) -> JobExecution | None:
+        # Only a missing execution is final. Auth and config errors say nothing
+        # about the render itself, so they return None (never cached) and the
+        # next poll tries again.
+        if isinstance(error, _missing_errors()):
+            logger.error(f"Cloud Run execution {full_name} no longer exists: {error}")
+            self._breaker.record_success()
             return JobExecution(
                 execution_id=execution_id,
                 job_name=job_name,
-                status=status,
-                create_time=execution.create_time.isoformat()
-                if execution.create_time
-                else None,
-                start_time=execution.start_time.isoformat()
-                if execution.start_time
-                else None,
-                completion_time=execution.completion_time.isoformat()
-                if execution.completion_time
-                else None,
-                error_message=self._extract_error_message(execution),
+                status="FAILED",
+                error_message=str(error),
             )
-
-        except Exception as e:
-            logger.error(f"Failed to get execution status: {e}")
+        if isinstance(error, _fatal_errors()):
+            logger.error(f"Cloud Run execution {full_name} cannot be polled: {error}")
+            self._breaker.record_success()
             return None
 
+        logger.error(f"Failed to get execution status: {error}")
+        self._breaker.record_failure()
+        return None
+
+    def _parse_execution(
+        self, execution: Any, job_name: str, execution_id: str
+    ) -> JobExecution:
+        etag = getattr(execution, "etag", "") or ""
+        version = (getattr(execution, "generation", 0) or 0, etag)
+
+        cached = self._status_cache.get(execution_id)
+        if etag and cached and cached[0] == version:
+            return cached[1]
+
+        parsed = JobExecution(
+            execution_id=execution_id,
+            job_name=job_name,
+            status=self._map_execution_status(execution),
+            create_time=execution.create_time.isoformat()
+            if execution.create_time
+            else None,
+            start_time=execution.start_time.isoformat()
+            if execution.start_time
+            else None,
+            completion_time=execution.completion_time.isoformat()
+            if execution.completion_time
+            else None,
+            error_message=self._extract_error_message(execution),
+        )
+
+        self._status_cache.set(
+            execution_id, (version, parsed), TERMINAL_STATUS_TTL_SECONDS
+        )
+
+        return parsed
+
     def cancel_execution(self, job_name: str, execution_id: str) -> bool:
         self._ensure_initialized()
 
         if not self._executions_client:
             return False
 
+        if not self._breaker.allow_request():
+            return False
+
         try:
-            run_v2 = importlib.import_module("google.cloud.run_v2")  # type: ignore[import-not-found]
+            run_v2 = self._run_v2
+
+            full_name = self.config.execution_full_name(job_name, execution_id)
 
-            full_name = (
-                f"projects/{self.config.project_id}/"
-                f"locations/{self.config.region}/"
-                f"jobs/{job_name}/"
-                f"executions/{execution_id}"
+            _retry_transient(
+                lambda: self._executions_client.delete_execution(
+                    request=run_v2.DeleteExecutionRequest(name=full_name)
+                ),
+                "delete_execution",
             )
+            self._breaker.record_success()
+
+            return True
+
+        except _fatal_errors() as e:
+            logger.error(f"Cloud Run refused to cancel execution {full_name}: {e}")
+            self._breaker.record_success()
+            return False
+        except Exception as e:
+            logger.error(f"Failed to cancel execution: {e}")
+            self._breaker.record_failure()
+            return False
 
-            self._executions_client.delete_execution(
-                request=run_v2.DeleteExecutionRequest(name=full_name)
+    async def cancel_execution_async(self, job_name: str, execution_id: str) -> bool:
+        self._ensure_async_initialized()
+
+        if not self._executions_client:
+            return False
+
+        if self._executions_async_client is None:
+            return await asyncio.to_thread(self.cancel_execution, job_name, execution_id)
+
+        if not self._breaker.allow_request():
+            return False
+
+        full_name = self.config.execution_full_name(job_name, execution_id)
+
+        try:
+            run_v2 = self._run_v2
+
+            await _retry_transient_async(
+                lambda: self._executions_async_client.delete_execution(
+                    request=run_v2.DeleteExecutionRequest(name=full_name)
+                ),
+                "delete_execution",
             )
+            self._breaker.record_success()
 
             return True
 
+        except _fatal_errors() as e:
+            logger.error(f"Cloud Run refused to cancel execution {full_name}: {e}")
+            self._breaker.record_success()
+            return False
         except Exception as e:
             logger.error(f"Failed to cancel execution: {e}")
+            self._breaker.record_failure()
             return False
 
     def _map_execution_status(self, execution: Any) -> str:
@@ -285,14 +1006,18 @@ class CloudRunJobsClient:
         )
 
 
-def create_cpu_job_definition(
+def _job_definition_template(
     config: CloudRunConfig,
+    name: str,
+    image: str,
+    extra_annotations: dict[str, str],
+    extra_limits: dict[str, str],
 ) -> dict[str, Any]:
     return {
         "apiVersion": "run.googleapis.com/v1",
         "kind": "Job",
         "metadata": {
-            "name": config.cpu_job_name,
+            "name": name,
             "annotations": {
                 "run.googleapis.com/launch-stage": "BETA",
             },
@@ -302,16 +1027,18 @@ def create_cpu_job_definition(
                 "metadata": {
                     "annotations": {
                         "run.googleapis.com/execution-environment": "gen2",
+                        **extra_annotations,
                     }
                 },
                 "spec": {
                     "containers": [
                         {
-                            "image": config.cpu_job_image,
+                            "image": image,
                             "resources": {
                                 "limits": {
                                     "cpu": "8",
                                     "memory": "32Gi",
+                                    **extra_limits,
                                 }
                             },
                             "env": [
@@ -358,51 +1085,65 @@ def create_cpu_job_definition(
     }
 
 
-def create_gpu_job_definition(
-    config: CloudRunConfig,
-) -> dict[str, Any]:
-    definition = create_cpu_job_definition(config)
+@functools.lru_cache(maxsize=8)
+def _cpu_job_definition(config: CloudRunConfig) -> dict[str, Any]:
+    return _job_definition_template(
+        config,
+        name=config.cpu_job_name,
+        image=config.cpu_job_image,
+        extra_annotations={},
+        extra_limits={},
+    )
 
-    definition["metadata"]["name"] = config.gpu_job_name
-    definition["spec"]["template"]["metadata"]["annotations"].update(
-        {
+
+@functools.lru_cache(maxsize=8)
+def _gpu_job_definition(config: CloudRunConfig) -> dict[str, Any]:
+    return _job_definition_template(
+        config,
+        name=config.gpu_job_name,
+        image=config.gpu_job_image,
+        extra_annotations={
             "run.googleapis.com/gpu-type": "nvidia-l4",
             "run.googleapis.com/gpu-zonal-redundancy": "disabled",
-        }
-    )
-    definition["spec"]["template"]["spec"]["containers"][0]["resources"]["limits"][
-        "nvidia.com/gpu"
-    ] = "1"
-    definition["spec"]["template"]["spec"]["containers"][0]["image"] = (
-        config.gpu_job_image
+        },
+        extra_limits={"nvidia.com/gpu": "1"},
     )
 
-    return definition
 
+def create_cpu_job_definition(
+    config: CloudRunConfig,
+) -> dict[str, Any]:
+    return copy.deepcopy(_cpu_job_definition(config))
 
-def generate_gcloud_commands(config: CloudRunConfig) -> str:
-    commands = []
-
-    commands.append(f"""
- gcloud run jobs create {config.cpu_job_name} \
-    --image {config.cpu_job_image} \
-    --region {config.region} \
-    --memory 32Gi \
-    --cpu 8 \
-    --max-retries 1 \
-    --task-timeout 3600 \
-    --service-account {config.service_account_email} \
-    --add-volume=name=input-volume,type=cloud-storage,bucket={config.input_bucket},readonly=true \
-    --add-volume-mount=volume=input-volume,mount-path=/inputs \
-    --add-volume=name=output-volume,type=cloud-storage,bucket={config.output_bucket} \
-    --add-volume-mount=volume=output-volume,mount-path=/outputs
-""")
 
-    commands.append(f"""
+def create_gpu_job_definition(
+    config: CloudRunConfig,
+) -> dict[str, Any]:
+    return copy.deepcopy(_gpu_job_definition(config))
+
 
-gcloud run jobs create {config.gpu_job_name} \\
-    --image {config.gpu_job_image} \\
-    --region {config.region} \\
+_CPU_GCLOUD_COMMAND = string.Template(
+    """
+gcloud run jobs create ${cpu_job_name} \\
+    --image ${cpu_job_image} \\
+    --region ${region} \\
+    --memory 32Gi \\
+    --cpu 8 \\
+    --max-retries 1 \\
+    --task-timeout 3600 \\
+    --service-account ${service_account_email} \\
+    --add-volume=name=input-volume,type=cloud-storage,bucket=${input_bucket},readonly=true \\
+    --add-volume-mount=volume=input-volume,mount-path=/inputs \\
+    --add-volume=name=output-volume,type=cloud-storage,bucket=${output_bucket} \\
+    --add-volume-mount=volume=output-volume,mount-path=/outputs
+"""
+)
+
+_GPU_GCLOUD_COMMAND = string.Template(
+    """
+gcloud run jobs create ${gpu_job_name} \\
+    --image ${gpu_job_image} \\
+    --region ${region} \\
     --memory 32Gi \\
     --cpu 8 \\
     --gpu 1 \\
@@ -410,21 +1151,34 @@ gcloud run jobs create {config.gpu_job_name} \\
     --no-gpu-zonal-redundancy \\
     --max-retries 1 \\
     --task-timeout 3600 \\
-    --service-account {config.service_account_email} \\
-    --add-volume=name=input-volume,type=cloud-storage,bucket={config.input_bucket},readonly=true \\
+    --service-account ${service_account_email} \\
+    --add-volume=name=input-volume,type=cloud-storage,bucket=${input_bucket},readonly=true \\
     --add-volume-mount=volume=input-volume,mount-path=/inputs \\
-    --add-volume=name=output-volume,type=cloud-storage,bucket={config.output_bucket} \\
+    --add-volume=name=output-volume,type=cloud-storage,bucket=${output_bucket} \\
     --add-volume-mount=volume=output-volume,mount-path=/outputs
-""")
+"""
+)
+
 
-    return "\n".join(commands)
+def generate_gcloud_commands(config: CloudRunConfig) -> str:
+    values = asdict(config)
+    return "\n".join(
+        (_CPU_GCLOUD_COMMAND.substitute(values), _GPU_GCLOUD_COMMAND.substitute(values))
+    )
 
 
 _client: CloudRunJobsClient | None = None
+_client_lock = threading.Lock()
 
 
 def get_cloud_run_client() -> CloudRunJobsClient:
     global _client
     if _client is None:
-        _client = CloudRunJobsClient()
+        with _client_lock:
+            if _client is None:
+                _client = CloudRunJobsClient()
     return _client
+
+
+def prewarm_cloud_run_client() -> bool:
+    return get_cloud_run_client().prewarm()
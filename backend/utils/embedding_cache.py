@@ -0,0 +1,114 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "agentic-video-editor", "embeddings.sqlite3"),
+)
+SQLITE_MAX_VARIABLES = 500
+
+
+def embedding_cache_key(model: str, dimensions: int, text: str) -> str:
+    return hashlib.sha256(f"{model}:{dimensions}:{text}".encode()).hexdigest()
+
+
+def pack_embedding(embedding: np.ndarray) -> bytes:
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def unpack_embedding(dim: int, blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float32, count=dim)
+
+
+class EmbeddingStore:
+    def __init__(self, path: str | None):
+        self._path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._disabled = not path
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if self._disabled:
+            return None
+        if self._conn is not None:
+            return self._conn
+
+        try:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "hash TEXT PRIMARY KEY, dim INTEGER, vec BLOB, created_at INTEGER)"
+            )
+            conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Embedding cache unavailable at {self._path}: {e}")
+            self._disabled = True
+            return None
+
+        self._conn = conn
+        return conn
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        found: dict[str, np.ndarray] = {}
+        if not keys:
+            return found
+
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return found
+            try:
+                for start in range(0, len(keys), SQLITE_MAX_VARIABLES):
+                    chunk = keys[start : start + SQLITE_MAX_VARIABLES]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f"SELECT hash, dim, vec FROM embeddings WHERE hash IN ({placeholders})",
+                        chunk,
+                    ).fetchall()
+                    for key, dim, blob in rows:
+                        found[key] = unpack_embedding(dim, blob)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache lookup failed: {e}")
+        return found
+
+    def put_many(self, items: list[tuple[str, np.ndarray]]) -> None:
+        if not items:
+            return
+
+        now = int(time.time())
+        rows = [
+            (key, len(embedding), pack_embedding(embedding), now)
+            for key, embedding in items
+        ]
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (hash, dim, vec, created_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        rows,
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,62 +1,501 @@
+import asyncio
+import base64
+import functools
 import os
 import logging
-from openai import OpenAI
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import NamedTuple
+
+import httpx
+import numpy as np
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    AsyncOpenAI,
+    BadRequestError,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+    OpenAI,
+    RateLimitError,
+)
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+from utils.embedding_cache import (
+    EMBEDDING_CACHE_PATH,
+    EmbeddingStore,
+    embedding_cache_key,
+)
 
 logger = logging.getLogger(__name__)
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 EMBEDDING_MODEL = "openai/text-embedding-3-small"
-EMBEDDING_DIMENSIONS = 1536
+# text-embedding-3 models can return shortened (Matryoshka) vectors: 512 dims
+# cuts storage and similarity cost 3x for a small recall loss. The asset and
+# entity vector columns are sized 1536, so lowering this needs a migration.
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "1536"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+MAX_EMBEDDING_BATCH_SIZE = 2048
+EMBEDDING_BATCH_TOKEN_BUDGET = 7800
+EMBEDDING_MAX_INPUT_TOKENS = 8000
+EMBEDDING_TOKENIZER_MODEL = "text-embedding-3-small"
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+EMBEDDING_RETRY_ATTEMPTS = 4
+EMBEDDING_RETRY_BASE_DELAY_SECONDS = 0.5
+EMBEDDING_RETRY_MAX_DELAY_SECONDS = 30.0
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_MAX_KEEPALIVE_CONNECTIONS = 32
+EMBEDDINGS_STRICT = os.getenv("EMBEDDINGS_STRICT", "").lower() in {"1", "true", "yes"}
+
+_EMBEDDINGS_ENABLED = bool(OPENROUTER_API_KEY)
+if not _EMBEDDINGS_ENABLED:
+    if EMBEDDINGS_STRICT:
+        raise RuntimeError("OPENROUTER_API_KEY must be set when EMBEDDINGS_STRICT is enabled")
+    logger.error("OPENROUTER_API_KEY not set, embedding generation is disabled")
+
+
+class EmbeddingCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class _EmbeddingLRU:
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, text: str) -> np.ndarray | None:
+        with self._lock:
+            embedding = self._entries.get(text)
+            if embedding is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._entries.move_to_end(text)
+            return embedding
+
+    def set(self, text: str, embedding: np.ndarray) -> None:
+        if self._maxsize <= 0:
+            return
+
+        embedding = embedding.view()
+        embedding.flags.writeable = False
+        with self._lock:
+            self._entries[text] = embedding
+            self._entries.move_to_end(text)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def info(self) -> EmbeddingCacheInfo:
+        with self._lock:
+            return EmbeddingCacheInfo(
+                self._hits, self._misses, self._maxsize, len(self._entries)
+            )
+
+
+_embedding_cache = _EmbeddingLRU(EMBEDDING_CACHE_SIZE)
+_embedding_store = EmbeddingStore(EMBEDDING_CACHE_PATH)
+
+
+def embedding_cache_info() -> EmbeddingCacheInfo:
+    return _embedding_cache.info()
+
+
+def embedding_cache_clear() -> None:
+    _embedding_cache.clear()
+
+
+_client: OpenAI | None = None
+_async_client: AsyncOpenAI | None = None
+_client_lock = threading.Lock()
 
 
 def _get_client() -> OpenAI:
-    return OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=OPENROUTER_API_KEY,
-    )
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenAI(
+                    base_url="https://openrouter.ai/api/v1",
+                    api_key=OPENROUTER_API_KEY,
+                    max_retries=0,
+                    http_client=DefaultHttpxClient(
+                        limits=httpx.Limits(
+                            max_keepalive_connections=EMBEDDING_MAX_KEEPALIVE_CONNECTIONS
+                        )
+                    ),
+                )
+    return _client
 
 
-def get_embedding(text: str) -> list[float] | None:
-    if not text or not text.strip():
-        logger.warning("Empty text provided for embedding generation")
-        return None
+def _get_async_client() -> AsyncOpenAI:
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                _async_client = AsyncOpenAI(
+                    base_url="https://openrouter.ai/api/v1",
+                    api_key=OPENROUTER_API_KEY,
+                    max_retries=0,
+                    http_client=DefaultAsyncHttpxClient(
+                        limits=httpx.Limits(
+                            max_keepalive_connections=EMBEDDING_MAX_KEEPALIVE_CONNECTIONS
+                        )
+                    ),
+                )
+    return _async_client
 
-    if not OPENROUTER_API_KEY:
-        logger.error("OPENROUTER_API_KEY not set, skipping embedding generation")
-        return None
 
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (RateLimitError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    base = EMBEDDING_RETRY_BASE_DELAY_SECONDS
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
     try:
-        client = _get_client()
-        response = client.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=text.strip(),
-        )
-        embedding = response.data[0].embedding
+        delay = float(headers.get("retry-after", ""))
+    except ValueError:
+        delay = base * 2**attempt
+    # Retry-After comes from the server; a huge or negative value must not
+    # stall a worker or make time.sleep raise.
+    delay = max(0.0, min(EMBEDDING_RETRY_MAX_DELAY_SECONDS, delay))
+    return delay + random.uniform(0, base)
+
+
+def _normalize(embedding: np.ndarray) -> np.ndarray:
+    # Unit-length vectors let similarity search use a plain inner product.
+    return embedding / (np.linalg.norm(embedding) + 1e-12)
+
+
+@functools.cache
+def _get_encoder():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(EMBEDDING_TOKENIZER_MODEL)
+    except Exception as e:
+        logger.warning(f"Falling back to estimated token counts: {e}")
+        return None
+
 
+def _count_tokens(text: str) -> int:
+    encoder = _get_encoder()
+    if encoder is None:
+        # Roughly four characters per token for English; err on the high side.
+        return len(text) // 3 + 1
+    return len(encoder.encode_ordinary(text))
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    encoder = _get_encoder()
+    if encoder is None:
+        return text[: max_tokens * 3]
+    return encoder.decode(encoder.encode_ordinary(text)[:max_tokens])
+
+
+def _decode_embedding(embedding: str | list[float]) -> np.ndarray:
+    if isinstance(embedding, str):
+        return np.frombuffer(base64.b64decode(embedding), dtype=np.float32)
+    # Some providers ignore encoding_format and still send a float list.
+    return np.asarray(embedding, dtype=np.float32)
+
+
+def _parse_embeddings(response, count: int) -> list[np.ndarray | None]:
+    embeddings: list[np.ndarray | None] = [None] * count
+    for position, item in enumerate(response.data):
+        embedding = _normalize(_decode_embedding(item.embedding))
         if len(embedding) != EMBEDDING_DIMENSIONS:
             logger.warning(
                 f"Unexpected embedding dimensions: {len(embedding)}, expected {EMBEDDING_DIMENSIONS}"
             )
+        embeddings[getattr(item, "index", position)] = embedding
+    return embeddings
 
-        return embedding
 
-    except Exception as e:
-        logger.error(f"Failed to generate embedding: {type(e).__name__}: {e}")
-        return None
+def _create_embeddings(client: OpenAI, texts: list[str]) -> list[np.ndarray | None]:
+    for attempt in range(EMBEDDING_RETRY_ATTEMPTS):
+        try:
+            response = client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=texts,
+                dimensions=EMBEDDING_DIMENSIONS,
+                encoding_format="base64",
+            )
+            break
+        except Exception as e:
+            if not _is_retryable(e) or attempt == EMBEDDING_RETRY_ATTEMPTS - 1:
+                raise
+            delay = _retry_delay(e, attempt)
+            logger.warning(
+                f"Embedding request failed ({type(e).__name__}), retrying in {delay:.2f}s"
+            )
+            time.sleep(delay)
+
+    return _parse_embeddings(response, len(texts))
 
 
-def get_query_embedding(query: str) -> list[float] | None:
+async def _acreate_embeddings(
+    client: AsyncOpenAI, texts: list[str]
+) -> list[np.ndarray | None]:
+    for attempt in range(EMBEDDING_RETRY_ATTEMPTS):
+        try:
+            response = await client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=texts,
+                dimensions=EMBEDDING_DIMENSIONS,
+                encoding_format="base64",
+            )
+            break
+        except Exception as e:
+            if not _is_retryable(e) or attempt == EMBEDDING_RETRY_ATTEMPTS - 1:
+                raise
+            delay = _retry_delay(e, attempt)
+            logger.warning(
+                f"Embedding request failed ({type(e).__name__}), retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+
+    return _parse_embeddings(response, len(texts))
+
+
+class _EmbeddingRequest:
+    def __init__(self, texts: list[str]):
+        self.results: list[np.ndarray | None] = [None] * len(texts)
+        self.texts_by_key: dict[str, list[int]] = {}
+        self.store_keys: dict[str, str] = {}
+        self.inputs: dict[str, str] = {}
+
+        skipped = 0
+        for index, text in enumerate(texts):
+            key = text.strip() if text else ""
+            if not key:
+                skipped += 1
+                continue
+
+            cached = _embedding_cache.get(key)
+            if cached is not None:
+                self.results[index] = cached.copy()
+            else:
+                self.texts_by_key.setdefault(key, []).append(index)
+
+        if skipped:
+            logger.warning(
+                f"Empty text provided for embedding generation ({skipped} skipped)"
+            )
+
+        if not self.texts_by_key:
+            return
+
+        self.store_keys = {
+            key: embedding_cache_key(EMBEDDING_MODEL, EMBEDDING_DIMENSIONS, key)
+            for key in self.texts_by_key
+        }
+        stored = _embedding_store.get_many(list(self.store_keys.values()))
+        for key, store_key in self.store_keys.items():
+            embedding = stored.get(store_key)
+            if embedding is None:
+                continue
+            _embedding_cache.set(key, embedding)
+            for index in self.texts_by_key.pop(key):
+                self.results[index] = embedding.copy()
+
+    def batches(self, batch_size: int) -> list[list[tuple[list[int], str]]]:
+        if not self.texts_by_key:
+            return []
+
+        if not _EMBEDDINGS_ENABLED:
+            return []
+
+        batch_size = max(1, min(batch_size, MAX_EMBEDDING_BATCH_SIZE))
+        batches: list[list[tuple[list[int], str]]] = []
+        batch: list[tuple[list[int], str]] = []
+        batch_tokens = 0
+        truncated = 0
+        for key, indices in self.texts_by_key.items():
+            tokens = _count_tokens(key)
+            if tokens > EMBEDDING_MAX_INPUT_TOKENS:
+                self.inputs[key] = _truncate_to_tokens(key, EMBEDDING_MAX_INPUT_TOKENS)
+                tokens = EMBEDDING_MAX_INPUT_TOKENS
+                truncated += 1
+            if batch and (
+                len(batch) >= batch_size
+                or batch_tokens + tokens > EMBEDDING_BATCH_TOKEN_BUDGET
+            ):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            batch.append((indices, key))
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+
+        if truncated:
+            logger.warning(
+                f"Truncated {truncated} embedding input(s) to {EMBEDDING_MAX_INPUT_TOKENS} tokens"
+            )
+        return batches
+
+    def batch_inputs(self, batch: list[tuple[list[int], str]]) -> list[str]:
+        return [self.inputs.get(key, key) for _, key in batch]
+
+    def scatter(
+        self,
+        batch: list[tuple[list[int], str]],
+        embeddings: list[np.ndarray | None],
+    ) -> None:
+        fresh = []
+        for (indices, text), embedding in zip(batch, embeddings):
+            if embedding is None:
+                continue
+            _embedding_cache.set(text, embedding)
+            fresh.append((self.store_keys[text], embedding))
+            for index in indices:
+                self.results[index] = embedding.copy()
+        _embedding_store.put_many(fresh)
+
+    def handle_failure(
+        self, batch: list[tuple[list[int], str]], error: Exception
+    ) -> list[list[tuple[list[int], str]]]:
+        # A rejected batch is usually one bad input; bisect to isolate it.
+        if isinstance(error, BadRequestError) and len(batch) > 1:
+            middle = len(batch) // 2
+            return [batch[:middle], batch[middle:]]
+
+        logger.error(
+            f"Failed to generate embeddings for batch of {len(batch)}: "
+            f"{type(error).__name__}: {error}"
+        )
+        return []
+
+
+def get_embeddings(
+    texts: list[str],
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    max_concurrent_batches: int = EMBEDDING_MAX_CONCURRENCY,
+) -> list[np.ndarray | None]:
+    request = _EmbeddingRequest(texts)
+    batches = request.batches(batch_size)
+    if not batches:
+        return request.results
+
+    client = _get_client()
+
+    if len(batches) == 1 or max_concurrent_batches <= 1:
+        while batches:
+            batch = batches.pop(0)
+            try:
+                request.scatter(
+                    batch, _create_embeddings(client, request.batch_inputs(batch))
+                )
+            except Exception as e:
+                batches[:0] = request.handle_failure(batch, e)
+        return request.results
+
+    with ThreadPoolExecutor(
+        max_workers=min(max_concurrent_batches, len(batches))
+    ) as executor:
+        futures: dict[Future, list[tuple[list[int], str]]] = {}
+
+        def submit(batch: list[tuple[list[int], str]]) -> None:
+            future = executor.submit(
+                _create_embeddings, client, request.batch_inputs(batch)
+            )
+            futures[future] = batch
+
+        for batch in batches:
+            submit(batch)
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = futures.pop(future)
+                try:
+                    request.scatter(batch, future.result())
+                except Exception as e:
+                    for half in request.handle_failure(batch, e):
+                        submit(half)
+
+    return request.results
+
+
+async def aget_embeddings(
+    texts: list[str],
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    max_concurrent_batches: int = EMBEDDING_MAX_CONCURRENCY,
+) -> list[np.ndarray | None]:
+    request = _EmbeddingRequest(texts)
+    batches = request.batches(batch_size)
+    if not batches:
+        return request.results
+
+    client = _get_async_client()
+    semaphore = asyncio.Semaphore(max(1, max_concurrent_batches))
+
+    async def run(batch: list[tuple[list[int], str]]) -> None:
+        async with semaphore:
+            try:
+                embeddings = await _acreate_embeddings(
+                    client, request.batch_inputs(batch)
+                )
+            except Exception as e:
+                halves = request.handle_failure(batch, e)
+            else:
+                request.scatter(batch, embeddings)
+                return
+        await asyncio.gather(*(run(half) for half in halves))
+
+    await asyncio.gather(*(run(batch) for batch in batches))
+    return request.results
+
+
+def get_embedding(text: str) -> np.ndarray | None:
+    return get_embeddings([text])[0]
+
+
+async def aget_embedding(text: str) -> np.ndarray | None:
+    return (await aget_embeddings([text]))[0]
+
+
+def get_query_embedding(query: str) -> np.ndarray | None:
     return get_embedding(query)
 
 
 def build_embedding_text(summary: str, tags: list[str] | None) -> str:
-    parts = []
+    return _embedding_text(summary or "", tuple(tags) if tags else ())
+
 
+@functools.lru_cache(maxsize=EMBEDDING_CACHE_SIZE)
+def _embedding_text(summary: str, tags: tuple[str, ...]) -> str:
+    parts = []
     if summary:
-        parts.append(f"Summary: {summary}")
+        parts.append("Summary: ")
+        parts.append(summary)
 
     if tags:
-        tags_str = ", ".join(tags)
-        parts.append(f"Tags: {tags_str}")
+        parts.append("\nTags: " if parts else "Tags: ")
+        parts.append(", ".join(tags))
 
-    return "\n".join(parts)
+    return "".join(parts)
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import functools
+import io
 import logging
 import math
+import shlex
+import tempfile
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, NamedTuple
 
 from models.timeline_models import (
     Clip,
@@ -23,8 +27,152 @@ from models.render_models import RenderPreset, VideoCodec
 
 logger = logging.getLogger(__name__)
 
+# Larger graphs go to a script file in the caller's script_dir so the command
+# stays well below ARG_MAX.
+FILTER_COMPLEX_SCRIPT_THRESHOLD = 8192
+
+_VIDEO_SEGMENT_TEMPLATE = "trim=start={start}:duration={duration}{timing}{scale}"
+
+_TRANSITION_MAP = {
+    TransitionType.SMPTE_DISSOLVE.value: "dissolve",
+    TransitionType.FADE_IN.value: "fade",
+    TransitionType.FADE_OUT.value: "fade",
+    TransitionType.WIPE.value: "wipeleft",
+    TransitionType.SLIDE.value: "slideleft",
+    TransitionType.CUSTOM.value: "dissolve",
+}
+
+_XFADE_TRANSITIONS = frozenset(
+    {
+        "custom",
+        "fade",
+        "wipeleft",
+        "wiperight",
+        "wipeup",
+        "wipedown",
+        "slideleft",
+        "slideright",
+        "slideup",
+        "slidedown",
+        "circlecrop",
+        "rectcrop",
+        "distance",
+        "fadeblack",
+        "fadewhite",
+        "radial",
+        "smoothleft",
+        "smoothright",
+        "smoothup",
+        "smoothdown",
+        "circleopen",
+        "circleclose",
+        "vertopen",
+        "vertclose",
+        "horzopen",
+        "horzclose",
+        "dissolve",
+        "pixelize",
+        "diagtl",
+        "diagtr",
+        "diagbl",
+        "diagbr",
+        "hlslice",
+        "hrslice",
+        "vuslice",
+        "vdslice",
+        "hblur",
+        "fadegrays",
+        "wipetl",
+        "wipetr",
+        "wipebl",
+        "wipebr",
+        "squeezeh",
+        "squeezev",
+        "zoomin",
+        "fadefast",
+        "fadeslow",
+        "hlwind",
+        "hrwind",
+        "vuwind",
+        "vdwind",
+        "coverleft",
+        "coverright",
+        "coverup",
+        "coverdown",
+        "revealleft",
+        "revealright",
+        "revealup",
+        "revealdown",
+    }
+)
 
-@dataclass
+_VIDEO_ENCODERS = {
+    VideoCodec.H264: "libx264",
+    VideoCodec.H265: "libx265",
+    VideoCodec.PRORES: "prores_ks",
+    VideoCodec.VP9: "libvpx-vp9",
+    VideoCodec.AV1: "libsvtav1",
+}
+
+_NVENC_ENCODERS = {
+    VideoCodec.H264: "h264_nvenc",
+    VideoCodec.H265: "hevc_nvenc",
+}
+
+# Fixed per-encoder flags; everything except ProRes is followed by -g <gop>.
+_ENCODER_TUNING: dict[str, tuple[str, ...]] = {
+    "libx264": ("-profile:v", "high"),
+    "libx265": ("-x265-params", "aq-mode=3:aq-strength=1.0:qcomp=0.7"),
+    "prores_ks": ("-profile:v", "3", "-vendor", "apl0", "-bits_per_mb", "8000"),
+    "libvpx-vp9": (
+        "-quality",
+        "good",
+        "-row-mt",
+        "1",
+        "-tile-columns",
+        "2",
+        "-frame-parallel",
+        "1",
+        "-auto-alt-ref",
+        "1",
+        "-lag-in-frames",
+        "25",
+    ),
+    "libsvtav1": ("-svtav1-params", "tune=0:enable-qm=1:qm-min=0:qm-max=8"),
+}
+
+_AUDIO_ENCODER_OPTIONS: dict[str, tuple[str, ...]] = {
+    "aac": ("-c:a", "aac", "-profile:a", "aac_low"),
+    "mp3": ("-c:a", "libmp3lame"),
+    "opus": ("-c:a", "libopus", "-vbr", "on", "-compression_level", "10"),
+}
+
+_NVENC_PRESET_MAP = {
+    "ultrafast": "fast",
+    "superfast": "fast",
+    "veryfast": "fast",
+    "faster": "fast",
+    "fast": "fast",
+    "medium": "medium",
+    "slow": "slow",
+    "slower": "slow",
+    "veryslow": "slow",
+}
+
+_VP9_CPU_USED_MAP = {
+    "ultrafast": 8,
+    "superfast": 7,
+    "veryfast": 6,
+    "faster": 5,
+    "fast": 4,
+    "medium": 3,
+    "slow": 2,
+    "slower": 1,
+    "veryslow": 0,
+}
+
+
+@dataclass(slots=True)
 class InputFile:
     index: int
     asset_id: str
@@ -32,13 +180,13 @@ class InputFile:
     duration: float | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class FilterNode:
     name: str
     filter_expr: str
 
 
-@dataclass
+@dataclass(slots=True)
 class TrackSegment:
     start_time: float
     duration: float
@@ -54,7 +202,7 @@ class TrackSegment:
     transparent: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class TransitionInfo:
     position: int
     transition_type: TransitionType
@@ -63,7 +211,7 @@ class TransitionInfo:
     out_offset: float
 
 
-@dataclass
+@dataclass(slots=True)
 class FFmpegCommand:
     inputs: list[str]
     filter_complex: str
@@ -72,6 +220,122 @@ class FFmpegCommand:
     output_file: str
 
 
+class _OutputOptionsKey(NamedTuple):
+    codec: VideoCodec
+    container: str
+    use_gpu: bool
+    crf: int | None
+    bitrate: str | None
+    preset: str
+    pixel_format: str
+    color_space: str
+    color_primaries: str
+    color_trc: str
+    audio_codec: str
+    audio_bitrate: str
+    sample_rate: int
+    channels: int
+    gop_size: int
+
+
+@functools.lru_cache(maxsize=32)
+def _output_options_for(key: _OutputOptionsKey) -> tuple[str, ...]:
+    codec = key.codec
+    container = key.container
+    use_gpu = key.use_gpu and codec in _NVENC_ENCODERS
+    video_encoder = (_NVENC_ENCODERS if use_gpu else _VIDEO_ENCODERS).get(codec)
+    if not video_encoder:
+        raise ValueError(f"Unsupported codec configuration: {codec}")
+
+    options = ["-c:v", video_encoder]
+
+    if key.crf is not None:
+        if use_gpu:
+            options += ["-cq", str(key.crf)]
+        elif video_encoder == "libvpx-vp9":
+            options += ["-crf", str(key.crf), "-b:v", "0"]
+        elif video_encoder != "prores_ks":
+            options += ["-crf", str(key.crf)]
+
+    if key.bitrate:
+        options += ["-b:v", key.bitrate]
+
+    if use_gpu:
+        options += ["-preset", _NVENC_PRESET_MAP.get(key.preset, "medium")]
+    elif video_encoder in {"libx264", "libx265"}:
+        options += ["-preset", key.preset]
+    elif video_encoder == "libvpx-vp9":
+        options += ["-cpu-used", str(_VP9_CPU_USED_MAP.get(key.preset, 3))]
+    elif video_encoder == "libsvtav1":
+        options += ["-preset", "6"]
+
+    options += _ENCODER_TUNING.get(video_encoder, ())
+    if video_encoder != "prores_ks":
+        options += ["-g", str(key.gop_size)]
+    if video_encoder == "libx265" and container in {"mp4", "mov"}:
+        options += ["-tag:v", "hvc1"]
+
+    pixel_format = key.pixel_format
+    if codec == VideoCodec.PRORES:
+        pixel_format = "yuv422p10le"
+    elif codec in {VideoCodec.H265, VideoCodec.AV1} and pixel_format == "yuv420p":
+        pixel_format = "yuv420p10le"
+    options += ["-pix_fmt", pixel_format]
+
+    if key.color_space:
+        options += ["-colorspace", key.color_space]
+    if key.color_primaries:
+        options += ["-color_primaries", key.color_primaries]
+    if key.color_trc:
+        options += ["-color_trc", key.color_trc]
+
+    audio_codec = key.audio_codec
+    if container == "webm" and audio_codec not in {"opus", "vorbis"}:
+        audio_codec = "opus"
+    options += _AUDIO_ENCODER_OPTIONS.get(audio_codec, ())
+
+    audio_bitrate = key.audio_bitrate
+    if audio_codec == "opus" and (not audio_bitrate or not str(audio_bitrate).strip()):
+        audio_bitrate = "160k"
+    options += [
+        "-b:a",
+        audio_bitrate,
+        "-ar",
+        str(key.sample_rate),
+        "-ac",
+        str(key.channels),
+    ]
+
+    if container in {"mp4", "mov"}:
+        options += ["-movflags", "+faststart"]
+
+    return tuple(options)
+
+
+def _segment_chain_key(segment: TrackSegment) -> tuple[float, float, float, bool]:
+    # Everything a source segment's trim/timing chain depends on besides the
+    # per-build scale/pad fragment. Matching segments share the chain text but
+    # still get their own labels, since a filtergraph label is consumed once.
+    return (
+        segment.source_start,
+        segment.source_duration,
+        segment.speed_factor,
+        segment.is_freeze,
+    )
+
+
+_LABEL_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _b36(n: int) -> str:
+    digits = ""
+    while True:
+        n, rem = divmod(n, 36)
+        digits = _LABEL_DIGITS[rem] + digits
+        if not n:
+            return digits
+
+
 class TimelineToFFmpeg:
     def __init__(
         self,
@@ -86,35 +350,86 @@ class TimelineToFFmpeg:
         self.output_path = output_path
 
         self._inputs: list[InputFile] = []
-        self._input_index_map: dict[str, int] = {}
+        # Keyed by the reference's asset id as-is, so repeat references skip
+        # the str() needed to look the asset up in asset_map.
+        self._input_index_map: dict[Any, int] = {}
+        self._path_index_map: dict[str, int] = {}
         self._filter_counter = 0
-        self._video_filters: list[str] = []
-        self._audio_filters: list[str] = []
+        self._filter_buf = io.StringIO()
+        self._clips: list[Clip] = []
+        self._video_tracks: list[Track] = []
+        self._audio_tracks: list[Track] = []
+        self._track_data_cache: dict[
+            tuple[int, bool, bool], tuple[list[TrackSegment], list[TransitionInfo]]
+        ] = {}
+        self._video_track_segments: dict[int, list[TrackSegment]] = {}
+        self._chain_cache: dict[tuple[Any, ...], str] = {}
+        self._scale_pad_filter = ""
+        self._canvas_width = preset.video.width or 1920
+        self._canvas_height = preset.video.height or 1080
+        self._generator_framerate = preset.video.framerate or 24
+        self._timeline_framerate = self._resolve_timeline_framerate()
 
     def build(self) -> FFmpegCommand:
         self._inputs = []
         self._input_index_map = {}
+        self._path_index_map = {}
         self._filter_counter = 0
-        self._video_filters = []
-        self._audio_filters = []
-
-        self._collect_inputs()
-
-        video_out = self._build_video_graph()
-        audio_out = self._build_audio_graph()
+        self._filter_buf = io.StringIO()
+        self._clips = self.timeline.find_clips()
+        self._video_tracks = self.timeline.video_tracks
+        self._audio_tracks = self.timeline.audio_tracks
+        self._track_data_cache = {}
+        self._video_track_segments = {}
+        self._chain_cache = {}
+
+        width = self.preset.video.width
+        height = self.preset.video.height
+        self._canvas_width = width or 1920
+        self._canvas_height = height or 1080
+        self._generator_framerate = self.preset.video.framerate or 24
+        self._timeline_framerate = self._resolve_timeline_framerate()
+        self._scale_pad_filter = (
+            f",scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+            if width and height
+            else ""
+        )
 
-        filter_complex = self._combine_filters()
+        self._collect_inputs(self._clips)
 
         output_options = self._build_output_options()
 
-        output_maps = []
-        if video_out:
-            output_maps.append(f"[{video_out}]")
-        if audio_out:
-            output_maps.append(f"[{audio_out}]")
+        input_seek = 0.0
+        passthrough_range = self._passthrough_range()
+        if passthrough_range is not None:
+            input_seek, passthrough_duration = passthrough_range
+            filter_complex = ""
+            output_maps = ["0:v:0", "0:a:0"]
+            output_options.extend(["-t", str(passthrough_duration)])
+        else:
+            video_out = self._build_video_graph(self._video_tracks)
+            audio_out = self._build_audio_graph(self._audio_tracks, self._video_tracks)
+
+            filter_complex = self._combine_filters()
+
+            output_maps = []
+            if video_out:
+                output_maps.append(f"[{video_out}]")
+            if audio_out:
+                output_maps.append(f"[{audio_out}]")
+
+        decode_options = self._input_decode_options()
+        if input_seek:
+            decode_options += ["-ss", str(input_seek)]
+        inputs: list[str] = []
+        for inp in self._inputs:
+            inputs.extend(decode_options)
+            inputs.append("-i")
+            inputs.append(inp.file_path)
 
         return FFmpegCommand(
-            inputs=[f"-i {inp.file_path}" for inp in self._inputs],
+            inputs=inputs,
             filter_complex=filter_complex,
             output_maps=output_maps,
             output_options=output_options,
@@ -126,10 +441,13 @@ class TimelineToFFmpeg:
     ) -> float | None:
         if value is None:
             return None
-        try:
+        if isinstance(value, (int, float)):
             numeric = float(value)
-        except (TypeError, ValueError):
-            return None
+        else:
+            try:
+                numeric = float(value)
+            except (TypeError, ValueError):
+                return None
         if 0.0 <= numeric <= 1.0:
             return numeric * max_value
         return numeric
@@ -139,10 +457,13 @@ class TimelineToFFmpeg:
     ) -> float:
         if value is None:
             return default
-        try:
+        if isinstance(value, (int, float)):
             numeric = float(value)
-        except (TypeError, ValueError):
-            return default
+        else:
+            try:
+                numeric = float(value)
+            except (TypeError, ValueError):
+                return default
         if 0.0 <= numeric <= 1.0:
             ratio = numeric
         elif max_value > 0:
@@ -151,47 +472,100 @@ class TimelineToFFmpeg:
             ratio = default
         return max(0.0, min(1.0, ratio))
 
-    def build_command_string(self) -> str:
-        cmd = self.build()
+    def _input_decode_options(self) -> list[str]:
+        # Decode on the GPU when NVENC encodes; frames come back to system
+        # memory so the CPU filter graph still applies.
+        if not self.preset.use_gpu or self.preset.video.codec not in _NVENC_ENCODERS:
+            return []
+        return ["-hwaccel", "cuda"]
+
+    def _passthrough_range(self) -> tuple[float, float] | None:
+        # A lone clip with nothing to scale or filter can be mapped straight
+        # from its input; the trim becomes an input seek plus an output -t.
+        if self._audio_tracks or len(self._video_tracks) != 1:
+            return None
+        if self._scale_pad_filter or len(self._inputs) != 1:
+            return None
 
-        parts = ["ffmpeg", "-y"]
+        children = self._video_tracks[0].children
+        if len(children) != 1 or type(children[0]) is not Clip:
+            return None
 
-        for inp in cmd.inputs:
-            parts.append(inp)
+        clip = children[0]
+        if type(clip.media_reference) is not ExternalReference or clip.effects:
+            return None
 
-        if cmd.filter_complex:
-            filter_escaped = cmd.filter_complex.replace("'", "'\\''")
-            parts.append(f"-filter_complex '{filter_escaped}'")
+        return (
+            clip.source_range.start_time.to_seconds(),
+            clip.source_range.duration.to_seconds(),
+        )
+
+    def build_command_string(self, script_dir: str | None = None) -> str:
+        cmd = self.build()
+
+        parts = ["ffmpeg", "-y", *cmd.inputs]
+
+        if script_dir and len(cmd.filter_complex) > FILTER_COMPLEX_SCRIPT_THRESHOLD:
+            # Lives in the caller's script_dir, which is removed after the run.
+            with tempfile.NamedTemporaryFile(
+                mode="w",
+                suffix=".txt",
+                prefix="filter_complex_",
+                dir=script_dir,
+                delete=False,
+            ) as script:
+                script.write(cmd.filter_complex)
+            parts.append("-filter_complex_script")
+            parts.append(script.name)
+        elif cmd.filter_complex:
+            parts.append("-filter_complex")
+            parts.append(cmd.filter_complex)
 
         for m in cmd.output_maps:
-            parts.append(f"-map {m}")
+            parts.append("-map")
+            parts.append(m)
 
         parts.extend(cmd.output_options)
+        parts.append(cmd.output_file)
 
-        parts.append(f'"{cmd.output_file}"')
+        return shlex.join(parts)
 
-        return " ".join(parts)
+    def _collect_inputs(self, clips: list[Clip] | None = None) -> None:
+        if clips is None:
+            clips = self.timeline.find_clips()
 
-    def _collect_inputs(self) -> None:
-        clips = self.timeline.find_clips()
+        inputs = self._inputs
+        input_index_map = self._input_index_map
+        path_index_map = self._path_index_map
+        asset_map = self.asset_map
 
         for clip in clips:
-            if isinstance(clip.media_reference, ExternalReference):
-                asset_id = str(clip.media_reference.asset_id)
-                if asset_id not in self._input_index_map:
-                    if asset_id in self.asset_map:
-                        input_file = InputFile(
-                            index=len(self._inputs),
-                            asset_id=asset_id,
-                            file_path=self.asset_map[asset_id],
-                        )
-                        self._inputs.append(input_file)
-                        self._input_index_map[asset_id] = input_file.index
-                    else:
-                        logger.warning(f"Asset {asset_id} not found in asset_map")
-
-    def _build_video_graph(self) -> str | None:
-        video_tracks = self.timeline.video_tracks
+            reference = clip.media_reference
+            if type(reference) is not ExternalReference:
+                continue
+
+            asset_key = reference.asset_id
+            if asset_key in input_index_map:
+                continue
+
+            asset_id = str(asset_key)
+            file_path = asset_map.get(asset_id)
+            if file_path is None:
+                logger.warning(f"Asset {asset_id} not found in asset_map")
+                continue
+
+            # Re-imported media can reach us under several asset ids; decode
+            # each file once and point every id at the same input.
+            if file_path in path_index_map:
+                input_index_map[asset_key] = path_index_map[file_path]
+                continue
+
+            input_index_map[asset_key] = path_index_map[file_path] = len(inputs)
+            inputs.append(
+                InputFile(index=len(inputs), asset_id=asset_id, file_path=file_path)
+            )
+
+    def _build_video_graph(self, video_tracks: list[Track]) -> str | None:
         if not video_tracks:
             return None
 
@@ -200,13 +574,15 @@ class TimelineToFFmpeg:
             track_name = (track.name or "").lower()
             align_generator_start = track_name == "captions"
             transparent_gaps = track_idx > 0
-            segments = self._extract_track_segments(
+            segments, transitions = self._extract_track_data(
                 track,
                 align_generator_start=align_generator_start,
                 transparent_gaps=transparent_gaps,
             )
-            transitions = self._extract_transitions(track)
-            duration = sum(seg.duration for seg in segments)
+            self._video_track_segments[track_idx] = segments
+            # Segments are laid end to end on the extraction cursor, so the
+            # last one ends exactly where the running sum would.
+            duration = segments[-1].start_time + segments[-1].duration if segments else 0.0
             track_data.append((track_idx, track, segments, transitions, duration))
 
         if not track_data:
@@ -219,7 +595,7 @@ class TimelineToFFmpeg:
         for track_idx, track, segments, transitions, duration in track_data:
             if track_idx > 0 and target_duration > duration:
                 pad_duration = target_duration - duration
-                segments.append(
+                segments = segments + [
                     TrackSegment(
                         start_time=duration,
                         duration=pad_duration,
@@ -229,7 +605,7 @@ class TimelineToFFmpeg:
                         is_gap=True,
                         transparent=True,
                     )
-                )
+                ]
             track_out = self._process_video_track_from_segments(
                 segments, transitions, track_idx
             )
@@ -244,12 +620,12 @@ class TimelineToFFmpeg:
         else:
             return self._overlay_video_tracks(track_outputs)
 
-    def _build_audio_graph(self) -> str | None:
-        audio_tracks = self.timeline.audio_tracks
+    def _build_audio_graph(
+        self, audio_tracks: list[Track], video_tracks: list[Track]
+    ) -> str | None:
         if not audio_tracks:
-            video_tracks = self.timeline.video_tracks
             if video_tracks:
-                return self._extract_audio_from_video()
+                return self._extract_audio_from_video(video_tracks)
             return None
 
         track_outputs: list[str] = []
@@ -268,8 +644,7 @@ class TimelineToFFmpeg:
             return self._mix_audio_tracks(track_outputs)
 
     def _process_video_track(self, track: Track, track_idx: int) -> str | None:
-        segments = self._extract_track_segments(track)
-        transitions = self._extract_transitions(track)
+        segments, transitions = self._extract_track_data(track)
         return self._process_video_track_from_segments(segments, transitions, track_idx)
 
     def _process_video_track_from_segments(
@@ -284,8 +659,8 @@ class TimelineToFFmpeg:
         segment_outputs: list[str] = []
         segment_durations: list[float] = []
 
-        for seg_idx, segment in enumerate(segments):
-            seg_out = self._process_video_segment(segment, track_idx, seg_idx)
+        for segment in segments:
+            seg_out = self._process_video_segment(segment)
             if seg_out:
                 segment_outputs.append(seg_out)
                 segment_durations.append(segment.duration)
@@ -302,8 +677,7 @@ class TimelineToFFmpeg:
         return self._concat_video_segments(segment_outputs)
 
     def _process_audio_track(self, track: Track, track_idx: int) -> str | None:
-        segments = self._extract_track_segments(track)
-        transitions = self._extract_transitions(track)
+        segments, transitions = self._extract_track_data(track)
 
         if not segments:
             return None
@@ -311,8 +685,8 @@ class TimelineToFFmpeg:
         segment_outputs: list[str] = []
         segment_durations: list[float] = []
 
-        for seg_idx, segment in enumerate(segments):
-            seg_out = self._process_audio_segment(segment, track_idx, seg_idx)
+        for segment in segments:
+            seg_out = self._process_audio_segment(segment)
             if seg_out:
                 segment_outputs.append(seg_out)
                 segment_durations.append(segment.duration)
@@ -335,69 +709,125 @@ class TimelineToFFmpeg:
         align_generator_start: bool = False,
         transparent_gaps: bool = False,
     ) -> list[TrackSegment]:
+        return self._extract_track_data(
+            track, align_generator_start, transparent_gaps
+        )[0]
+
+    def _extract_track_data(
+        self,
+        track: Track,
+        align_generator_start: bool = False,
+        transparent_gaps: bool = False,
+    ) -> tuple[list[TrackSegment], list[TransitionInfo]]:
+        key = (id(track), align_generator_start, transparent_gaps)
+        cached = self._track_data_cache.get(key)
+        if cached is not None:
+            return cached
+
         segments: list[TrackSegment] = []
+        transitions: list[TransitionInfo] = []
         current_time = 0.0
+        position = 0
 
         for child in track.children:
-            if isinstance(child, Transition):
+            child_type = type(child)
+            if child_type is Transition:
+                # Transition.duration builds a new RationalTime; summing the
+                # offsets in seconds gives the same value without it.
+                in_offset = child.in_offset.to_seconds()
+                out_offset = child.out_offset.to_seconds()
+                transitions.append(
+                    TransitionInfo(
+                        position=position,
+                        transition_type=child.transition_type,
+                        duration=in_offset + out_offset,
+                        in_offset=in_offset,
+                        out_offset=out_offset,
+                    )
+                )
                 continue
 
-            elif isinstance(child, Clip):
-                is_generator = isinstance(child.media_reference, GeneratorReference)
-                if is_generator and align_generator_start:
-                    start_time = child.source_range.start_time.to_seconds()
-                    if start_time > current_time:
-                        gap_duration = start_time - current_time
-                        segments.append(
-                            TrackSegment(
-                                start_time=current_time,
-                                duration=gap_duration,
-                                source_start=0,
-                                source_duration=gap_duration,
-                                input_index=None,
-                                is_gap=True,
-                                transparent=transparent_gaps,
-                            )
-                        )
-                        current_time += gap_duration
-
-                segment = self._clip_to_segment(
-                    child, current_time, transparent_gaps=transparent_gaps
+            position += 1
+            handler = _CHILD_HANDLERS.get(child_type)
+            if handler is not None:
+                current_time = handler(
+                    self,
+                    child,
+                    segments,
+                    current_time,
+                    align_generator_start,
+                    transparent_gaps,
                 )
-                segments.append(segment)
-                current_time += segment.duration
 
-            elif isinstance(child, Gap):
-                duration = child.source_range.duration.to_seconds()
-                segments.append(
-                    TrackSegment(
-                        start_time=current_time,
-                        duration=duration,
-                        source_start=0,
-                        source_duration=duration,
-                        input_index=None,
-                        is_gap=True,
-                        transparent=transparent_gaps,
-                    )
-                )
-                current_time += duration
+        self._track_data_cache[key] = (segments, transitions)
+        return segments, transitions
 
-            elif isinstance(child, Stack):
-                stack_duration = child.duration().to_seconds()
+    def _append_clip_segment(
+        self,
+        clip: Clip,
+        segments: list[TrackSegment],
+        current_time: float,
+        align_generator_start: bool,
+        transparent_gaps: bool,
+    ) -> float:
+        if align_generator_start and type(clip.media_reference) is GeneratorReference:
+            start_time = clip.source_range.start_time.to_seconds()
+            if start_time > current_time:
+                gap_duration = start_time - current_time
                 segments.append(
-                    TrackSegment(
-                        start_time=current_time,
-                        duration=stack_duration,
-                        source_start=0,
-                        source_duration=stack_duration,
-                        input_index=None,
-                        is_gap=True,
-                        transparent=transparent_gaps,
-                    )
+                    self._blank_segment(current_time, gap_duration, transparent_gaps)
                 )
-                current_time += stack_duration
+                current_time += gap_duration
 
-        return segments
+        segment = self._clip_to_segment(
+            clip, current_time, transparent_gaps=transparent_gaps
+        )
+        segments.append(segment)
+        return current_time + segment.duration
+
+    def _append_gap_segment(
+        self,
+        gap: Gap,
+        segments: list[TrackSegment],
+        current_time: float,
+        align_generator_start: bool,
+        transparent_gaps: bool,
+    ) -> float:
+        duration = gap.source_range.duration.to_seconds()
+        segments.append(self._blank_segment(current_time, duration, transparent_gaps))
+        return current_time + duration
+
+    def _append_stack_segment(
+        self,
+        stack: Stack,
+        segments: list[TrackSegment],
+        current_time: float,
+        align_generator_start: bool,
+        transparent_gaps: bool,
+    ) -> float:
+        # Stack.duration() walks every nested track even when a trim makes
+        # the result known up front.
+        source_range = stack.source_range
+        duration = (
+            source_range.duration.to_seconds()
+            if source_range is not None
+            else stack.duration().to_seconds()
+        )
+        segments.append(self._blank_segment(current_time, duration, transparent_gaps))
+        return current_time + duration
+
+    def _blank_segment(
+        self, start_time: float, duration: float, transparent: bool
+    ) -> TrackSegment:
+        return TrackSegment(
+            start_time=start_time,
+            duration=duration,
+            source_start=0,
+            source_duration=duration,
+            input_index=None,
+            is_gap=True,
+            transparent=transparent,
+        )
 
     def _clip_to_segment(
         self, clip: Clip, timeline_start: float, transparent_gaps: bool = False
@@ -411,32 +841,26 @@ class TimelineToFFmpeg:
         speed_factor = 1.0
         is_freeze = False
 
-        if isinstance(clip.media_reference, ExternalReference):
-            asset_id = str(clip.media_reference.asset_id)
-            input_index = self._input_index_map.get(asset_id)
-        elif isinstance(clip.media_reference, GeneratorReference):
+        reference = clip.media_reference
+        reference_type = type(reference)
+        if reference_type is ExternalReference:
+            input_index = self._input_index_map.get(reference.asset_id)
+        elif reference_type is GeneratorReference:
             is_generator = True
             generator_params = {
-                "kind": clip.media_reference.generator_kind,
-                "params": clip.media_reference.parameters,
+                "kind": reference.generator_kind,
+                "params": reference.parameters,
             }
-        elif isinstance(clip.media_reference, MissingReference):
-            return TrackSegment(
-                start_time=timeline_start,
-                duration=source_duration,
-                source_start=0,
-                source_duration=source_duration,
-                input_index=None,
-                is_gap=True,
-                transparent=transparent_gaps,
-            )
+        elif reference_type is MissingReference:
+            return self._blank_segment(timeline_start, source_duration, transparent_gaps)
 
         effects_data: list[dict[str, Any]] = []
         for effect in clip.effects:
-            if isinstance(effect, LinearTimeWarp):
+            effect_class = type(effect)
+            if effect_class is LinearTimeWarp:
                 speed_factor = effect.time_scalar
                 effects_data.append({"type": "speed", "factor": speed_factor})
-            elif isinstance(effect, FreezeFrame):
+            elif effect_class is FreezeFrame:
                 is_freeze = True
                 effects_data.append({"type": "freeze"})
             else:
@@ -449,9 +873,10 @@ class TimelineToFFmpeg:
                     }
                 )
 
-        timeline_duration = (
-            source_duration / speed_factor if speed_factor != 0 else source_duration
-        )
+        if speed_factor == 1.0 or speed_factor == 0:
+            timeline_duration = source_duration
+        else:
+            timeline_duration = source_duration / speed_factor
 
         return TrackSegment(
             start_time=timeline_start,
@@ -468,30 +893,8 @@ class TimelineToFFmpeg:
             transparent=False,
         )
 
-    def _extract_transitions(self, track: Track) -> list[TransitionInfo]:
-        transitions: list[TransitionInfo] = []
-        position = 0
-
-        for child in track.children:
-            if isinstance(child, Transition):
-                transitions.append(
-                    TransitionInfo(
-                        position=position,
-                        transition_type=child.transition_type,
-                        duration=child.duration.to_seconds(),
-                        in_offset=child.in_offset.to_seconds(),
-                        out_offset=child.out_offset.to_seconds(),
-                    )
-                )
-            elif not isinstance(child, Transition):
-                position += 1
-
-        return transitions
-
-    def _process_video_segment(
-        self, segment: TrackSegment, track_idx: int, seg_idx: int
-    ) -> str | None:
-        base_label = f"v{track_idx}_{seg_idx}"
+    def _process_video_segment(self, segment: TrackSegment) -> str | None:
+        base_label = self._label("v")
 
         if segment.is_gap:
             return self._generate_gap_video(segment, base_label)
@@ -502,51 +905,17 @@ class TimelineToFFmpeg:
         if segment.input_index is None:
             return None
 
-        filters: list[str] = []
-        input_label = f"{segment.input_index}:v"
-
-        trim_filter = (
-            f"trim=start={segment.source_start}:duration={segment.source_duration}"
-        )
-        filters.append(trim_filter)
-
-        filters.append("setpts=PTS-STARTPTS")
-
-        if segment.is_freeze:
-            framerate = self.preset.video.framerate or self.timeline.metadata.get(
-                "default_rate", 24.0
-            )
-            try:
-                framerate = float(framerate)
-            except (TypeError, ValueError):
-                framerate = 24.0
-            frame_duration = 1.0 / framerate if framerate > 0 else 0.0
-            stop_duration = max(0.0, segment.duration - frame_duration)
-            filters.append("select='eq(n,0)'")
-            if stop_duration > 0:
-                filters.append(
-                    f"tpad=stop_mode=clone:stop_duration={stop_duration}"
-                )
-        elif segment.speed_factor != 1.0:
-            pts_factor = 1.0 / segment.speed_factor
-            filters.append(f"setpts={pts_factor}*PTS")
-
-        if self.preset.video.width and self.preset.video.height:
-            filters.append(
-                f"scale={self.preset.video.width}:{self.preset.video.height}:force_original_aspect_ratio=decrease,"
-                f"pad={self.preset.video.width}:{self.preset.video.height}:(ow-iw)/2:(oh-ih)/2"
-            )
-            filters.append("setsar=1")
-
-        filter_chain = ",".join(filters)
-        self._video_filters.append(f"[{input_label}]{filter_chain}[{base_label}]")
+        key = ("video", *_segment_chain_key(segment))
+        chain = self._chain_cache.get(key)
+        if chain is None:
+            chain = self._video_segment_chain(segment)
+            self._chain_cache[key] = chain
+        self._emit_filter(f"[{segment.input_index}:v]{chain}[{base_label}]")
 
         return self._apply_video_effects(base_label, segment)
 
-    def _process_audio_segment(
-        self, segment: TrackSegment, track_idx: int, seg_idx: int
-    ) -> str | None:
-        label = f"a{track_idx}_{seg_idx}"
+    def _process_audio_segment(self, segment: TrackSegment) -> str | None:
+        label = self._label("a")
 
         if segment.is_gap or segment.is_generator:
             return self._generate_gap_audio(segment, label)
@@ -554,78 +923,103 @@ class TimelineToFFmpeg:
         if segment.input_index is None:
             return None
 
-        filters: list[str] = []
-        input_label = f"{segment.input_index}:a"
-
-        trim_filter = (
-            f"atrim=start={segment.source_start}:duration={segment.source_duration}"
-        )
-        filters.append(trim_filter)
+        key = ("audio", *_segment_chain_key(segment))
+        chain = self._chain_cache.get(key)
+        if chain is None:
+            chain = self._audio_segment_chain(segment)
+            self._chain_cache[key] = chain
+        self._emit_filter(f"[{segment.input_index}:a]{chain}[{label}]")
 
-        filters.append("asetpts=PTS-STARTPTS")
+        return self._apply_audio_effects(label, segment)
 
+    def _video_segment_chain(self, segment: TrackSegment) -> str:
         if segment.is_freeze:
-            pass
+            framerate = self._timeline_framerate
+            frame_duration = 1.0 / framerate if framerate > 0 else 0.0
+            stop_duration = max(0.0, segment.duration - frame_duration)
+            timing = ",setpts=PTS-STARTPTS,select='eq(n,0)'"
+            if stop_duration > 0:
+                timing += f",tpad=stop_mode=clone:stop_duration={stop_duration}"
         elif segment.speed_factor != 1.0:
-            tempo = segment.speed_factor
-            tempo_filters = self._build_atempo_chain(tempo)
-            filters.extend(tempo_filters)
+            timing = f",setpts={1.0 / segment.speed_factor}*(PTS-STARTPTS)"
+        else:
+            timing = ",setpts=PTS-STARTPTS"
 
-        filter_chain = ",".join(filters)
-        self._audio_filters.append(f"[{input_label}]{filter_chain}[{label}]")
+        return _VIDEO_SEGMENT_TEMPLATE.format(
+            start=segment.source_start,
+            duration=segment.source_duration,
+            timing=timing,
+            scale=self._scale_pad_filter,
+        )
 
-        return self._apply_audio_effects(label, segment)
+    def _audio_segment_chain(self, segment: TrackSegment) -> str:
+        filters = [
+            f"atrim=start={segment.source_start}:duration={segment.source_duration}"
+        ]
 
-    def _build_atempo_chain(self, tempo: float) -> list[str]:
-        filters: list[str] = []
+        filters.append("asetpts=PTS-STARTPTS")
 
-        while tempo < 0.5 or tempo > 2.0:
-            if tempo < 0.5:
-                filters.append("atempo=0.5")
-                tempo /= 0.5
-            elif tempo > 2.0:
-                filters.append("atempo=2.0")
-                tempo /= 2.0
+        if not segment.is_freeze and segment.speed_factor != 1.0:
+            filters.extend(self._build_atempo_chain(segment.speed_factor))
 
-        if tempo != 1.0:
+        return ",".join(filters)
+
+    def _build_atempo_chain(self, tempo: float) -> list[str]:
+        if tempo <= 0:
+            raise ValueError(f"Unsupported audio tempo: {tempo}")
+
+        if tempo > 2.0:
+            steps = math.ceil(math.log2(tempo / 2.0))
+            filters = ["atempo=2.0"] * steps
+            tempo /= 2.0**steps
+        elif tempo < 0.5:
+            steps = math.ceil(math.log2(0.5 / tempo))
+            filters = ["atempo=0.5"] * steps
+            tempo *= 2.0**steps
+        else:
+            filters = []
+
+        if not math.isclose(tempo, 1.0):
             filters.append(f"atempo={tempo}")
 
-        return filters if filters else []
+        return filters
 
     def _generate_gap_video(self, segment: TrackSegment, label: str) -> str:
-        width = self.preset.video.width or 1920
-        height = self.preset.video.height or 1080
-        framerate = self.preset.video.framerate or 24
-
-        if segment.transparent:
-            self._video_filters.append(
-                f"color=c=black@0.0:s={width}x{height}:d={segment.duration}:r={framerate},"
-                f"format=rgba,setsar=1[{label}]"
-            )
-        else:
-            self._video_filters.append(
-                f"color=c=black:s={width}x{height}:d={segment.duration}:r={framerate},"
-                f"setsar=1[{label}]"
+        key = ("gap_video", segment.duration, segment.transparent)
+        source = self._chain_cache.get(key)
+        if source is None:
+            color = "black@0.0" if segment.transparent else "black"
+            source = (
+                f"color=c={color}:s={self._canvas_width}x{self._canvas_height}"
+                f":d={segment.duration}:r={self._generator_framerate},"
+                f"{'format=rgba,' if segment.transparent else ''}setsar=1"
             )
+            self._chain_cache[key] = source
+
+        self._emit_filter(f"{source}[{label}]")
         return label
 
     def _generate_gap_audio(self, segment: TrackSegment, label: str) -> str:
-        sample_rate = self.preset.audio.sample_rate
-        channels = self.preset.audio.channels
+        key = ("gap_audio", segment.duration)
+        source = self._chain_cache.get(key)
+        if source is None:
+            layout = "stereo" if self.preset.audio.channels == 2 else "mono"
+            source = (
+                f"anullsrc=r={self.preset.audio.sample_rate}:cl={layout}:"
+                f"d={segment.duration}"
+            )
+            self._chain_cache[key] = source
 
-        self._audio_filters.append(
-            f"anullsrc=r={sample_rate}:cl={'stereo' if channels == 2 else 'mono'},"
-            f"atrim=duration={segment.duration}[{label}]"
-        )
+        self._emit_filter(f"{source}[{label}]")
         return label
 
     def _generate_generator_video(self, segment: TrackSegment, label: str) -> str:
         kind = segment.generator_params.get("kind", "SolidColor")
         params = segment.generator_params.get("params", {})
 
-        width = self.preset.video.width or 1920
-        height = self.preset.video.height or 1080
-        framerate = self.preset.video.framerate or 24
+        width = self._canvas_width
+        height = self._canvas_height
+        framerate = self._generator_framerate
 
         if kind.lower() == "caption":
             text = self._escape_drawtext(str(params.get("text", "")))
@@ -668,23 +1062,23 @@ class TimelineToFFmpeg:
                 drawtext_parts.append("boxborderw=8")
 
             drawtext = "drawtext=" + ":".join(drawtext_parts)
-            self._video_filters.append(
+            self._emit_filter(
                 f"color=c=black@0.0:s={width}x{height}:d={segment.duration}:r={framerate},"
                 f"format=rgba,{drawtext},setsar=1[{label}]"
             )
         elif kind == "SolidColor":
             color = params.get("color", "black")
-            self._video_filters.append(
+            self._emit_filter(
                 f"color=c={color}:s={width}x{height}:d={segment.duration}:r={framerate},"
                 f"setsar=1[{label}]"
             )
         elif kind == "Bars":
-            self._video_filters.append(
+            self._emit_filter(
                 f"smptebars=s={width}x{height}:d={segment.duration}:r={framerate},"
                 f"setsar=1[{label}]"
             )
         else:
-            self._video_filters.append(
+            self._emit_filter(
                 f"color=c=black:s={width}x{height}:d={segment.duration}:r={framerate},"
                 f"setsar=1[{label}]"
             )
@@ -812,15 +1206,13 @@ class TimelineToFFmpeg:
         return current
 
     def _apply_simple_video_filter(self, input_label: str, expr: str) -> str:
-        output_label = f"vfx_{self._filter_counter}"
-        self._filter_counter += 1
-        self._video_filters.append(f"[{input_label}]{expr}[{output_label}]")
+        output_label = self._label("v")
+        self._emit_filter(f"[{input_label}]{expr}[{output_label}]")
         return output_label
 
     def _apply_simple_audio_filter(self, input_label: str, expr: str) -> str:
-        output_label = f"afx_{self._filter_counter}"
-        self._filter_counter += 1
-        self._audio_filters.append(f"[{input_label}]{expr}[{output_label}]")
+        output_label = self._label("a")
+        self._emit_filter(f"[{input_label}]{expr}[{output_label}]")
         return output_label
 
     def _apply_lut(self, input_label: str, metadata: dict[str, Any]) -> str:
@@ -833,17 +1225,16 @@ class TimelineToFFmpeg:
                 input_label, f"lut3d=file={path}"
             )
 
-        base_label = f"vlut_base_{self._filter_counter}"
-        lut_label = f"vlut_src_{self._filter_counter}"
-        lut_out = f"vlut_out_{self._filter_counter}"
-        output_label = f"vlut_mix_{self._filter_counter}"
-        self._filter_counter += 1
+        base_label = self._label("v")
+        lut_label = self._label("v")
+        lut_out = self._label("v")
+        output_label = self._label("v")
 
-        self._video_filters.append(
+        self._emit_filter(
             f"[{input_label}]split=2[{base_label}][{lut_label}]"
         )
-        self._video_filters.append(f"[{lut_label}]lut3d=file={path}[{lut_out}]")
-        self._video_filters.append(
+        self._emit_filter(f"[{lut_label}]lut3d=file={path}[{lut_out}]")
+        self._emit_filter(
             f"[{base_label}][{lut_out}]blend=all_mode=normal:all_opacity={intensity}"
             f"[{output_label}]"
         )
@@ -882,8 +1273,8 @@ class TimelineToFFmpeg:
         return self._apply_simple_video_filter(input_label, expr)
 
     def _apply_reframe(self, input_label: str, metadata: dict[str, Any]) -> str:
-        canvas_w = self.preset.video.width or 1920
-        canvas_h = self.preset.video.height or 1080
+        canvas_w = self._canvas_width
+        canvas_h = self._canvas_height
         width_value = self._normalize_to_pixels(metadata.get("width"), canvas_w)
         height_value = self._normalize_to_pixels(metadata.get("height"), canvas_h)
         width = None if width_value is None else max(1, int(round(width_value)))
@@ -898,8 +1289,8 @@ class TimelineToFFmpeg:
         return self._apply_simple_video_filter(input_label, expr)
 
     def _apply_position(self, input_label: str, metadata: dict[str, Any]) -> str:
-        canvas_w = self.preset.video.width or 1920
-        canvas_h = self.preset.video.height or 1080
+        canvas_w = self._canvas_width
+        canvas_h = self._canvas_height
         width_value = self._normalize_to_pixels(metadata.get("width"), canvas_w)
         height_value = self._normalize_to_pixels(metadata.get("height"), canvas_h)
         width = canvas_w if width_value is None else max(1, int(round(width_value)))
@@ -915,8 +1306,8 @@ class TimelineToFFmpeg:
         return self._apply_simple_video_filter(input_label, expr)
 
     def _apply_mask(self, input_label: str, metadata: dict[str, Any]) -> str:
-        canvas_w = self.preset.video.width or 1920
-        canvas_h = self.preset.video.height or 1080
+        canvas_w = self._canvas_width
+        canvas_h = self._canvas_height
         width_value = self._normalize_to_pixels(metadata.get("width"), canvas_w)
         height_value = self._normalize_to_pixels(metadata.get("height"), canvas_h)
         width = None if width_value is None else max(1, int(round(width_value)))
@@ -934,8 +1325,8 @@ class TimelineToFFmpeg:
         return self._apply_simple_video_filter(input_label, expr)
 
     def _apply_mask_blur(self, input_label: str, metadata: dict[str, Any]) -> str:
-        canvas_w = self.preset.video.width or 1920
-        canvas_h = self.preset.video.height or 1080
+        canvas_w = self._canvas_width
+        canvas_h = self._canvas_height
         width_value = self._normalize_to_pixels(metadata.get("width"), canvas_w)
         height_value = self._normalize_to_pixels(metadata.get("height"), canvas_h)
         width = None if width_value is None else max(1, int(round(width_value)))
@@ -948,20 +1339,19 @@ class TimelineToFFmpeg:
         y = int(round(0 if y_value is None else y_value))
         radius = metadata.get("radius", 8)
 
-        base_label = f"vblur_base_{self._filter_counter}"
-        blur_label = f"vblur_src_{self._filter_counter}"
-        crop_label = f"vblur_crop_{self._filter_counter}"
-        out_label = f"vblur_out_{self._filter_counter}"
-        self._filter_counter += 1
+        base_label = self._label("v")
+        blur_label = self._label("v")
+        crop_label = self._label("v")
+        out_label = self._label("v")
 
-        self._video_filters.append(
+        self._emit_filter(
             f"[{input_label}]split=2[{base_label}][{blur_label}]"
         )
-        self._video_filters.append(
+        self._emit_filter(
             f"[{blur_label}]crop={width}:{height}:{x}:{y},boxblur=lr={radius}:cr={radius}"
             f"[{crop_label}]"
         )
-        self._video_filters.append(
+        self._emit_filter(
             f"[{base_label}][{crop_label}]overlay={x}:{y}[{out_label}]"
         )
         return out_label
@@ -971,14 +1361,11 @@ class TimelineToFFmpeg:
     ) -> str:
         start_zoom = float(metadata.get("start_zoom", 1.0))
         end_zoom = float(metadata.get("end_zoom", 1.0))
-        canvas_w = self.preset.video.width or 1920
-        canvas_h = self.preset.video.height or 1080
+        canvas_w = self._canvas_width
+        canvas_h = self._canvas_height
         center_x = self._normalize_ratio(metadata.get("center_x"), canvas_w, 0.5)
         center_y = self._normalize_ratio(metadata.get("center_y"), canvas_h, 0.5)
-        framerate = self.preset.video.framerate or self.timeline.metadata.get(
-            "default_rate", 24.0
-        )
-        frames = max(1, int(segment.duration * framerate))
+        frames = max(1, int(segment.duration * self._timeline_framerate))
 
         zoom_expr = (
             f"if(eq(on,0),{start_zoom},"
@@ -988,7 +1375,7 @@ class TimelineToFFmpeg:
         y_expr = f"(ih - ih/zoom)*{center_y}"
         expr = (
             f"zoompan=z='{zoom_expr}':x='{x_expr}':y='{y_expr}':"
-            f"d={frames}:s={canvas_w}x{canvas_h}:fps={framerate}"
+            f"d={frames}:s={canvas_w}x{canvas_h}:fps={self._timeline_framerate}"
         )
         return self._apply_simple_video_filter(input_label, expr)
 
@@ -998,19 +1385,18 @@ class TimelineToFFmpeg:
         blur = float(metadata.get("blur", 20))
         blur = max(0.1, blur)
 
-        base_label = f"vglow_base_{self._filter_counter}"
-        glow_label = f"vglow_src_{self._filter_counter}"
-        blur_label = f"vglow_blur_{self._filter_counter}"
-        out_label = f"vglow_out_{self._filter_counter}"
-        self._filter_counter += 1
+        base_label = self._label("v")
+        glow_label = self._label("v")
+        blur_label = self._label("v")
+        out_label = self._label("v")
 
-        self._video_filters.append(
+        self._emit_filter(
             f"[{input_label}]split=2[{base_label}][{glow_label}]"
         )
-        self._video_filters.append(
+        self._emit_filter(
             f"[{glow_label}]gblur=sigma={blur}[{blur_label}]"
         )
-        self._video_filters.append(
+        self._emit_filter(
             f"[{base_label}][{blur_label}]blend=all_mode=screen:all_opacity={strength}"
             f"[{out_label}]"
         )
@@ -1066,20 +1452,19 @@ class TimelineToFFmpeg:
         high = float(metadata.get("high", 0.4))
         blur = float(metadata.get("blur", 2.0))
 
-        base_label = f"vedge_base_{self._filter_counter}"
-        edge_label = f"vedge_src_{self._filter_counter}"
-        glow_label = f"vedge_glow_{self._filter_counter}"
-        out_label = f"vedge_out_{self._filter_counter}"
-        self._filter_counter += 1
+        base_label = self._label("v")
+        edge_label = self._label("v")
+        glow_label = self._label("v")
+        out_label = self._label("v")
 
-        self._video_filters.append(
+        self._emit_filter(
             f"[{input_label}]split=2[{base_label}][{edge_label}]"
         )
         edge_expr = f"edgedetect=low={low}:high={high}"
         if blur > 0:
             edge_expr += f",gblur=sigma={blur}"
-        self._video_filters.append(f"[{edge_label}]{edge_expr}[{glow_label}]")
-        self._video_filters.append(
+        self._emit_filter(f"[{edge_label}]{edge_expr}[{glow_label}]")
+        self._emit_filter(
             f"[{base_label}][{glow_label}]blend=all_mode=screen:all_opacity={strength}"
             f"[{out_label}]"
         )
@@ -1171,51 +1556,40 @@ class TimelineToFFmpeg:
         if not transitions:
             return self._concat_video_segments(segments)
 
-        result = segments[0]
         result_duration = segment_durations[0] if segment_durations else 0.0
-        transition_idx = 0
+        transitions_by_position = {trans.position: trans for trans in transitions}
+        # Segments joined by hard cuts are collected and concatenated in one
+        # filter right before the next crossfade (or at the end).
+        run = [segments[0]]
 
         for i in range(1, len(segments)):
-            out_label = f"vtrans_{self._filter_counter}"
-            self._filter_counter += 1
             next_duration = (
                 segment_durations[i] if i < len(segment_durations) else 0.0
             )
 
-            trans = None
-            if transition_idx < len(transitions):
-                if transitions[transition_idx].position == i:
-                    trans = transitions[transition_idx]
-                    transition_idx += 1
-
-            if trans:
-                trans_type = self._map_transition_type(trans.transition_type)
-                transition_duration = max(
-                    0.0, min(trans.duration, result_duration, next_duration)
-                )
-                if transition_duration > 0:
-                    offset = max(0.0, result_duration - transition_duration)
-                    self._video_filters.append(
-                        f"[{result}][{segments[i]}]xfade=transition={trans_type}:"
-                        f"duration={transition_duration}:offset={offset}[{out_label}]"
-                    )
-                    result_duration = (
-                        result_duration + next_duration - transition_duration
-                    )
-                else:
-                    self._video_filters.append(
-                        f"[{result}][{segments[i]}]concat=n=2:v=1:a=0[{out_label}]"
-                    )
-                    result_duration += next_duration
-            else:
-                self._video_filters.append(
-                    f"[{result}][{segments[i]}]concat=n=2:v=1:a=0[{out_label}]"
-                )
+            trans = transitions_by_position.get(i)
+            transition_duration = (
+                max(0.0, min(trans.duration, result_duration, next_duration))
+                if trans
+                else 0.0
+            )
+            if transition_duration <= 0:
+                run.append(segments[i])
                 result_duration += next_duration
+                continue
 
-            result = out_label
+            result = self._concat_video_segments(run)
+            out_label = self._label("v")
+            trans_type = self._map_transition_type(trans.transition_type)
+            offset = max(0.0, result_duration - transition_duration)
+            self._emit_filter(
+                f"[{result}][{segments[i]}]xfade=transition={trans_type}:"
+                f"duration={transition_duration}:offset={offset}[{out_label}]"
+            )
+            result_duration = result_duration + next_duration - transition_duration
+            run = [out_label]
 
-        return result
+        return self._concat_video_segments(run)
 
     def _apply_audio_transitions(
         self,
@@ -1226,59 +1600,45 @@ class TimelineToFFmpeg:
         if not transitions:
             return self._concat_audio_segments(segments)
 
-        result = segments[0]
         result_duration = segment_durations[0] if segment_durations else 0.0
-        transition_idx = 0
+        transitions_by_position = {trans.position: trans for trans in transitions}
+        run = [segments[0]]
 
         for i in range(1, len(segments)):
-            out_label = f"atrans_{self._filter_counter}"
-            self._filter_counter += 1
             next_duration = (
                 segment_durations[i] if i < len(segment_durations) else 0.0
             )
 
-            trans = None
-            if transition_idx < len(transitions):
-                if transitions[transition_idx].position == i:
-                    trans = transitions[transition_idx]
-                    transition_idx += 1
-
-            if trans:
-                transition_duration = max(
-                    0.0, min(trans.duration, result_duration, next_duration)
-                )
-                if transition_duration > 0:
-                    self._audio_filters.append(
-                        f"[{result}][{segments[i]}]acrossfade=d={transition_duration}"
-                        f"[{out_label}]"
-                    )
-                    result_duration = (
-                        result_duration + next_duration - transition_duration
-                    )
-                else:
-                    self._audio_filters.append(
-                        f"[{result}][{segments[i]}]concat=n=2:v=0:a=1[{out_label}]"
-                    )
-                    result_duration += next_duration
-            else:
-                self._audio_filters.append(
-                    f"[{result}][{segments[i]}]concat=n=2:v=0:a=1[{out_label}]"
-                )
+            trans = transitions_by_position.get(i)
+            transition_duration = (
+                max(0.0, min(trans.duration, result_duration, next_duration))
+                if trans
+                else 0.0
+            )
+            if transition_duration <= 0:
+                run.append(segments[i])
                 result_duration += next_duration
+                continue
 
-            result = out_label
+            result = self._concat_audio_segments(run)
+            out_label = self._label("a")
+            self._emit_filter(
+                f"[{result}][{segments[i]}]acrossfade=d={transition_duration}"
+                f"[{out_label}]"
+            )
+            result_duration = result_duration + next_duration - transition_duration
+            run = [out_label]
 
-        return result
+        return self._concat_audio_segments(run)
 
     def _concat_video_segments(self, segments: list[str]) -> str:
         if len(segments) == 1:
             return segments[0]
 
-        out_label = f"vconcat_{self._filter_counter}"
-        self._filter_counter += 1
+        out_label = self._label("v")
 
-        inputs = "".join(f"[{s}]" for s in segments)
-        self._video_filters.append(
+        inputs = "[" + "][".join(segments) + "]"
+        self._emit_filter(
             f"{inputs}concat=n={len(segments)}:v=1:a=0[{out_label}]"
         )
 
@@ -1288,11 +1648,10 @@ class TimelineToFFmpeg:
         if len(segments) == 1:
             return segments[0]
 
-        out_label = f"aconcat_{self._filter_counter}"
-        self._filter_counter += 1
+        out_label = self._label("a")
 
-        inputs = "".join(f"[{s}]" for s in segments)
-        self._audio_filters.append(
+        inputs = "[" + "][".join(segments) + "]"
+        self._emit_filter(
             f"{inputs}concat=n={len(segments)}:v=0:a=1[{out_label}]"
         )
 
@@ -1304,10 +1663,9 @@ class TimelineToFFmpeg:
 
         result = tracks[0]
         for i in range(1, len(tracks)):
-            out_label = f"voverlay_{self._filter_counter}"
-            self._filter_counter += 1
+            out_label = self._label("v")
 
-            self._video_filters.append(
+            self._emit_filter(
                 f"[{result}][{tracks[i]}]overlay=shortest=1[{out_label}]"
             )
             result = out_label
@@ -1318,28 +1676,27 @@ class TimelineToFFmpeg:
         if len(tracks) == 1:
             return tracks[0]
 
-        out_label = f"amix_{self._filter_counter}"
-        self._filter_counter += 1
+        out_label = self._label("a")
 
-        inputs = "".join(f"[{t}]" for t in tracks)
-        self._audio_filters.append(
+        inputs = "[" + "][".join(tracks) + "]"
+        self._emit_filter(
             f"{inputs}amix=inputs={len(tracks)}:duration=longest[{out_label}]"
         )
 
         return out_label
 
-    def _extract_audio_from_video(self) -> str | None:
-        video_tracks = self.timeline.video_tracks
+    def _extract_audio_from_video(self, video_tracks: list[Track]) -> str | None:
         if not video_tracks:
             return None
 
-        track = video_tracks[0]
-        segments = self._extract_track_segments(track)
+        segments = self._video_track_segments.get(0)
+        if segments is None:
+            segments = self._extract_track_segments(video_tracks[0])
 
         audio_outputs: list[str] = []
-        for seg_idx, segment in enumerate(segments):
+        for segment in segments:
             if segment.input_index is not None:
-                seg_out = self._process_audio_segment(segment, 0, seg_idx)
+                seg_out = self._process_audio_segment(segment)
                 if seg_out:
                     audio_outputs.append(seg_out)
 
@@ -1353,253 +1710,49 @@ class TimelineToFFmpeg:
 
     def _map_transition_type(self, trans_type: TransitionType) -> str:
         value = trans_type.value
-        mapping = {
-            TransitionType.SMPTE_DISSOLVE.value: "dissolve",
-            TransitionType.FADE_IN.value: "fade",
-            TransitionType.FADE_OUT.value: "fade",
-            TransitionType.WIPE.value: "wipeleft",
-            TransitionType.SLIDE.value: "slideleft",
-            TransitionType.CUSTOM.value: "dissolve",
-        }
-        if value in mapping:
-            return mapping[value]
-        xfade_transitions = {
-            "custom",
-            "fade",
-            "wipeleft",
-            "wiperight",
-            "wipeup",
-            "wipedown",
-            "slideleft",
-            "slideright",
-            "slideup",
-            "slidedown",
-            "circlecrop",
-            "rectcrop",
-            "distance",
-            "fadeblack",
-            "fadewhite",
-            "radial",
-            "smoothleft",
-            "smoothright",
-            "smoothup",
-            "smoothdown",
-            "circleopen",
-            "circleclose",
-            "vertopen",
-            "vertclose",
-            "horzopen",
-            "horzclose",
-            "dissolve",
-            "pixelize",
-            "diagtl",
-            "diagtr",
-            "diagbl",
-            "diagbr",
-            "hlslice",
-            "hrslice",
-            "vuslice",
-            "vdslice",
-            "hblur",
-            "fadegrays",
-            "wipetl",
-            "wipetr",
-            "wipebl",
-            "wipebr",
-            "squeezeh",
-            "squeezev",
-            "zoomin",
-            "fadefast",
-            "fadeslow",
-            "hlwind",
-            "hrwind",
-            "vuwind",
-            "vdwind",
-            "coverleft",
-            "coverright",
-            "coverup",
-            "coverdown",
-            "revealleft",
-            "revealright",
-            "revealup",
-            "revealdown",
-        }
+        mapped = _TRANSITION_MAP.get(value)
+        if mapped is not None:
+            return mapped
         lower = value.lower()
-        if lower == "custom":
-            return "dissolve"
-        if lower in xfade_transitions:
+        if lower in _XFADE_TRANSITIONS and lower != "custom":
             return lower
         return "dissolve"
 
-    def _combine_filters(self) -> str:
-        all_filters = self._video_filters + self._audio_filters
-        return ";".join(all_filters)
-
-    def _build_output_options(self) -> list[str]:
-        options: list[str] = []
-
-        codec = self.preset.video.codec
-        container = self._resolve_output_container()
-        use_gpu = self.preset.use_gpu and codec in {VideoCodec.H264, VideoCodec.H265}
-        video_encoder = ""
-        gop_size = self._resolve_gop_size()
+    def _label(self, prefix: str) -> str:
+        # Short labels keep big graphs under the argv / script size limits.
+        label = prefix + _b36(self._filter_counter)
+        self._filter_counter += 1
+        return label
 
-        if use_gpu:
-            if codec == VideoCodec.H264:
-                video_encoder = "h264_nvenc"
-            elif codec == VideoCodec.H265:
-                video_encoder = "hevc_nvenc"
-        else:
-            if codec == VideoCodec.H264:
-                video_encoder = "libx264"
-            elif codec == VideoCodec.H265:
-                video_encoder = "libx265"
-            elif codec == VideoCodec.PRORES:
-                video_encoder = "prores_ks"
-            elif codec == VideoCodec.VP9:
-                video_encoder = "libvpx-vp9"
-            elif codec == VideoCodec.AV1:
-                video_encoder = "libsvtav1"
-
-        if not video_encoder:
-            raise ValueError(f"Unsupported codec configuration: {codec}")
-        options.extend(["-c:v", video_encoder])
-
-        if self.preset.video.crf is not None:
-            if use_gpu:
-                options.extend(["-cq", str(self.preset.video.crf)])
-            elif video_encoder == "libvpx-vp9":
-                options.extend(["-crf", str(self.preset.video.crf), "-b:v", "0"])
-            elif video_encoder != "prores_ks":
-                options.extend(["-crf", str(self.preset.video.crf)])
-
-        if self.preset.video.bitrate:
-            options.extend(["-b:v", self.preset.video.bitrate])
+    def _emit_filter(self, filter_str: str) -> None:
+        if self._filter_buf.tell():
+            self._filter_buf.write(";")
+        self._filter_buf.write(filter_str)
 
-        if use_gpu:
-            nvenc_preset = self._map_nvenc_preset(self.preset.video.preset)
-            options.extend(["-preset", nvenc_preset])
-        elif video_encoder in {"libx264", "libx265"}:
-            options.extend(["-preset", self.preset.video.preset])
-        elif video_encoder == "libvpx-vp9":
-            options.extend(["-cpu-used", str(self._map_vp9_cpu_used(self.preset.video.preset))])
-        elif video_encoder == "libsvtav1":
-            options.extend(["-preset", "6"])
-
-        if video_encoder == "libx264":
-            options.extend(["-profile:v", "high", "-g", str(gop_size)])
-        if video_encoder == "libx265":
-            options.extend([
-                "-x265-params",
-                "aq-mode=3:aq-strength=1.0:qcomp=0.7",
-                "-g",
-                str(gop_size),
-            ])
-            if container in {"mp4", "mov"}:
-                options.extend(["-tag:v", "hvc1"])
-        if video_encoder.endswith("_nvenc"):
-            options.extend(["-g", str(gop_size)])
-
-        if codec == VideoCodec.PRORES:
-            options.extend(["-profile:v", "3"])
-            options.extend(["-vendor", "apl0"])
-            options.extend(["-bits_per_mb", "8000"])
-
-        if video_encoder == "libvpx-vp9":
-            options.extend(
-                [
-                    "-quality",
-                    "good",
-                    "-row-mt",
-                    "1",
-                    "-tile-columns",
-                    "2",
-                    "-frame-parallel",
-                    "1",
-                    "-auto-alt-ref",
-                    "1",
-                    "-lag-in-frames",
-                    "25",
-                    "-g",
-                    str(gop_size),
-                ]
-            )
-        if video_encoder == "libsvtav1":
-            options.extend(
-                [
-                    "-svtav1-params",
-                    "tune=0:enable-qm=1:qm-min=0:qm-max=8",
-                    "-g",
-                    str(gop_size),
-                ]
-            )
+    def _combine_filters(self) -> str:
+        return self._filter_buf.getvalue()
 
-        pixel_format = self.preset.video.pixel_format
-        if codec == VideoCodec.H265 and pixel_format == "yuv420p":
-            pixel_format = "yuv420p10le"
-        elif codec == VideoCodec.PRORES:
-            pixel_format = "yuv422p10le"
-        elif codec == VideoCodec.AV1 and pixel_format == "yuv420p":
-            pixel_format = "yuv420p10le"
-        options.extend(["-pix_fmt", pixel_format])
-
-        if self.preset.video.color_space:
-            options.extend(["-colorspace", self.preset.video.color_space])
-        if self.preset.video.color_primaries:
-            options.extend(["-color_primaries", self.preset.video.color_primaries])
-        if self.preset.video.color_trc:
-            options.extend(["-color_trc", self.preset.video.color_trc])
-
-        audio_codec = self.preset.audio.codec.value
-        if container == "webm" and audio_codec not in {"opus", "vorbis"}:
-            audio_codec = "opus"
-
-        if audio_codec == "aac":
-            options.extend(["-c:a", "aac", "-profile:a", "aac_low"])
-        elif audio_codec == "mp3":
-            options.extend(["-c:a", "libmp3lame"])
-        elif audio_codec == "opus":
-            options.extend(["-c:a", "libopus", "-vbr", "on", "-compression_level", "10"])
-
-        audio_bitrate = self.preset.audio.bitrate
-        if audio_codec == "opus" and (not audio_bitrate or not str(audio_bitrate).strip()):
-            audio_bitrate = "160k"
-        options.extend(["-b:a", audio_bitrate])
-        options.extend(["-ar", str(self.preset.audio.sample_rate)])
-        options.extend(["-ac", str(self.preset.audio.channels)])
-
-        if container in {"mp4", "mov"}:
-            options.extend(["-movflags", "+faststart"])
-
-        return options
-
-    def _map_nvenc_preset(self, preset: str) -> str:
-        mapping = {
-            "ultrafast": "fast",
-            "superfast": "fast",
-            "veryfast": "fast",
-            "faster": "fast",
-            "fast": "fast",
-            "medium": "medium",
-            "slow": "slow",
-            "slower": "slow",
-            "veryslow": "slow",
-        }
-        return mapping.get(preset, "medium")
-
-    def _map_vp9_cpu_used(self, preset: str) -> int:
-        mapping = {
-            "ultrafast": 8,
-            "superfast": 7,
-            "veryfast": 6,
-            "faster": 5,
-            "fast": 4,
-            "medium": 3,
-            "slow": 2,
-            "slower": 1,
-            "veryslow": 0,
-        }
-        return mapping.get(preset, 3)
+    def _build_output_options(self) -> list[str]:
+        video = self.preset.video
+        audio = self.preset.audio
+        key = _OutputOptionsKey(
+            codec=video.codec,
+            container=self._resolve_output_container(),
+            use_gpu=self.preset.use_gpu,
+            crf=video.crf,
+            bitrate=video.bitrate,
+            preset=video.preset,
+            pixel_format=video.pixel_format,
+            color_space=video.color_space,
+            color_primaries=video.color_primaries,
+            color_trc=video.color_trc,
+            audio_codec=audio.codec.value,
+            audio_bitrate=audio.bitrate,
+            sample_rate=audio.sample_rate,
+            channels=audio.channels,
+            gop_size=self._resolve_gop_size(),
+        )
+        return list(_output_options_for(key))
 
     def _resolve_output_container(self) -> str:
         container = str(self.preset.video.container.value).lower()
@@ -1616,14 +1769,23 @@ class TimelineToFFmpeg:
         return container
 
     def _resolve_gop_size(self) -> int:
+        return max(24, int(round(max(1.0, self._timeline_framerate) * 2)))
+
+    def _resolve_timeline_framerate(self) -> float:
         framerate = self.preset.video.framerate or self.timeline.metadata.get(
             "default_rate", 24.0
         )
         try:
-            fps = float(framerate)
+            return float(framerate)
         except (TypeError, ValueError):
-            fps = 24.0
-        return max(24, int(round(max(1.0, fps) * 2)))
+            return 24.0
+
+
+_CHILD_HANDLERS = {
+    Clip: TimelineToFFmpeg._append_clip_segment,
+    Gap: TimelineToFFmpeg._append_gap_segment,
+    Stack: TimelineToFFmpeg._append_stack_segment,
+}
 
 
 def build_render_command(
@@ -1631,10 +1793,11 @@ def build_render_command(
     asset_map: dict[str, str],
     preset: RenderPreset,
     output_path: str,
+    script_dir: str | None = None,
 ) -> str:
     timeline = Timeline.model_validate(timeline_dict)
     converter = TimelineToFFmpeg(timeline, asset_map, preset, output_path)
-    return converter.build_command_string()
+    return converter.build_command_string(script_dir)
 
 
 def estimate_render_duration(timeline: Timeline, preset: RenderPreset) -> float:
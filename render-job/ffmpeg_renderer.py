@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import copy
 import hashlib
+import io
 import json
 import logging
 import math
@@ -9,6 +10,7 @@ import platform
 import re
 import shutil
 import subprocess
+import tempfile
 import threading
 import time
 from dataclasses import dataclass, field
@@ -24,6 +26,162 @@ from graphics_generator import OverlayGenerator, OverlayAsset
 
 logger = logging.getLogger("ffmpeg-renderer")
 
+# Larger graphs go to a script file; a single argv entry is capped at 128 KiB.
+FILTER_COMPLEX_SCRIPT_THRESHOLD = 8192
+
+_VIDEO_SEGMENT_TEMPLATE = (
+    "[{input}:v]trim=start={start}:duration={duration},setpts=PTS-STARTPTS{timing},"
+    "{scale}[{label}]"
+)
+
+_SCALE_PAD_TEMPLATE = (
+    "scale={width}:{height}:force_original_aspect_ratio=decrease:flags=lanczos,"
+    "pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+)
+
+_AUDIO_SEGMENT_TEMPLATE = (
+    "[{input}:a]atrim=start={start}:duration={duration},asetpts=PTS-STARTPTS{tempo}"
+    "[{label}]"
+)
+
+_TRANSITION_MAP = {
+    "SMPTE_Dissolve": "dissolve",
+    "FadeIn": "fade",
+    "FadeOut": "fade",
+    "Wipe": "wipeleft",
+    "Slide": "slideleft",
+    "Custom": "dissolve",
+}
+
+_XFADE_TRANSITIONS = frozenset(
+    {
+        "custom",
+        "fade",
+        "wipeleft",
+        "wiperight",
+        "wipeup",
+        "wipedown",
+        "slideleft",
+        "slideright",
+        "slideup",
+        "slidedown",
+        "circlecrop",
+        "rectcrop",
+        "distance",
+        "fadeblack",
+        "fadewhite",
+        "radial",
+        "smoothleft",
+        "smoothright",
+        "smoothup",
+        "smoothdown",
+        "circleopen",
+        "circleclose",
+        "vertopen",
+        "vertclose",
+        "horzopen",
+        "horzclose",
+        "dissolve",
+        "pixelize",
+        "diagtl",
+        "diagtr",
+        "diagbl",
+        "diagbr",
+        "hlslice",
+        "hrslice",
+        "vuslice",
+        "vdslice",
+        "hblur",
+        "fadegrays",
+        "wipetl",
+        "wipetr",
+        "wipebl",
+        "wipebr",
+        "squeezeh",
+        "squeezev",
+        "zoomin",
+        "fadefast",
+        "fadeslow",
+        "hlwind",
+        "hrwind",
+        "vuwind",
+        "vdwind",
+        "coverleft",
+        "coverright",
+        "coverup",
+        "coverdown",
+        "revealleft",
+        "revealright",
+        "revealup",
+        "revealdown",
+    }
+)
+
+_PRORES_PROFILE_MAP = {
+    "proxy": "0",
+    "lt": "1",
+    "standard": "2",
+    "hq": "3",
+    "4444": "4",
+    "4444xq": "5",
+}
+
+_VP9_CPU_USED_MAP = {
+    "ultrafast": 8,
+    "superfast": 7,
+    "veryfast": 6,
+    "faster": 5,
+    "fast": 4,
+    "medium": 3,
+    "slow": 2,
+    "slower": 1,
+    "veryslow": 0,
+}
+
+_CPU_ENCODERS = {
+    "h264": "libx264",
+    "h265": "libx265",
+    "prores": "prores_ks",
+    "vp9": "libvpx-vp9",
+    "av1": "libsvtav1",
+}
+
+_NVENC_PRESET_MAP = {
+    "ultrafast": "fast",
+    "superfast": "fast",
+    "veryfast": "fast",
+    "faster": "fast",
+    "fast": "fast",
+    "medium": "medium",
+    "slow": "slow",
+    "slower": "slow",
+    "veryslow": "slow",
+}
+
+_SVTAV1_PRESET_MAP = {
+    "ultrafast": 12,
+    "superfast": 11,
+    "veryfast": 10,
+    "faster": 9,
+    "fast": 8,
+    "medium": 6,
+    "slow": 4,
+    "slower": 3,
+    "veryslow": 2,
+}
+
+
+_LABEL_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _b36(n: int) -> str:
+    digits = ""
+    while True:
+        n, rem = divmod(n, 36)
+        digits = _LABEL_DIGITS[rem] + digits
+        if not n:
+            return digits
+
 
 def _normalize_stream_type(value: Any) -> str | None:
     text = str(value or "").strip().lower()
@@ -66,7 +224,7 @@ class InputSpec:
         return [*self.options, "-i", self.path]
 
 
-@dataclass
+@dataclass(slots=True)
 class TrackSegment:
     start_time: float
     duration: float
@@ -82,7 +240,7 @@ class TrackSegment:
     transparent: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class TransitionInfo:
     position: int
     transition_type: str
@@ -115,11 +273,32 @@ class TimelineToFFmpeg:
 
         self._inputs: list[InputSpec] = []
         self._input_index_map: dict[str, int] = {}
-        self._video_filters: list[str] = []
-        self._audio_filters: list[str] = []
+        self._video_filters = io.StringIO()
+        self._audio_filters = io.StringIO()
         self._filter_counter = 0
+        self._tracks: list[dict[str, Any]] = []
+        self._video_tracks: list[dict[str, Any]] = []
+        self._audio_tracks: list[dict[str, Any]] = []
+        self._track_segment_cache: dict[
+            tuple[int, bool, bool], tuple[list[TrackSegment], list[TransitionInfo]]
+        ] = {}
+        self._canvas_width = self._video_width()
+        self._canvas_height = self._video_height()
+        self._timeline_framerate = self._framerate()
+        self._scale_pad_filter = _SCALE_PAD_TEMPLATE.format(
+            width=self._canvas_width, height=self._canvas_height
+        )
 
     def build(self) -> tuple[list[InputSpec], str, list[str]]:
+        self._track_segment_cache = {}
+        self._tracks = [
+            t
+            for t in self.timeline.get("tracks", {}).get("children", [])
+            if t.get("OTIO_SCHEMA") == "Track.1"
+        ]
+        self._video_tracks = [t for t in self._tracks if t.get("kind") == "Video"]
+        self._audio_tracks = [t for t in self._tracks if t.get("kind") == "Audio"]
+
         self._collect_inputs()
         video_out = self._build_video_graph()
         audio_out = self._build_audio_graph()
@@ -154,10 +333,7 @@ class TimelineToFFmpeg:
 
     def _extract_asset_ids(self) -> list[str]:
         ids: list[str] = []
-        tracks = self.timeline.get("tracks", {}).get("children", [])
-        for track in tracks:
-            if track.get("OTIO_SCHEMA") != "Track.1":
-                continue
+        for track in self._tracks:
             for item in track.get("children", []):
                 if item.get("OTIO_SCHEMA") != "Clip.1":
                     continue
@@ -169,11 +345,7 @@ class TimelineToFFmpeg:
         return ids
 
     def _build_video_graph(self) -> str | None:
-        tracks = [
-            t
-            for t in self.timeline.get("tracks", {}).get("children", [])
-            if t.get("OTIO_SCHEMA") == "Track.1" and t.get("kind") == "Video"
-        ]
+        tracks = self._video_tracks
         if not tracks:
             return None
 
@@ -187,7 +359,9 @@ class TimelineToFFmpeg:
                 align_generator_start=align_generator_start,
                 transparent_gaps=transparent_gaps,
             )
-            duration = sum(seg.duration for seg in segments)
+            # Segments are laid end to end on the extraction cursor, so the
+            # last one ends exactly where the running sum would.
+            duration = segments[-1].start_time + segments[-1].duration if segments else 0.0
             track_data.append((track_idx, segments, transitions, duration))
 
         if not track_data:
@@ -200,7 +374,7 @@ class TimelineToFFmpeg:
         for track_idx, segments, transitions, duration in track_data:
             if track_idx > 0 and target_duration > duration:
                 pad_duration = target_duration - duration
-                segments.append(
+                segments = segments + [
                     TrackSegment(
                         start_time=duration,
                         duration=pad_duration,
@@ -210,11 +384,11 @@ class TimelineToFFmpeg:
                         is_gap=True,
                         transparent=True,
                     )
-                )
+                ]
             segment_outputs: list[str] = []
             segment_durations: list[float] = []
-            for seg_idx, segment in enumerate(segments):
-                seg_out = self._process_video_segment(segment, track_idx, seg_idx)
+            for segment in segments:
+                seg_out = self._process_video_segment(segment)
                 if seg_out:
                     segment_outputs.append(seg_out)
                     segment_durations.append(segment.duration)
@@ -232,21 +406,17 @@ class TimelineToFFmpeg:
         return self._overlay_video_tracks(track_outputs)
 
     def _build_audio_graph(self) -> str | None:
-        tracks = [
-            t
-            for t in self.timeline.get("tracks", {}).get("children", [])
-            if t.get("OTIO_SCHEMA") == "Track.1" and t.get("kind") == "Audio"
-        ]
+        tracks = self._audio_tracks
         if not tracks:
             return self._extract_audio_from_video()
 
         track_outputs: list[str] = []
-        for track_idx, track in enumerate(tracks):
+        for track in tracks:
             segments, transitions = self._extract_track_segments(track)
             segment_outputs: list[str] = []
             segment_durations: list[float] = []
-            for seg_idx, segment in enumerate(segments):
-                seg_out = self._process_audio_segment(segment, track_idx, seg_idx)
+            for segment in segments:
+                seg_out = self._process_audio_segment(segment)
                 if seg_out:
                     segment_outputs.append(seg_out)
                     segment_durations.append(segment.duration)
@@ -269,6 +439,12 @@ class TimelineToFFmpeg:
         align_generator_start: bool = False,
         transparent_gaps: bool = False,
     ) -> tuple[list[TrackSegment], list[TransitionInfo]]:
+        # The first video track is walked again when audio is taken from it.
+        cache_key = (id(track), align_generator_start, transparent_gaps)
+        cached = self._track_segment_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         segments: list[TrackSegment] = []
         transitions: list[TransitionInfo] = []
         position = 0
@@ -340,11 +516,12 @@ class TimelineToFFmpeg:
                 position += 1
 
             speed_factor, is_freeze, effects = self._parse_effects(item.get("effects", []))
+            timeline_duration = source_duration / speed_factor if speed_factor else source_duration
 
             segments.append(
                 TrackSegment(
                     start_time=current_time,
-                    duration=source_duration / speed_factor if speed_factor else source_duration,
+                    duration=timeline_duration,
                     source_start=source_start,
                     source_duration=source_duration,
                     input_index=input_index,
@@ -357,9 +534,10 @@ class TimelineToFFmpeg:
                     transparent=bool(input_index is None and not is_generator and transparent_gaps),
                 )
             )
-            current_time += source_duration / speed_factor if speed_factor else source_duration
+            current_time += timeline_duration
             position += 1
 
+        self._track_segment_cache[cache_key] = (segments, transitions)
         return segments, transitions
 
     def _parse_transition(self, item: dict[str, Any], position: int) -> TransitionInfo | None:
@@ -450,10 +628,8 @@ class TimelineToFFmpeg:
 
         return max(0.01, total_input / total_output)
 
-    def _process_video_segment(
-        self, segment: TrackSegment, track_idx: int, seg_idx: int
-    ) -> str | None:
-        label = f"v{track_idx}_{seg_idx}"
+    def _process_video_segment(self, segment: TrackSegment) -> str | None:
+        label = self._label("v")
         if segment.is_gap:
             return self._generate_gap_video(segment, label)
         if segment.is_generator:
@@ -461,47 +637,37 @@ class TimelineToFFmpeg:
         if segment.input_index is None:
             return None
 
-        filters: list[str] = []
-        input_label = f"{segment.input_index}:v"
-        filters.append(
-            f"trim=start={segment.source_start}:duration={segment.source_duration}"
-        )
-        filters.append("setpts=PTS-STARTPTS")
-
+        timing = ""
         if segment.is_freeze:
-            framerate = self._framerate()
+            framerate = self._timeline_framerate
             frame_duration = 1.0 / framerate if framerate > 0 else 0.0
             stop_duration = max(0.0, segment.duration - frame_duration)
-            filters.append("select='eq(n,0)'")
+            timing = ",select='eq(n,0)'"
             if stop_duration > 0:
-                filters.append(
-                    f"tpad=stop_mode=clone:stop_duration={stop_duration}"
-                )
+                timing += f",tpad=stop_mode=clone:stop_duration={stop_duration}"
         else:
             has_speed_ramp = any(
                 str(effect.get("type", "")).lower() == "speed_ramp"
                 for effect in (segment.effects or [])
             )
             if segment.speed_factor != 1.0 and not has_speed_ramp:
-                pts_factor = 1.0 / segment.speed_factor
-                filters.append(f"setpts={pts_factor}*PTS")
-
-        width = self._video_width()
-        height = self._video_height()
-        filters.append(
-            f"scale={width}:{height}:force_original_aspect_ratio=decrease:flags=lanczos,"
-            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2"
+                timing = f",setpts={1.0 / segment.speed_factor}*PTS"
+
+        self._emit_filter(
+            self._video_filters,
+            _VIDEO_SEGMENT_TEMPLATE.format(
+                input=segment.input_index,
+                start=segment.source_start,
+                duration=segment.source_duration,
+                timing=timing,
+                scale=self._scale_pad_filter,
+                label=label,
+            ),
         )
-        filters.append("setsar=1")
-
-        filter_chain = ",".join(filters)
-        self._video_filters.append(f"[{input_label}]{filter_chain}[{label}]")
         return self._apply_video_effects(label, segment)
 
-    def _process_audio_segment(
-        self, segment: TrackSegment, track_idx: int, seg_idx: int
-    ) -> str | None:
-        label = f"a{track_idx}_{seg_idx}"
+    def _process_audio_segment(self, segment: TrackSegment) -> str | None:
+        label = self._label("a")
 
         if segment.is_gap or segment.is_generator:
             return self._generate_gap_audio(segment, label)
@@ -512,18 +678,22 @@ class TimelineToFFmpeg:
         if not self._has_audio_input(segment.input_index):
             return self._generate_gap_audio(segment, label)
 
-        filters: list[str] = []
-        input_label = f"{segment.input_index}:a"
-        filters.append(
-            f"atrim=start={segment.source_start}:duration={segment.source_duration}"
-        )
-        filters.append("asetpts=PTS-STARTPTS")
-
+        tempo = ""
         if segment.speed_factor != 1.0:
-            filters.extend(self._build_atempo_chain(segment.speed_factor))
+            tempo = "".join(
+                "," + stage for stage in self._build_atempo_chain(segment.speed_factor)
+            )
 
-        filter_chain = ",".join(filters)
-        self._audio_filters.append(f"[{input_label}]{filter_chain}[{label}]")
+        self._emit_filter(
+            self._audio_filters,
+            _AUDIO_SEGMENT_TEMPLATE.format(
+                input=segment.input_index,
+                start=segment.source_start,
+                duration=segment.source_duration,
+                tempo=tempo,
+                label=label,
+            ),
+        )
         return self._apply_audio_effects(label, segment)
 
     def _has_audio_input(self, input_index: int) -> bool:
@@ -682,15 +852,13 @@ class TimelineToFFmpeg:
         return current
 
     def _apply_simple_video_filter(self, input_label: str, expr: str) -> str:
-        output_label = f"vfx_{self._filter_counter}"
-        self._filter_counter += 1
-        self._video_filters.append(f"[{input_label}]{expr}[{output_label}]")
+        output_label = self._label("v")
+        self._emit_filter(self._video_filters, f"[{input_label}]{expr}[{output_label}]")
         return output_label
 
     def _apply_simple_audio_filter(self, input_label: str, expr: str) -> str:
-        output_label = f"afx_{self._filter_counter}"
-        self._filter_counter += 1
-        self._audio_filters.append(f"[{input_label}]{expr}[{output_label}]")
+        output_label = self._label("a")
+        self._emit_filter(self._audio_filters, f"[{input_label}]{expr}[{output_label}]")
         return output_label
 
     def _apply_lut(self, input_label: str, metadata: dict[str, Any]) -> str:
@@ -703,17 +871,18 @@ class TimelineToFFmpeg:
                 input_label, f"lut3d=file={path}"
             )
 
-        base_label = f"vlut_base_{self._filter_counter}"
-        lut_label = f"vlut_src_{self._filter_counter}"
-        lut_out = f"vlut_out_{self._filter_counter}"
-        output_label = f"vlut_mix_{self._filter_counter}"
-        self._filter_counter += 1
+        base_label = self._label("v")
+        lut_label = self._label("v")
+        lut_out = self._label("v")
+        output_label = self._label("v")
 
-        self._video_filters.append(
+        self._emit_filter(
+            self._video_filters,
             f"[{input_label}]split=2[{base_label}][{lut_label}]"
         )
-        self._video_filters.append(f"[{lut_label}]lut3d=file={path}[{lut_out}]")
-        self._video_filters.append(
+        self._emit_filter(self._video_filters, f"[{lut_label}]lut3d=file={path}[{lut_out}]")
+        self._emit_filter(
+            self._video_filters,
             f"[{base_label}][{lut_out}]blend=all_mode=normal:all_opacity={intensity}"
             f"[{output_label}]"
         )
@@ -752,8 +921,8 @@ class TimelineToFFmpeg:
         return self._apply_simple_video_filter(input_label, expr)
 
     def _apply_reframe(self, input_label: str, metadata: dict[str, Any]) -> str:
-        canvas_w = self._video_width()
-        canvas_h = self._video_height()
+        canvas_w = self._canvas_width
+        canvas_h = self._canvas_height
         width_value = self._normalize_to_pixels(metadata.get("width"), canvas_w)
         height_value = self._normalize_to_pixels(metadata.get("height"), canvas_h)
         width = None if width_value is None else max(1, int(round(width_value)))
@@ -768,8 +937,8 @@ class TimelineToFFmpeg:
         return self._apply_simple_video_filter(input_label, expr)
 
     def _apply_position(self, input_label: str, metadata: dict[str, Any]) -> str:
-        canvas_w = self._video_width()
-        canvas_h = self._video_height()
+        canvas_w = self._canvas_width
+        canvas_h = self._canvas_height
         width_value = self._normalize_to_pixels(metadata.get("width"), canvas_w)
         height_value = self._normalize_to_pixels(metadata.get("height"), canvas_h)
         width = canvas_w if width_value is None else max(1, int(round(width_value)))
@@ -785,8 +954,8 @@ class TimelineToFFmpeg:
         return self._apply_simple_video_filter(input_label, expr)
 
     def _apply_mask(self, input_label: str, metadata: dict[str, Any]) -> str:
-        canvas_w = self._video_width()
-        canvas_h = self._video_height()
+        canvas_w = self._canvas_width
+        canvas_h = self._canvas_height
         width_value = self._normalize_to_pixels(metadata.get("width"), canvas_w)
         height_value = self._normalize_to_pixels(metadata.get("height"), canvas_h)
         width = None if width_value is None else max(1, int(round(width_value)))
@@ -804,8 +973,8 @@ class TimelineToFFmpeg:
         return self._apply_simple_video_filter(input_label, expr)
 
     def _apply_mask_blur(self, input_label: str, metadata: dict[str, Any]) -> str:
-        canvas_w = self._video_width()
-        canvas_h = self._video_height()
+        canvas_w = self._canvas_width
+        canvas_h = self._canvas_height
         width_value = self._normalize_to_pixels(metadata.get("width"), canvas_w)
         height_value = self._normalize_to_pixels(metadata.get("height"), canvas_h)
         width = None if width_value is None else max(1, int(round(width_value)))
@@ -818,20 +987,22 @@ class TimelineToFFmpeg:
         y = int(round(0 if y_value is None else y_value))
         radius = metadata.get("radius", 8)
 
-        base_label = f"vblur_base_{self._filter_counter}"
-        blur_label = f"vblur_src_{self._filter_counter}"
-        crop_label = f"vblur_crop_{self._filter_counter}"
-        out_label = f"vblur_out_{self._filter_counter}"
-        self._filter_counter += 1
+        base_label = self._label("v")
+        blur_label = self._label("v")
+        crop_label = self._label("v")
+        out_label = self._label("v")
 
-        self._video_filters.append(
+        self._emit_filter(
+            self._video_filters,
             f"[{input_label}]split=2[{base_label}][{blur_label}]"
         )
-        self._video_filters.append(
+        self._emit_filter(
+            self._video_filters,
             f"[{blur_label}]crop={width}:{height}:{x}:{y},boxblur=lr={radius}:cr={radius}"
             f"[{crop_label}]"
         )
-        self._video_filters.append(
+        self._emit_filter(
+            self._video_filters,
             f"[{base_label}][{crop_label}]overlay={x}:{y}[{out_label}]"
         )
         return out_label
@@ -841,11 +1012,11 @@ class TimelineToFFmpeg:
     ) -> str:
         start_zoom = float(metadata.get("start_zoom", 1.0))
         end_zoom = float(metadata.get("end_zoom", 1.0))
-        canvas_w = self._video_width()
-        canvas_h = self._video_height()
+        canvas_w = self._canvas_width
+        canvas_h = self._canvas_height
         center_x = self._normalize_ratio(metadata.get("center_x"), canvas_w, 0.5)
         center_y = self._normalize_ratio(metadata.get("center_y"), canvas_h, 0.5)
-        framerate = self._framerate()
+        framerate = self._timeline_framerate
         frames = max(1, int(segment.duration * framerate))
 
         zoom_expr = (
@@ -1045,19 +1216,21 @@ class TimelineToFFmpeg:
         blur = float(metadata.get("blur", 20))
         blur = max(0.1, blur)
 
-        base_label = f"vglow_base_{self._filter_counter}"
-        glow_label = f"vglow_src_{self._filter_counter}"
-        blur_label = f"vglow_blur_{self._filter_counter}"
-        out_label = f"vglow_out_{self._filter_counter}"
-        self._filter_counter += 1
+        base_label = self._label("v")
+        glow_label = self._label("v")
+        blur_label = self._label("v")
+        out_label = self._label("v")
 
-        self._video_filters.append(
+        self._emit_filter(
+            self._video_filters,
             f"[{input_label}]split=2[{base_label}][{glow_label}]"
         )
-        self._video_filters.append(
+        self._emit_filter(
+            self._video_filters,
             f"[{glow_label}]gblur=sigma={blur}[{blur_label}]"
         )
-        self._video_filters.append(
+        self._emit_filter(
+            self._video_filters,
             f"[{base_label}][{blur_label}]blend=all_mode=screen:all_opacity={strength}"
             f"[{out_label}]"
         )
@@ -1113,20 +1286,21 @@ class TimelineToFFmpeg:
         high = float(metadata.get("high", 0.4))
         blur = float(metadata.get("blur", 2.0))
 
-        base_label = f"vedge_base_{self._filter_counter}"
-        edge_label = f"vedge_src_{self._filter_counter}"
-        glow_label = f"vedge_glow_{self._filter_counter}"
-        out_label = f"vedge_out_{self._filter_counter}"
-        self._filter_counter += 1
+        base_label = self._label("v")
+        edge_label = self._label("v")
+        glow_label = self._label("v")
+        out_label = self._label("v")
 
-        self._video_filters.append(
+        self._emit_filter(
+            self._video_filters,
             f"[{input_label}]split=2[{base_label}][{edge_label}]"
         )
         edge_expr = f"edgedetect=low={low}:high={high}"
         if blur > 0:
             edge_expr += f",gblur=sigma={blur}"
-        self._video_filters.append(f"[{edge_label}]{edge_expr}[{glow_label}]")
-        self._video_filters.append(
+        self._emit_filter(self._video_filters, f"[{edge_label}]{edge_expr}[{glow_label}]")
+        self._emit_filter(
+            self._video_filters,
             f"[{base_label}][{glow_label}]blend=all_mode=screen:all_opacity={strength}"
             f"[{out_label}]"
         )
@@ -1259,9 +1433,9 @@ class TimelineToFFmpeg:
     def _get_overlay_generator(self) -> OverlayGenerator:
         if self._overlay_generator is None:
             self._overlay_generator = OverlayGenerator(
-                width=self._video_width(),
-                height=self._video_height(),
-                fps=self._framerate(),
+                width=self._canvas_width,
+                height=self._canvas_height,
+                fps=self._timeline_framerate,
                 output_dir=self._generator_dir,
             )
         return self._overlay_generator
@@ -1295,22 +1469,25 @@ class TimelineToFFmpeg:
             "format=rgba",
             "setsar=1",
         ]
-        self._video_filters.append(
+        self._emit_filter(
+            self._video_filters,
             f"[{input_label}]{','.join(filters)}[{label}]"
         )
         return label
 
     def _generate_gap_video(self, segment: TrackSegment, label: str) -> str:
-        width = self._video_width()
-        height = self._video_height()
-        framerate = self._framerate()
+        width = self._canvas_width
+        height = self._canvas_height
+        framerate = self._timeline_framerate
         if segment.transparent:
-            self._video_filters.append(
+            self._emit_filter(
+                self._video_filters,
                 f"color=c=black@0.0:s={width}x{height}:d={segment.duration}:r={framerate},"
                 f"format=rgba,setsar=1[{label}]"
             )
         else:
-            self._video_filters.append(
+            self._emit_filter(
+                self._video_filters,
                 f"color=c=black:s={width}x{height}:d={segment.duration}:r={framerate},"
                 f"setsar=1[{label}]"
             )
@@ -1319,18 +1496,19 @@ class TimelineToFFmpeg:
     def _generate_gap_audio(self, segment: TrackSegment, label: str) -> str:
         sample_rate = self.preset.get("audio", {}).get("sample_rate", 48000)
         channels = self.preset.get("audio", {}).get("channels", 2)
-        self._audio_filters.append(
-            f"anullsrc=r={sample_rate}:cl={'stereo' if channels == 2 else 'mono'},"
-            f"atrim=duration={segment.duration}[{label}]"
+        self._emit_filter(
+            self._audio_filters,
+            f"anullsrc=r={sample_rate}:cl={'stereo' if channels == 2 else 'mono'}:"
+            f"d={segment.duration}[{label}]"
         )
         return label
 
     def _generate_generator_video(self, segment: TrackSegment, label: str) -> str:
         kind = segment.generator_params.get("kind", "SolidColor")
         params = dict(segment.generator_params.get("params", {}) or {})
-        width = self._video_width()
-        height = self._video_height()
-        framerate = self._framerate()
+        width = self._canvas_width
+        height = self._canvas_height
+        framerate = self._timeline_framerate
 
         kind_lower = str(kind).lower().replace("-", "_")
         if kind_lower == "callout":
@@ -1388,7 +1566,8 @@ class TimelineToFFmpeg:
                 drawtext_parts.append("boxborderw=8")
 
             drawtext = "drawtext=" + ":".join(drawtext_parts)
-            self._video_filters.append(
+            self._emit_filter(
+                self._video_filters,
                 f"color=c=black@0.0:s={width}x{height}:d={segment.duration}:r={framerate},"
                 f"format=rgba,{drawtext},setsar=1[{label}]"
             )
@@ -1404,17 +1583,20 @@ class TimelineToFFmpeg:
             return self._generate_graphics_overlay(kind_lower, params, segment, label)
         elif kind_lower == "solidcolor":
             color = params.get("color", "black")
-            self._video_filters.append(
+            self._emit_filter(
+                self._video_filters,
                 f"color=c={color}:s={width}x{height}:d={segment.duration}:r={framerate},"
                 f"setsar=1[{label}]"
             )
         elif kind_lower == "bars":
-            self._video_filters.append(
+            self._emit_filter(
+                self._video_filters,
                 f"smptebars=s={width}x{height}:d={segment.duration}:r={framerate},"
                 f"setsar=1[{label}]"
             )
         else:
-            self._video_filters.append(
+            self._emit_filter(
+                self._video_filters,
                 f"color=c=black:s={width}x{height}:d={segment.duration}:r={framerate},"
                 f"setsar=1[{label}]"
             )
@@ -1435,8 +1617,7 @@ class TimelineToFFmpeg:
         transition_idx = 0
 
         for i in range(1, len(segments)):
-            out_label = f"vtrans_{self._filter_counter}"
-            self._filter_counter += 1
+            out_label = self._label("v")
             next_duration = (
                 segment_durations[i] if i < len(segment_durations) else 0.0
             )
@@ -1454,7 +1635,8 @@ class TimelineToFFmpeg:
                 )
                 if transition_duration > 0:
                     offset = max(0.0, result_duration - transition_duration)
-                    self._video_filters.append(
+                    self._emit_filter(
+                        self._video_filters,
                         f"[{result}][{segments[i]}]xfade=transition={trans_type}:"
                         f"duration={transition_duration}:offset={offset}[{out_label}]"
                     )
@@ -1462,12 +1644,14 @@ class TimelineToFFmpeg:
                         result_duration + next_duration - transition_duration
                     )
                 else:
-                    self._video_filters.append(
+                    self._emit_filter(
+                        self._video_filters,
                         f"[{result}][{segments[i]}]concat=n=2:v=1:a=0[{out_label}]"
                     )
                     result_duration += next_duration
             else:
-                self._video_filters.append(
+                self._emit_filter(
+                    self._video_filters,
                     f"[{result}][{segments[i]}]concat=n=2:v=1:a=0[{out_label}]"
                 )
                 result_duration += next_duration
@@ -1490,8 +1674,7 @@ class TimelineToFFmpeg:
         transition_idx = 0
 
         for i in range(1, len(segments)):
-            out_label = f"atrans_{self._filter_counter}"
-            self._filter_counter += 1
+            out_label = self._label("a")
             next_duration = (
                 segment_durations[i] if i < len(segment_durations) else 0.0
             )
@@ -1507,7 +1690,8 @@ class TimelineToFFmpeg:
                     0.0, min(trans.duration, result_duration, next_duration)
                 )
                 if transition_duration > 0:
-                    self._audio_filters.append(
+                    self._emit_filter(
+                        self._audio_filters,
                         f"[{result}][{segments[i]}]acrossfade=d={transition_duration}"
                         f"[{out_label}]"
                     )
@@ -1515,12 +1699,14 @@ class TimelineToFFmpeg:
                         result_duration + next_duration - transition_duration
                     )
                 else:
-                    self._audio_filters.append(
+                    self._emit_filter(
+                        self._audio_filters,
                         f"[{result}][{segments[i]}]concat=n=2:v=0:a=1[{out_label}]"
                     )
                     result_duration += next_duration
             else:
-                self._audio_filters.append(
+                self._emit_filter(
+                    self._audio_filters,
                     f"[{result}][{segments[i]}]concat=n=2:v=0:a=1[{out_label}]"
                 )
                 result_duration += next_duration
@@ -1532,10 +1718,10 @@ class TimelineToFFmpeg:
     def _concat_video_segments(self, segments: list[str]) -> str:
         if len(segments) == 1:
             return segments[0]
-        out_label = f"vconcat_{self._filter_counter}"
-        self._filter_counter += 1
-        inputs = "".join(f"[{s}]" for s in segments)
-        self._video_filters.append(
+        out_label = self._label("v")
+        inputs = "[" + "][".join(segments) + "]"
+        self._emit_filter(
+            self._video_filters,
             f"{inputs}concat=n={len(segments)}:v=1:a=0[{out_label}]"
         )
         return out_label
@@ -1543,10 +1729,10 @@ class TimelineToFFmpeg:
     def _concat_audio_segments(self, segments: list[str]) -> str:
         if len(segments) == 1:
             return segments[0]
-        out_label = f"aconcat_{self._filter_counter}"
-        self._filter_counter += 1
-        inputs = "".join(f"[{s}]" for s in segments)
-        self._audio_filters.append(
+        out_label = self._label("a")
+        inputs = "[" + "][".join(segments) + "]"
+        self._emit_filter(
+            self._audio_filters,
             f"{inputs}concat=n={len(segments)}:v=0:a=1[{out_label}]"
         )
         return out_label
@@ -1556,9 +1742,9 @@ class TimelineToFFmpeg:
             return tracks[0]
         result = tracks[0]
         for i in range(1, len(tracks)):
-            out_label = f"voverlay_{self._filter_counter}"
-            self._filter_counter += 1
-            self._video_filters.append(
+            out_label = self._label("v")
+            self._emit_filter(
+                self._video_filters,
                 f"[{result}][{tracks[i]}]overlay=shortest=1[{out_label}]"
             )
             result = out_label
@@ -1567,27 +1753,23 @@ class TimelineToFFmpeg:
     def _mix_audio_tracks(self, tracks: list[str]) -> str:
         if len(tracks) == 1:
             return tracks[0]
-        out_label = f"amix_{self._filter_counter}"
-        self._filter_counter += 1
-        inputs = "".join(f"[{t}]" for t in tracks)
-        self._audio_filters.append(
+        out_label = self._label("a")
+        inputs = "[" + "][".join(tracks) + "]"
+        self._emit_filter(
+            self._audio_filters,
             f"{inputs}amix=inputs={len(tracks)}:duration=longest[{out_label}]"
         )
         return out_label
 
     def _extract_audio_from_video(self) -> str | None:
-        tracks = [
-            t
-            for t in self.timeline.get("tracks", {}).get("children", [])
-            if t.get("OTIO_SCHEMA") == "Track.1" and t.get("kind") == "Video"
-        ]
+        tracks = self._video_tracks
         if not tracks:
             return None
         segments, transitions = self._extract_track_segments(tracks[0])
         segment_outputs: list[str] = []
         segment_durations: list[float] = []
-        for seg_idx, segment in enumerate(segments):
-            seg_out = self._process_audio_segment(segment, 0, seg_idx)
+        for segment in segments:
+            seg_out = self._process_audio_segment(segment)
             if seg_out:
                 segment_outputs.append(seg_out)
                 segment_durations.append(segment.duration)
@@ -1598,100 +1780,50 @@ class TimelineToFFmpeg:
         )
 
     def _build_atempo_chain(self, tempo: float) -> list[str]:
-        filters: list[str] = []
-        while tempo < 0.5 or tempo > 2.0:
-            if tempo < 0.5:
-                filters.append("atempo=0.5")
-                tempo /= 0.5
-            elif tempo > 2.0:
-                filters.append("atempo=2.0")
-                tempo /= 2.0
-        if tempo != 1.0:
+        if tempo <= 0:
+            raise RenderError(f"Unsupported audio tempo: {tempo}")
+        if tempo > 2.0:
+            steps = math.ceil(math.log2(tempo / 2.0))
+            filters = ["atempo=2.0"] * steps
+            tempo /= 2.0**steps
+        elif tempo < 0.5:
+            steps = math.ceil(math.log2(0.5 / tempo))
+            filters = ["atempo=0.5"] * steps
+            tempo *= 2.0**steps
+        else:
+            filters = []
+        if not math.isclose(tempo, 1.0):
             filters.append(f"atempo={tempo}")
         return filters
 
     def _map_transition_type(self, trans_type: str) -> str:
-        mapping = {
-            "SMPTE_Dissolve": "dissolve",
-            "FadeIn": "fade",
-            "FadeOut": "fade",
-            "Wipe": "wipeleft",
-            "Slide": "slideleft",
-            "Custom": "dissolve",
-        }
-        if trans_type in mapping:
-            return mapping[trans_type]
-
-        xfade_transitions = {
-            "custom",
-            "fade",
-            "wipeleft",
-            "wiperight",
-            "wipeup",
-            "wipedown",
-            "slideleft",
-            "slideright",
-            "slideup",
-            "slidedown",
-            "circlecrop",
-            "rectcrop",
-            "distance",
-            "fadeblack",
-            "fadewhite",
-            "radial",
-            "smoothleft",
-            "smoothright",
-            "smoothup",
-            "smoothdown",
-            "circleopen",
-            "circleclose",
-            "vertopen",
-            "vertclose",
-            "horzopen",
-            "horzclose",
-            "dissolve",
-            "pixelize",
-            "diagtl",
-            "diagtr",
-            "diagbl",
-            "diagbr",
-            "hlslice",
-            "hrslice",
-            "vuslice",
-            "vdslice",
-            "hblur",
-            "fadegrays",
-            "wipetl",
-            "wipetr",
-            "wipebl",
-            "wipebr",
-            "squeezeh",
-            "squeezev",
-            "zoomin",
-            "fadefast",
-            "fadeslow",
-            "hlwind",
-            "hrwind",
-            "vuwind",
-            "vdwind",
-            "coverleft",
-            "coverright",
-            "coverup",
-            "coverdown",
-            "revealleft",
-            "revealright",
-            "revealup",
-            "revealdown",
-        }
+        if trans_type in _TRANSITION_MAP:
+            return _TRANSITION_MAP[trans_type]
+
         lower = str(trans_type).lower()
         if lower == "custom":
             return "dissolve"
-        if lower in xfade_transitions:
+        if lower in _XFADE_TRANSITIONS:
             return lower
         return "dissolve"
 
+    def _label(self, prefix: str) -> str:
+        # Short labels keep big graphs under the argv / script size limits.
+        label = prefix + _b36(self._filter_counter)
+        self._filter_counter += 1
+        return label
+
+    def _emit_filter(self, buf: io.StringIO, filter_str: str) -> None:
+        if buf.tell():
+            buf.write(";")
+        buf.write(filter_str)
+
     def _combine_filters(self) -> str:
-        return ";".join(self._video_filters + self._audio_filters)
+        video = self._video_filters.getvalue()
+        audio = self._audio_filters.getvalue()
+        if video and audio:
+            return f"{video};{audio}"
+        return video or audio
 
     def _time_seconds(self, rational: dict[str, Any] | None) -> float:
         if not rational:
@@ -1710,10 +1842,13 @@ class TimelineToFFmpeg:
     ) -> float | None:
         if value is None:
             return None
-        try:
+        if isinstance(value, (int, float)):
             numeric = float(value)
-        except (TypeError, ValueError):
-            return None
+        else:
+            try:
+                numeric = float(value)
+            except (TypeError, ValueError):
+                return None
         if 0.0 <= numeric <= 1.0:
             return numeric * max_value
         return numeric
@@ -1723,10 +1858,13 @@ class TimelineToFFmpeg:
     ) -> float:
         if value is None:
             return default
-        try:
+        if isinstance(value, (int, float)):
             numeric = float(value)
-        except (TypeError, ValueError):
-            return default
+        else:
+            try:
+                numeric = float(value)
+            except (TypeError, ValueError):
+                return default
         if 0.0 <= numeric <= 1.0:
             ratio = numeric
         elif max_value > 0:
@@ -2398,7 +2536,10 @@ class FFmpegRenderer:
         for input_entry in inputs:
             cmd.extend(input_entry.to_args())
 
-        if filter_complex:
+        if len(filter_complex) > FILTER_COMPLEX_SCRIPT_THRESHOLD:
+            script_path = self._write_filter_script(filter_complex)
+            cmd.extend(["-filter_complex_script", str(script_path)])
+        elif filter_complex:
             cmd.extend(["-filter_complex", filter_complex])
 
         for m in maps:
@@ -2411,6 +2552,18 @@ class FFmpegRenderer:
 
         return cmd
 
+    def _write_filter_script(self, filter_complex: str) -> Path:
+        # Lives in temp_dir, so cleanup() removes it with the rest of the job.
+        with tempfile.NamedTemporaryFile(
+            mode="w",
+            suffix=".txt",
+            prefix="filter_complex_",
+            dir=self.temp_dir,
+            delete=False,
+        ) as script:
+            script.write(filter_complex)
+        return Path(script.name)
+
     def _build_filter_graph(
         self,
         timeline: dict[str, Any],
@@ -2787,44 +2940,18 @@ class FFmpegRenderer:
         return tuned
 
     def _normalize_prores_profile(self, value: Any) -> str:
-        mapping = {
-            "proxy": "0",
-            "lt": "1",
-            "standard": "2",
-            "hq": "3",
-            "4444": "4",
-            "4444xq": "5",
-        }
         text = str(value).strip().lower()
-        if text in mapping:
-            return mapping[text]
+        if text in _PRORES_PROFILE_MAP:
+            return _PRORES_PROFILE_MAP[text]
         if text in {"0", "1", "2", "3", "4", "5"}:
             return text
         return "3"
 
     def _map_vp9_cpu_used(self, preset: str) -> int:
-        mapping = {
-            "ultrafast": 8,
-            "superfast": 7,
-            "veryfast": 6,
-            "faster": 5,
-            "fast": 4,
-            "medium": 3,
-            "slow": 2,
-            "slower": 1,
-            "veryslow": 0,
-        }
-        return mapping.get(preset, 3)
+        return _VP9_CPU_USED_MAP.get(preset, 3)
 
     def _cpu_encoder_for_codec(self, codec: str) -> str | None:
-        mapping = {
-            "h264": "libx264",
-            "h265": "libx265",
-            "prores": "prores_ks",
-            "vp9": "libvpx-vp9",
-            "av1": "libsvtav1",
-        }
-        return mapping.get(codec)
+        return _CPU_ENCODERS.get(codec)
 
     def _double_bitrate(self, bitrate: str) -> str | None:
         match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)([kKmMgG])\s*", bitrate)
@@ -2839,32 +2966,10 @@ class FFmpegRenderer:
         return f"{value_str}{unit}"
 
     def _map_nvenc_preset(self, preset: str) -> str:
-        mapping = {
-            "ultrafast": "fast",
-            "superfast": "fast",
-            "veryfast": "fast",
-            "faster": "fast",
-            "fast": "fast",
-            "medium": "medium",
-            "slow": "slow",
-            "slower": "slow",
-            "veryslow": "slow",
-        }
-        return mapping.get(preset, "medium")
+        return _NVENC_PRESET_MAP.get(preset, "medium")
 
     def _map_svtav1_preset(self, preset: str) -> int:
-        mapping = {
-            "ultrafast": 12,
-            "superfast": 11,
-            "veryfast": 10,
-            "faster": 9,
-            "fast": 8,
-            "medium": 6,
-            "slow": 4,
-            "slower": 3,
-            "veryslow": 2,
-        }
-        return mapping.get(preset, 6)
+        return _SVTAV1_PRESET_MAP.get(preset, 6)
 
     def _resolve_gop_size(self, video: dict[str, Any]) -> int:
         raw_gop = video.get("gop_size")
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import math
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -318,12 +320,19 @@ class OverlayGenerator:
         sequence_dir = self.output_dir / safe_label
         sequence_dir.mkdir(parents=True, exist_ok=True)
         pattern = sequence_dir / "frame_%06d.png"
-        for idx in range(frame_count):
+
+        def render(idx: int) -> None:
             time_s = idx / self.fps
             frame = self._render_frame(kind, params, time_s, duration, animation)
             frame_path = sequence_dir / f"frame_{idx + 1:06d}.png"
             frame.save(frame_path, "PNG")
 
+        # Frames are independent and PNG encoding releases the GIL, so the
+        # sequence renders across cores instead of one frame at a time.
+        workers = min(frame_count, os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(render, range(frame_count)))
+
         return OverlayAsset(
             path=str(pattern),
             fps=self.fps,
@@ -103,11 +103,11 @@ def test_process_audio_segment_accepts_audio_stream_labels(
         input_index=0,
     )
 
-    label = converter._process_audio_segment(segment, 0, 0)
+    label = converter._process_audio_segment(segment)
 
-    assert label == "a0_0"
-    assert any("atrim=" in entry for entry in converter._audio_filters)
-    assert not any("anullsrc=" in entry for entry in converter._audio_filters)
+    assert label == "a0"
+    assert "atrim=" in converter._audio_filters.getvalue()
+    assert "anullsrc=" not in converter._audio_filters.getvalue()
 
 
 def test_process_audio_segment_generates_silence_when_no_audio(ffmpeg_renderer_module):
@@ -125,10 +125,62 @@ def test_process_audio_segment_generates_silence_when_no_audio(ffmpeg_renderer_m
         input_index=0,
     )
 
-    label = converter._process_audio_segment(segment, 0, 0)
+    label = converter._process_audio_segment(segment)
 
-    assert label == "a0_0"
-    assert any("anullsrc=" in entry for entry in converter._audio_filters)
+    assert label == "a0"
+    assert "anullsrc=" in converter._audio_filters.getvalue()
+
+
+def test_audio_from_video_reuses_video_track_segments(ffmpeg_renderer_module, tmp_path):
+    clip = {
+        "OTIO_SCHEMA": "Clip.1",
+        "source_range": {
+            "start_time": {"value": 0, "rate": 24},
+            "duration": {"value": 48, "rate": 24},
+        },
+        "media_reference": {"OTIO_SCHEMA": "ExternalReference.1", "asset_id": "asset-1"},
+    }
+    converter = ffmpeg_renderer_module.TimelineToFFmpeg(
+        timeline={
+            "tracks": {
+                "children": [
+                    {"OTIO_SCHEMA": "Track.1", "kind": "Video", "children": [clip]}
+                ]
+            }
+        },
+        asset_map={"asset-1": "clip.mp4"},
+        preset={"video": {}, "audio": {"sample_rate": 48000, "channels": 2}},
+        input_streams={0: {"v", "a"}},
+        temp_dir=tmp_path,
+    )
+    original_parse_effects = converter._parse_effects
+    calls = []
+
+    def counting_parse_effects(effects):
+        calls.append(effects)
+        return original_parse_effects(effects)
+
+    converter._parse_effects = counting_parse_effects
+
+    _, filter_complex, maps = converter.build()
+
+    assert len(calls) == 1
+    assert "[0:a]atrim=" in filter_complex
+    assert len(maps) == 2
+
+
+def test_atempo_chain_factors_multiply_to_tempo(ffmpeg_renderer_module):
+    converter = ffmpeg_renderer_module.TimelineToFFmpeg(
+        timeline={"tracks": {"children": []}},
+        asset_map={},
+        preset={},
+        input_streams={},
+    )
+
+    assert converter._build_atempo_chain(4.5) == ["atempo=2.0", "atempo=2.0", "atempo=1.125"]
+    assert converter._build_atempo_chain(0.25) == ["atempo=0.5", "atempo=0.5"]
+    with pytest.raises(ffmpeg_renderer_module.RenderError):
+        converter._build_atempo_chain(0)
 
 
 def test_probe_streams_normalizes_ffprobe_codec_types(monkeypatch, ffmpeg_renderer_module, tmp_path):
@@ -186,6 +238,24 @@ def test_probe_streams_fallback_normalizes_ffmpeg_output(monkeypatch, ffmpeg_ren
     assert streams == {0: {"v", "a"}}
 
 
+def test_large_filter_graph_goes_to_script_file(monkeypatch, ffmpeg_renderer_module, tmp_path):
+    monkeypatch.setenv("RENDER_TEMP_DIR", str(tmp_path))
+    renderer = ffmpeg_renderer_module.FFmpegRenderer(_manifest())
+    filter_complex = ";".join(f"[0:v]null[v{i}]" for i in range(2000))
+    monkeypatch.setattr(
+        renderer,
+        "_build_filter_graph",
+        lambda *args: ([], filter_complex, ["[v0]"]),
+    )
+
+    cmd = renderer._build_ffmpeg_command({}, {})
+
+    assert "-filter_complex" not in cmd
+    script_path = Path(cmd[cmd.index("-filter_complex_script") + 1])
+    assert script_path.parent == tmp_path
+    assert script_path.read_text() == filter_complex
+
+
 def test_effect_asset_cache_paths_avoid_filename_collisions(
     monkeypatch,
     ffmpeg_renderer_module,